@@ -0,0 +1 @@
+# Caché por usuario con versión de datos
@@ -0,0 +1,170 @@
+import threading
+from collections import Counter, OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import RegistroFinanciero
+from ..strategies import FactoryIndicadores
+from .versiones import cache_compartida, clave_usuario
+
+
+_SIN_VALOR = object()
+
+
+# -----------------------------------------------------
+# Memoria del proceso (LRU acotada)
+# -----------------------------------------------------
+class MemoriaLRU:
+    """
+    Diccionario acotado a `tamanio` entradas: al llenarse descarta la
+    usada hace más tiempo. Seguro entre hilos. Sin `tamanio` se lee
+    FINANZAS_INDICADORES_LRU en cada escritura, así override_settings y
+    los cambios en tiempo de ejecución se respetan.
+    """
+
+    def __init__(self, tamanio=None):
+        self._tamanio = tamanio
+        self._datos = OrderedDict()
+        self._bloqueo = threading.Lock()
+
+    @property
+    def tamanio(self):
+        if self._tamanio is not None:
+            return self._tamanio
+        return getattr(settings, "FINANZAS_INDICADORES_LRU", 512)
+
+    def get(self, clave, default=None):
+        with self._bloqueo:
+            if clave not in self._datos:
+                return default
+            self._datos.move_to_end(clave)
+            return self._datos[clave]
+
+    def set(self, clave, valor):
+        with self._bloqueo:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            tamanio = self.tamanio
+            while len(self._datos) > tamanio:
+                self._datos.popitem(last=False)
+
+    def clear(self):
+        with self._bloqueo:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+_memoria = MemoriaLRU()
+
+# Aciertos por nivel ("memoria", "compartida") y fallos (indicadores calculados)
+_contadores = Counter()
+_bloqueo_contadores = threading.Lock()
+
+
+def _contar(clave, cantidad=1):
+    with _bloqueo_contadores:
+        _contadores[clave] += cantidad
+
+
+def estadisticas():
+    """Aciertos y fallos desde el arranque (o el último reiniciar_estadisticas)."""
+    with _bloqueo_contadores:
+        return {
+            "aciertos_memoria": _contadores["memoria"],
+            "aciertos_compartida": _contadores["compartida"],
+            "fallos": _contadores["fallos"],
+            "entradas_memoria": len(_memoria),
+        }
+
+
+def reiniciar_estadisticas():
+    with _bloqueo_contadores:
+        _contadores.clear()
+
+
+def limpiar_memoria():
+    _memoria.clear()
+
+
+def _usar_compartida():
+    return getattr(settings, "FINANZAS_INDICADORES_CACHE_COMPARTIDA", False)
+
+
+def _calcular(user_id, tipos, desde, hasta):
+    registros = RegistroFinanciero.objects.filter(user_id=user_id)
+    if desde is not None:
+        registros = registros.filter(fecha__gte=desde)
+    if hasta is not None:
+        registros = registros.filter(fecha__lte=hasta)
+    return FactoryIndicadores.calcular(tipos, registros)
+
+
+# -----------------------------------------------------
+# Indicadores memorizados
+# -----------------------------------------------------
+def indicadores_usuario(user_id, tipos, desde=None, hasta=None):
+    """
+    Valores {tipo: valor} de los indicadores de FactoryIndicadores sobre
+    los registros del usuario entre `desde` y `hasta` (incluidos).
+
+    Cada resultado se guarda con clave (indicador, usuario, período, día,
+    versión de datos del usuario): cualquier escritura del usuario cambia
+    la versión, así nunca se sirve un valor viejo. Se busca primero en la
+    memoria LRU del proceso y, si FINANZAS_INDICADORES_CACHE_COMPARTIDA
+    está activo, en la caché de Django. Los que faltan se calculan juntos
+    en un único aggregate().
+
+    Con una caché propia del proceso (LocMemCache) la versión tampoco se
+    comparte: una escritura atendida por otro worker no la cambiaría aquí,
+    así que no se memoriza nada y siempre se calcula.
+    """
+    if not cache_compartida():
+        unicos = list(dict.fromkeys(tipos))
+        _contar("fallos", len(unicos))
+        calculados = _calcular(user_id, unicos, desde, hasta)
+        return {tipo: calculados[tipo] for tipo in tipos}
+
+    # El día forma parte de la clave: las ventanas móviles dependen de hoy
+    base = clave_usuario("indicadores", user_id, date.today().isoformat(), desde or "", hasta or "")
+    claves = {tipo: f"{base}:{tipo}" for tipo in tipos}
+    compartida = _usar_compartida()
+
+    resultados = {}
+    for tipo, clave in claves.items():
+        valor = _memoria.get(clave, _SIN_VALOR)
+        if valor is not _SIN_VALOR:
+            _contar("memoria")
+            resultados[tipo] = valor
+
+    faltantes = [tipo for tipo in claves if tipo not in resultados]
+    if faltantes and compartida:
+        encontrados = cache.get_many([claves[tipo] for tipo in faltantes])
+        for tipo in faltantes:
+            if claves[tipo] in encontrados:
+                _contar("compartida")
+                resultados[tipo] = encontrados[claves[tipo]]
+                _memoria.set(claves[tipo], resultados[tipo])
+        faltantes = [tipo for tipo in faltantes if tipo not in resultados]
+
+    if faltantes:
+        _contar("fallos", len(faltantes))
+
+        calculados = _calcular(user_id, faltantes, desde, hasta)
+        for tipo, valor in calculados.items():
+            _memoria.set(claves[tipo], valor)
+        if compartida:
+            cache.set_many(
+                {claves[tipo]: valor for tipo, valor in calculados.items()},
+                getattr(settings, "FINANZAS_CACHE_TIMEOUT", 300),
+            )
+        resultados.update(calculados)
+
+    return {tipo: resultados[tipo] for tipo in tipos}
+
+
+def indicador_usuario(user_id, tipo, desde=None, hasta=None):
+    return indicadores_usuario(user_id, [tipo], desde, hasta)[tipo]
@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+# Backends que guardan los datos dentro de cada proceso: no ven las
+# versiones que incrementan otros procesos (comandos, otros workers)
+_CACHES_LOCALES = (LocMemCache, DummyCache)
+
+
+# -----------------------------------------------------
+# Versión de datos por usuario
+# -----------------------------------------------------
+def _clave_version(user_id):
+    return f"finanzas:version:{user_id}"
+
+
+def _version_inicial():
+    # Base nueva si la versión se perdió (expiración, reinicio):
+    # así nunca se reutilizan entradas guardadas con una versión vieja.
+    return time.time_ns()
+
+
+def obtener_version(user_id):
+    clave = _clave_version(user_id)
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, _version_inicial(), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def incrementar_version(user_id):
+    """
+    Invalida todas las entradas cacheadas del usuario.
+    Se vuelve a incrementar al confirmar la transacción para que una
+    lectura concurrente no deje guardados datos previos al commit.
+    """
+    def _incrementar():
+        clave = _clave_version(user_id)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, _version_inicial(), timeout=None)
+
+    _incrementar()
+    transaction.on_commit(_incrementar)
+
+
+# -----------------------------------------------------
+# Claves y lectura
+# -----------------------------------------------------
+def clave_usuario(prefijo, user_id, *partes):
+    sufijo = ":".join(str(parte) for parte in partes)
+    return f"finanzas:{prefijo}:{user_id}:{obtener_version(user_id)}:{sufijo}"
+
+
+def cache_compartida():
+    return not isinstance(caches["default"], _CACHES_LOCALES)
+
+
+def obtener_o_calcular(clave, calcular, timeout=None):
+    """
+    Devuelve el valor cacheado en `clave` o lo calcula y lo guarda.
+    Si la caché no es compartida entre procesos siempre calcula: una
+    invalidación hecha desde otro proceso no llegaría y se serviría un
+    valor viejo hasta que expire.
+    """
+    if not cache_compartida():
+        return calcular()
+
+    valor = cache.get(clave)
+    if valor is None:
+        valor = calcular()
+        if timeout is None:
+            timeout = getattr(settings, "FINANZAS_CACHE_TIMEOUT", 300)
+        cache.set(clave, valor, timeout)
+    return valor
@@ -1,16 +1,71 @@
-from decimal import Decimal
+from decimal import InvalidOperation
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa Python puro
+    np = None
+
+from .dinero import CERO, a_centavos, de_centavos, sobrante_centavos
+
 
 def calcular_sobrante(presupuesto, alimento, ahorro, productos):
     """
-    Cálculo centralizado del sobrante.
+    Cálculo centralizado del sobrante (ver dinero.sobrante_centavos).
+    Devuelve un Decimal con 2 decimales; con montos inválidos, 0.
     """
     try:
-        presupuesto = Decimal(presupuesto)
-        alimento = Decimal(alimento)
-        ahorro = Decimal(ahorro)
-        productos = Decimal(productos)
-    except:
-        return Decimal("0.00")
-
-    sobrante = presupuesto - alimento - ahorro - productos
-    return sobrante if sobrante >= 0 else Decimal("0.00")
\ No newline at end of file
+        centavos = sobrante_centavos(
+            a_centavos(presupuesto),
+            a_centavos(alimento),
+            a_centavos(ahorro),
+            a_centavos(productos),
+        )
+    except InvalidOperation:
+        return CERO
+
+    return de_centavos(centavos)
+
+
+# -----------------------------------------------------
+# Cálculo por columnas (centavos enteros)
+# -----------------------------------------------------
+def calcular_sobrantes(presupuestos, alimentos, ahorros, productos):
+    """
+    Misma regla que calcular_sobrante, para columnas enteras de una vez.
+    Recibe secuencias de centavos enteros (listas o arrays) del mismo
+    largo y devuelve la columna de sobrantes en centavos, mínimo 0.
+
+    Con NumPy instalado devuelve un array int64; si no, una lista.
+    """
+    if np is not None:
+        sobrantes = (
+            np.asarray(presupuestos, dtype=np.int64)
+            - np.asarray(alimentos, dtype=np.int64)
+            - np.asarray(ahorros, dtype=np.int64)
+            - np.asarray(productos, dtype=np.int64)
+        )
+        return np.maximum(sobrantes, 0)
+
+    return list(map(sobrante_centavos, presupuestos, alimentos, ahorros, productos))
+
+
+def recalcular_sobrantes(registros):
+    """
+    Recalcula en una pasada el sobrante de los registros (instancias de
+    RegistroFinanciero) que no lo tienen fijo, sin guardarlos: pensado
+    para preparar bulk_create / bulk_update. Devuelve los modificados.
+    """
+    registros = [r for r in registros if not r.sobrante_fijo]
+    if not registros:
+        return []
+
+    sobrantes = calcular_sobrantes(
+        [a_centavos(r.para_gastar_dia) for r in registros],
+        [a_centavos(r.alimento) for r in registros],
+        [a_centavos(r.ahorro_y_deuda) for r in registros],
+        [a_centavos(r.productos) for r in registros],
+    )
+    for registro, centavos in zip(registros, sobrantes):
+        registro.sobrante_monetario = de_centavos(centavos)
+
+    return registros
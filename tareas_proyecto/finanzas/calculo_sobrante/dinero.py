@@ -0,0 +1,99 @@
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+
+# Todos los montos se manejan con 2 decimales; internamente, en centavos enteros
+CERO = Decimal("0.00")
+CENTAVO = Decimal("0.01")
+
+# "1.200", "1,200", "12.345.678": separador de miles sin parte decimal
+_MILES = re.compile(r"[1-9]\d{0,2}([.,])\d{3}(?:\1\d{3})*")
+_NUMERO = re.compile(r"\d+(?:\.\d*)?|\.\d+")
+
+
+# -----------------------------------------------------
+# Lectura de montos
+# -----------------------------------------------------
+def _normalizar_texto(texto):
+    """
+    Texto ingresado por el usuario → texto que entiende Decimal.
+    Con punto y coma a la vez, el último que aparece es el decimal
+    ("1.200,50", "1,200.50"). Con uno solo, es de miles si agrupa de a
+    tres dígitos ("1.200", "1,200"); si no, es el decimal ("12,5").
+    """
+    texto = texto.strip().replace(" ", "")
+    signo = ""
+    if texto[:1] in ("-", "+"):
+        signo, texto = texto[0], texto[1:]
+    texto = texto.lstrip("$")
+
+    if "." in texto and "," in texto:
+        decimal = "." if texto.rfind(".") > texto.rfind(",") else ","
+        miles = "," if decimal == "." else "."
+        texto = texto.replace(miles, "").replace(decimal, ".")
+    elif _MILES.fullmatch(texto):
+        texto = texto.replace(".", "").replace(",", "")
+    else:
+        texto = texto.replace(",", ".")
+
+    if not _NUMERO.fullmatch(texto):
+        raise InvalidOperation(f"Monto inválido: {texto!r}")
+    return signo + texto
+
+
+def leer_monto(valor):
+    """
+    Único punto de entrada de montos: Decimal, int, float o texto del
+    formulario → Decimal con 2 decimales (redondeo comercial).
+    Lanza InvalidOperation si el valor no es un monto.
+    """
+    if isinstance(valor, Decimal):
+        monto = valor
+    elif isinstance(valor, int) and not isinstance(valor, bool):
+        monto = Decimal(valor)
+    elif isinstance(valor, float):
+        # str() evita arrastrar el error binario de los float
+        monto = Decimal(str(valor))
+    elif isinstance(valor, str):
+        monto = Decimal(_normalizar_texto(valor))
+    else:
+        raise InvalidOperation(f"Monto inválido: {valor!r}")
+
+    if not monto.is_finite():
+        raise InvalidOperation(f"Monto inválido: {valor!r}")
+    return monto.quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def parsear_monto(valor, default=CERO):
+    """leer_monto() para formularios: vacío o inválido → `default`."""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return default
+    try:
+        return leer_monto(valor)
+    except InvalidOperation:
+        return default
+
+
+# -----------------------------------------------------
+# Centavos enteros
+# -----------------------------------------------------
+def a_centavos(valor):
+    """Monto → entero en centavos, redondeado a 2 decimales."""
+    return int(leer_monto(valor).scaleb(2))
+
+
+def de_centavos(centavos):
+    """Entero en centavos → Decimal con 2 decimales."""
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+# -----------------------------------------------------
+# Regla del sobrante
+# -----------------------------------------------------
+def sobrante_centavos(presupuesto, alimento, ahorro, productos):
+    """
+    Regla canónica del sobrante, en centavos: presupuesto menos gastos,
+    nunca negativo. La usan calcular_sobrante, calcular_sobrantes y,
+    como expresión SQL, finanzas.utils.reglas.sobrante_calculado.
+    """
+    return max(presupuesto - alimento - ahorro - productos, 0)
@@ -0,0 +1,60 @@
+from ..models import RegistroFinanciero
+from .utils import rango_anio, rango_mes, semanas_mes
+
+
+# -----------------------------------------------------
+# Registros indexados por fecha (una consulta por rango)
+# -----------------------------------------------------
+def registros_por_fecha(usuario, desde, hasta):
+    """
+    Devuelve {fecha: RegistroFinanciero} con los registros del usuario
+    entre `desde` y `hasta` (inclusive), en una sola consulta.
+
+    Si hubiera duplicados para una fecha, prevalece el completado y,
+    entre iguales, el de menor id (el orden coincide con el índice
+    registro_usuario_fecha_idx).
+    """
+    registros = (
+        RegistroFinanciero.objects
+        .filter(user=usuario, fecha__gte=desde, fecha__lte=hasta)
+        .order_by("fecha", "id")
+    )
+    por_fecha = {}
+    for registro in registros:
+        actual = por_fecha.get(registro.fecha)
+        if actual is None or (registro.completado and not actual.completado):
+            por_fecha[registro.fecha] = registro
+    return por_fecha
+
+
+def registros_del_mes(usuario, anio, mes):
+    return registros_por_fecha(usuario, *rango_mes(anio, mes))
+
+
+def registros_del_anio(usuario, anio):
+    return registros_por_fecha(usuario, *rango_anio(anio))
+
+
+# -----------------------------------------------------
+# Grilla mensual
+# -----------------------------------------------------
+def grilla_mes(usuario, anio, mes):
+    """
+    Semanas del mes (lunes a domingo) con el registro de cada día.
+
+    Cada celda es {"fecha", "registro", "en_mes"}; los días de los meses
+    vecinos que completan la grilla llevan en_mes=False y registro=None.
+    """
+    registros = registros_del_mes(usuario, anio, mes)
+
+    return [
+        [
+            {
+                "fecha": fecha,
+                "registro": registros.get(fecha) if fecha.month == mes else None,
+                "en_mes": fecha.month == mes,
+            }
+            for fecha in semana
+        ]
+        for semana in semanas_mes(anio, mes)
+    ]
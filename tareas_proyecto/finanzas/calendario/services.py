@@ -0,0 +1,270 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DateField, Exists, ExpressionWrapper, F, OuterRef, Q, Window
+from django.db.models.functions import Lag, Lead
+
+from ..models import RegistroFinanciero, borrar_registros
+from ..calculo_sobrante.calculadora import calcular_sobrante
+from ..cache.versiones import incrementar_version
+from ..resumen.services import reconstruir_resumen
+from ..resumen.tendencias import reconstruir_tendencia
+from .selectors import registros_por_fecha
+from .utils import UN_DIA, agregar_rango, iterar_fechas
+
+
+# Registros por INSERT en la creación masiva
+TAMANIO_LOTE = 500
+
+
+# Estados de un día
+FALTANTE = "faltante"      # no existe RegistroFinanciero
+INCOMPLETO = "incompleto"  # existe pero completado=False
+COMPLETADO = "completado"
+
+
+# -----------------------------------------------------
+# Estado por día
+# -----------------------------------------------------
+def estado_dia(registro):
+    if registro is None:
+        return FALTANTE
+    return COMPLETADO if registro.completado else INCOMPLETO
+
+
+def dias_con_estado(usuario, desde, hasta, config=None):
+    """
+    Lista de días entre `desde` y `hasta` (del más reciente al más antiguo)
+    con su registro y estado, usando una sola consulta.
+    Cada elemento es {"fecha", "registro", "estado"}.
+
+    Si `config` usa días virtuales, los días sin registro llevan uno
+    sin guardar armado con los valores por defecto (ver registro_virtual).
+    """
+    registros = registros_por_fecha(usuario, desde, hasta)
+    virtuales = config is not None and config.dias_virtuales
+    valores = valores_por_defecto(config) if virtuales else None
+
+    dias = []
+    for fecha in iterar_fechas(desde, hasta):
+        registro = registros.get(fecha)
+        estado = estado_dia(registro)
+        if registro is None and virtuales:
+            registro = RegistroFinanciero(user=usuario, fecha=fecha, **valores)
+        dias.append({"fecha": fecha, "registro": registro, "estado": estado})
+
+    dias.reverse()
+    return dias
+
+
+# -----------------------------------------------------
+# Índice de días pendientes
+# -----------------------------------------------------
+def indice_pendientes(usuario, desde, hasta=None):
+    """
+    Devuelve los días pendientes entre `desde` y `hasta` (hoy por defecto)
+    como una lista ordenada de RangoFechas de tipo FALTANTE o INCOMPLETO.
+
+    Una sola consulta resuelve los tramos en la base (huecos e islas):
+    con LAG/LEAD sobre (fecha, id) cada registro conoce la fecha y el
+    estado de sus vecinos, y solo vuelven los que abren o cierran un
+    tramo. Lo que viaja crece con la cantidad de rangos, no de días.
+    """
+    hasta = hasta or date.today()
+    rangos = []
+
+    if desde > hasta:
+        return rangos
+
+    # Duplicados de una misma fecha: cuenta como completado si alguno lo está
+    hecho = Exists(
+        RegistroFinanciero.objects.filter(
+            user_id=OuterRef("user_id"), fecha=OuterRef("fecha"), completado=True,
+        )
+    )
+    orden = [F("fecha").asc(), F("id").asc()]
+    bordes = (
+        RegistroFinanciero.objects
+        .filter(user=usuario, fecha__gte=desde, fecha__lte=hasta)
+        .annotate(hecho=hecho)
+        .annotate(
+            previa=Window(Lag("fecha"), order_by=orden),
+            siguiente=Window(Lead("fecha"), order_by=orden),
+            hecho_previo=Window(Lag("hecho"), order_by=orden),
+            hecho_siguiente=Window(Lead("hecho"), order_by=orden),
+        )
+        .filter(
+            Q(previa__isnull=True)
+            | Q(siguiente__isnull=True)
+            | Q(previa__lt=_dias_despues(F("fecha"), -1))
+            | Q(siguiente__gt=_dias_despues(F("fecha"), 1))
+            | ~Q(hecho_previo=F("hecho"))
+            | ~Q(hecho_siguiente=F("hecho"))
+        )
+        .order_by()
+        .values_list("fecha", "id", "hecho", "previa", "siguiente", "hecho_previo", "hecho_siguiente")
+    )
+    # Pocos bordes: se ordenan aquí y la base no arma un B-tree temporal
+    bordes = sorted(bordes)
+
+    inicio_incompleto = None
+    for fecha, _, completado, previa, siguiente, completado_previo, completado_siguiente in bordes:
+        if previa is None:
+            if fecha > desde:
+                agregar_rango(rangos, desde, fecha - UN_DIA, FALTANTE)
+        elif previa + UN_DIA < fecha:
+            agregar_rango(rangos, previa + UN_DIA, fecha - UN_DIA, FALTANTE)
+
+        # Un registro repetido de la misma fecha continúa el tramo
+        continua_atras = previa is not None and previa >= fecha - UN_DIA and completado_previo == completado
+        continua_adelante = (
+            siguiente is not None and siguiente <= fecha + UN_DIA and completado_siguiente == completado
+        )
+
+        if not completado:
+            if not continua_atras:
+                inicio_incompleto = fecha
+            if not continua_adelante:
+                agregar_rango(rangos, inicio_incompleto, fecha, INCOMPLETO)
+
+        if siguiente is None and fecha < hasta:
+            agregar_rango(rangos, fecha + UN_DIA, hasta, FALTANTE)
+
+    if not rangos and not bordes:
+        agregar_rango(rangos, desde, hasta, FALTANTE)
+
+    return rangos
+
+
+def _dias_despues(fecha, dias):
+    return ExpressionWrapper(fecha + timedelta(days=dias), output_field=DateField())
+
+
+# -----------------------------------------------------
+# Creación de días
+# -----------------------------------------------------
+def valores_por_defecto(config):
+    """
+    Valores iniciales de un día nuevo según la ConfigFinanciera:
+    presupuesto diario y montos fijos por defecto.
+    """
+    cero = Decimal("0")
+    valores = {
+        "para_gastar_dia": config.presupuesto_diario,
+        "alimento": config.default_alimento if config.default_alimento_fijo else cero,
+        "productos": config.default_productos if config.default_productos_fijo else cero,
+        "ahorro_y_deuda": config.default_ahorro_y_deuda if config.default_ahorro_y_deuda_fijo else cero,
+        "alimento_fijo": config.default_alimento_fijo,
+        "productos_fijo": config.default_productos_fijo,
+        "ahorro_y_deuda_fijo": config.default_ahorro_y_deuda_fijo,
+        "sobrante_fijo": config.default_sobrante_fijo,
+        "completado": False,
+    }
+
+    if config.default_sobrante_fijo:
+        valores["sobrante_monetario"] = config.default_sobrante
+    else:
+        valores["sobrante_monetario"] = calcular_sobrante(
+            valores["para_gastar_dia"],
+            valores["alimento"],
+            valores["ahorro_y_deuda"],
+            valores["productos"],
+        )
+
+    return valores
+
+
+def crear_registros_rango(usuario, config, desde, hasta=None):
+    """
+    Crea los registros que falten entre `desde` y `hasta` (hoy por defecto)
+    con los valores por defecto de `config`.
+
+    Usa una consulta para saber qué días ya existen y bulk_create por
+    lotes. Como bulk_create no dispara signals, al final se reconstruyen
+    el resumen y la tendencia y se invalida la caché del usuario.
+    Devuelve la cantidad de registros creados.
+    """
+    hasta = hasta or date.today()
+    if desde > hasta:
+        return 0
+
+    existentes = set(
+        RegistroFinanciero.objects
+        .filter(user=usuario, fecha__gte=desde, fecha__lte=hasta)
+        .values_list("fecha", flat=True)
+    )
+    valores = valores_por_defecto(config)
+
+    nuevos = []
+    actual = desde
+    while actual <= hasta:
+        if actual not in existentes:
+            nuevos.append(RegistroFinanciero(user=usuario, fecha=actual, **valores))
+        actual += UN_DIA
+
+    if not nuevos:
+        return 0
+
+    RegistroFinanciero.objects.bulk_create(
+        nuevos,
+        batch_size=TAMANIO_LOTE,
+        ignore_conflicts=True,
+    )
+
+    reconstruir_resumen(usuario.pk)
+    reconstruir_tendencia(usuario.pk)
+    incrementar_version(usuario.pk)
+
+    return len(nuevos)
+
+
+# -----------------------------------------------------
+# Días virtuales
+# -----------------------------------------------------
+def registro_virtual(usuario, fecha, config):
+    """
+    Registro sin guardar con los valores por defecto de `config`.
+    Se persiste recién cuando el usuario lo edita.
+    """
+    return RegistroFinanciero(user=usuario, fecha=fecha, **valores_por_defecto(config))
+
+
+def eliminar_dias_sin_datos(usuario, config):
+    """
+    Borra los registros de relleno del usuario: no completados, sin
+    comentario y con todos los montos, indicadores de fijado y sobrante
+    iguales a los que pone crear_registros_rango con los valores por
+    defecto actuales (o todo en cero y sin nada fijado). Un día que el
+    usuario fijó a mano difiere en algún indicador y se conserva. Con
+    días virtuales esos días no necesitan existir en la tabla. Devuelve
+    la cantidad eliminada.
+    """
+    cero = Decimal("0")
+    montos = ["para_gastar_dia", "alimento", "productos", "ahorro_y_deuda"]
+    fijos = ["alimento_fijo", "productos_fijo", "ahorro_y_deuda_fijo", "sobrante_fijo"]
+    valores = valores_por_defecto(config)
+
+    en_cero = Q(**{campo: cero for campo in montos}, **{campo: False for campo in fijos})
+    por_defecto = Q(**{campo: valores[campo] for campo in montos + fijos + ["sobrante_monetario"]})
+
+    sin_datos = (
+        RegistroFinanciero.objects
+        .filter(user=usuario, completado=False)
+        .filter(Q(comentario__isnull=True) | Q(comentario=""))
+        .filter(en_cero | por_defecto)
+    )
+
+    # Borrado sin post_delete por fila: el resumen y la tendencia se
+    # reconstruyen una sola vez
+    with transaction.atomic():
+        eliminados = borrar_registros(sin_datos.values_list("pk", flat=True))
+        if not eliminados:
+            return 0
+
+        reconstruir_resumen(usuario.pk)
+        reconstruir_tendencia(usuario.pk)
+
+    incrementar_version(usuario.pk)
+
+    return eliminados
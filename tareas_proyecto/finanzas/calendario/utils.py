@@ -0,0 +1,80 @@
+import calendar
+from collections import namedtuple
+from datetime import date, timedelta
+from itertools import islice
+
+
+UN_DIA = timedelta(days=1)
+
+
+# -----------------------------------------------------
+# Fechas
+# -----------------------------------------------------
+def iterar_fechas(desde, hasta):
+    """Genera las fechas entre dos días (inclusive) sin armar una lista."""
+    actual = desde
+    while actual <= hasta:
+        yield actual
+        actual += UN_DIA
+
+
+def rango_mes(anio, mes):
+    """Primer y último día del mes."""
+    return date(anio, mes, 1), date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+
+def rango_anio(anio):
+    return date(anio, 1, 1), date(anio, 12, 31)
+
+
+def semanas_mes(anio, mes):
+    """
+    Semanas (lunes a domingo) que cubren el mes, como listas de 7 fechas.
+    Incluye días del mes anterior/siguiente para completar la grilla.
+    """
+    return calendar.Calendar(firstweekday=0).monthdatescalendar(anio, mes)
+
+
+# -----------------------------------------------------
+# Rangos de fechas comprimidos (run-length)
+# -----------------------------------------------------
+class RangoFechas(namedtuple("RangoFechas", ["inicio", "fin", "tipo"])):
+    """
+    Tramo continuo de días [inicio, fin] (inclusive) que comparten un estado.
+    Representa muchos días sin generar un objeto date por cada uno.
+    """
+
+    __slots__ = ()
+
+    @property
+    def dias(self):
+        return (self.fin - self.inicio).days + 1
+
+    def fechas(self):
+        return iterar_fechas(self.inicio, self.fin)
+
+
+def agregar_rango(rangos, inicio, fin, tipo):
+    """
+    Agrega [inicio, fin] al final de `rangos`, uniéndolo con el último
+    tramo si es contiguo y del mismo tipo.
+    """
+    if rangos:
+        ultimo = rangos[-1]
+        if ultimo.tipo == tipo and ultimo.fin + UN_DIA == inicio:
+            rangos[-1] = ultimo._replace(fin=fin)
+            return
+    rangos.append(RangoFechas(inicio, fin, tipo))
+
+
+def total_dias(rangos):
+    return sum(rango.dias for rango in rangos)
+
+
+def primeras_fechas(rangos, cantidad):
+    """
+    Devuelve las primeras `cantidad` fechas de los rangos,
+    expandiendo solo lo necesario.
+    """
+    fechas = (fecha for rango in rangos for fecha in rango.fechas())
+    return list(islice(fechas, cantidad))
@@ -1,8 +1,26 @@
-from datetime import date, timedelta
+from datetime import date
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
+from django.shortcuts import render
 
-from finanzas.models import RegistroFinanciero, ConfigFinanciera
+from finanzas.models import ConfigFinanciera
+from finanzas.cache.indicadores import indicadores_usuario
+from finanzas.calendario.services import COMPLETADO, dias_con_estado
+from finanzas.calendario.utils import UN_DIA, rango_mes
+
+
+# Indicadores del mes que se muestran arriba de la lista (ver FactoryIndicadores)
+INDICADORES_MES = ["sobrante", "tad", "ahorro_promedio", "racha"]
+
+
+def _mes_solicitado(valor, por_defecto):
+    """
+    Interpreta ?mes=AAAA-MM. Si falta o es inválido usa `por_defecto`.
+    """
+    try:
+        anio, mes = (int(parte) for parte in valor.split("-"))
+        return date(anio, mes, 1)
+    except (AttributeError, ValueError):
+        return por_defecto.replace(day=1)
 
 
 @login_required
@@ -19,33 +37,33 @@ def lista_dias(request):
     hoy = date.today()
     fecha_inicio = config.fecha_inicio_registros
 
-    dias = []
-    fecha_actual = fecha_inicio
+    # Un mes por página, acotado a [fecha de inicio, hoy]
+    mes = _mes_solicitado(request.GET.get("mes"), hoy)
+    primero, ultimo = rango_mes(mes.year, mes.month)
+    desde = max(primero, fecha_inicio)
+    hasta = min(ultimo, hoy)
 
-    while fecha_actual <= hoy:
-        registro = RegistroFinanciero.objects.filter(
-            user=request.user,
-            fecha=fecha_actual
-        ).first()
+    # Todos los registros del mes en una sola consulta
+    dias = dias_con_estado(request.user, desde, hasta, config) if desde <= hasta else []
 
-        dias.append({
-            "fecha": fecha_actual,
-            "registro": registro,
-            "accion": (
-                "editar"
-                if registro and registro.completado
-                else "completar"
-            )
-        })
+    for dia in dias:
+        dia["accion"] = "editar" if dia["estado"] == COMPLETADO else "completar"
 
-        fecha_actual += timedelta(days=1)
+    # Memorizados por usuario, mes y versión de datos: navegar entre
+    # meses ya vistos no vuelve a agregar
+    indicadores = indicadores_usuario(request.user.pk, INDICADORES_MES, desde, hasta) if dias else None
 
-    dias.reverse()
+    anterior = primero - UN_DIA
+    siguiente = ultimo + UN_DIA
 
     return render(
         request,
         "finanzas/dias.html",
         {
-            "dias": dias
+            "dias": dias,
+            "mes_actual": primero,
+            "indicadores": indicadores,
+            "mes_anterior": anterior if anterior >= fecha_inicio else None,
+            "mes_siguiente": siguiente if siguiente <= hoy else None,
         }
     )
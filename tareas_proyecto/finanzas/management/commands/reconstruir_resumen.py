@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from finanzas.resumen.services import reconstruir_resumenes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero el resumen financiero de cada usuario e informa las diferencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--usuario",
+            help="Username a reconstruir. Por defecto se procesan todos.",
+        )
+        parser.add_argument(
+            "--solo-verificar",
+            action="store_true",
+            help="Informa las diferencias sin corregir el resumen.",
+        )
+
+    def handle(self, *args, **options):
+        aplicar = not options["solo_verificar"]
+
+        user_ids = None
+        if options["usuario"]:
+            user_ids = list(
+                User.objects.filter(username=options["usuario"]).values_list("pk", flat=True)
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\n=== Reconstrucción del Resumen Financiero ===\n"))
+
+        desvios = reconstruir_resumenes(user_ids=user_ids, aplicar=aplicar)
+        nombres = dict(
+            User.objects.filter(pk__in=[user_id for user_id, _ in desvios]).values_list("pk", "username")
+        )
+
+        for user_id, diferencias in desvios:
+            self.stdout.write(self.style.WARNING(f"- {nombres.get(user_id, user_id)}:"))
+            for campo, (guardado, calculado) in diferencias.items():
+                self.stdout.write(f"    {campo}: {guardado} → {calculado}")
+
+        if not desvios:
+            self.stdout.write(self.style.SUCCESS("✅ Todos los resúmenes coinciden con los registros."))
+        elif aplicar:
+            self.stdout.write(self.style.SUCCESS(f"\n>>> {len(desvios)} resúmenes corregidos.\n"))
+        else:
+            self.stdout.write(
+                self.style.WARNING(f"\n>>> {len(desvios)} resúmenes con diferencias (sin corregir).\n")
+            )
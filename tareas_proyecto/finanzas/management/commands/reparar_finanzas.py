@@ -1,9 +1,19 @@
-from django.core.management.base import BaseCommand
-from finanzas.utils.reparador import reparar_registros_financieros
-from finanzas.utils.diagnostico import diagnosticar_registros
-from django.contrib.auth import get_user_model
+import time
 
-User = get_user_model()
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from finanzas.utils.reparador_global import reparar_todos_los_usuarios
+from finanzas.utils.diagnostico import diagnosticar_por_usuario
+from finanzas.utils.marcas import (
+    avanzar_punto_control,
+    borrar_punto_control,
+    ejecucion_incremental,
+    iniciar_punto_control,
+    obtener_punto_control,
+    parsear_desde,
+)
+from finanzas.utils.paralelo import MAX_USUARIOS_POR_PARTICION, bloqueo_escritura
+from finanzas.utils.perfilado import agregar_opciones_perfilado, fase, perfilar_comando
 
 
 class Command(BaseCommand):
@@ -18,30 +28,83 @@ class Command(BaseCommand):
         parser.add_argument(
             "--verbose",
             action="store_true",
-            help="Muestra información detallada.",
+            help=(
+                "Muestra información detallada, incluido el desglose por regla. "
+                "Los errores detectados son infracciones: un registro puede sumar varias."
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help=(
+                "Cantidad de procesos para repartir los usuarios en la reparación (por defecto 1). "
+                "En SQLite, que admite un solo escritor, los lotes se reparan de a uno: "
+                "no acelera, solo tiene sentido con PostgreSQL o MySQL."
+            ),
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Solo revisa los registros modificados desde la última ejecución exitosa.",
+        )
+        parser.add_argument(
+            "--desde",
+            type=parsear_desde,
+            help="Solo revisa los registros modificados desde esta fecha (AAAA-MM-DD o ISO 8601).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Calcula todos los cambios de la reparación sin guardarlos.",
         )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=MAX_USUARIOS_POR_PARTICION,
+            help=f"Usuarios por transacción en la reparación (por defecto {MAX_USUARIOS_POR_PARTICION}).",
+        )
+        parser.add_argument(
+            "--reanudar",
+            action="store_true",
+            help="Continúa una reparación interrumpida desde el último lote confirmado.",
+        )
+        agregar_opciones_perfilado(parser, "reparar_finanzas")
 
     def handle(self, *args, **options):
+        if options["jobs"] > 1 and (options["profile"] or options["trace_memory"]):
+            self.stdout.write(self.style.WARNING(
+                ">>> Con --jobs > 1 solo se mide el proceso principal; usa --jobs 1 para ver las fases."
+            ))
+
+        with perfilar_comando(self, options):
+            self.ejecutar(options)
+
+    def ejecutar(self, options):
         verbose = options["verbose"]
         ejecutar_reparacion = options["reparar"]
+        jobs = max(1, options["jobs"])
+        dry_run = options["dry_run"]
+        marca = {"desde": options["desde"], "incremental": options["incremental"], "guardar": not dry_run}
 
         self.stdout.write(self.style.MIGRATE_HEADING("\n=== Diagnóstico de Finanzas ===\n"))
 
-        usuarios = User.objects.all()
-        total_registros_global = 0
-
-        for usuario in usuarios:
-            if verbose:
-                self.stdout.write(f"\nAnalizando usuario: {usuario.username}")
-
-            resultado = diagnosticar_registros(usuario)
+        with ejecucion_incremental("diagnostico", **marca) as desde:
+            if desde is not None:
+                self.stdout.write(f"Registros modificados desde {desde:%Y-%m-%d %H:%M:%S}\n")
 
-            total_registros_global += resultado["total_registros"]
+            # Una sola consulta agrupada para todos los usuarios
+            with fase("diagnostico"):
+                resultados = diagnosticar_por_usuario(desde)
 
+        for username, resultado in resultados:
             self.stdout.write(
-                f"- {usuario.username}: {resultado['total_registros']} registros, "
+                f"- {username}: {resultado['total_registros']} registros, "
                 f"{resultado['errores_detectados']} errores detectados"
             )
+            if verbose:
+                for nombre, cantidad in resultado["por_regla"].items():
+                    self.stdout.write(f"    {nombre}: {cantidad}")
 
         self.stdout.write(self.style.MIGRATE_LABEL("\n=== Fin del Diagnóstico ==="))
 
@@ -56,12 +119,68 @@ class Command(BaseCommand):
         # ---------------------------------------------------
         # EJECUTAR REPARACIONES
         # ---------------------------------------------------
-        self.stdout.write(self.style.SQL_TABLE("\n=== Reparación de Registros ===\n"))
+        titulo = "Plan de Reparación (simulación)" if dry_run else "Reparación de Registros"
+        self.stdout.write(self.style.SQL_TABLE(f"\n=== {titulo} ===\n"))
+
+        punto = obtener_punto_control("reparador")
+        if punto and not options["reanudar"]:
+            self.stdout.write(self.style.WARNING(
+                ">>> Hay una reparación interrumpida; se empieza de cero (usa --reanudar para continuarla)."
+            ))
+            punto = None
+        elif options["reanudar"] and not punto:
+            self.stdout.write(self.style.WARNING(">>> No hay una reparación interrumpida; se empieza de cero."))
+
+        if punto:
+            self.stdout.write(f">>> Reanudando después del usuario {punto.ultimo_user_id}")
+            marca = {"desde": punto.desde, "incremental": False, "guardar": not dry_run}
+        inicio = punto.iniciado if punto else timezone.now()
+        despues_de_user_id = punto.ultimo_user_id if punto else 0
+
+        with ejecucion_incremental("reparador", inicio=inicio, **marca) as desde:
+            if not dry_run:
+                iniciar_punto_control("reparador", inicio, desde, despues_de_user_id)
+
+            resumen_reparaciones = reparar_todos_los_usuarios(
+                jobs=jobs,
+                desde=desde,
+                tamanio_lote=max(1, options["lote"]),
+                dry_run=dry_run,
+                despues_de_user_id=despues_de_user_id,
+                progreso=self.informar_progreso(dry_run),
+                verbose=verbose,
+            )
 
-        resumen_reparaciones = reparar_registros_financieros(verbose=verbose)
+            if not dry_run:
+                borrar_punto_control("reparador")
 
-        self.stdout.write(self.style.SUCCESS("\n=== Reparaciones Completadas ===\n"))
+        encabezado = "Cambios Planeados" if dry_run else "Reparaciones Completadas"
+        self.stdout.write(self.style.SUCCESS(f"\n=== {encabezado} ===\n"))
         for clave, valor in resumen_reparaciones.items():
             self.stdout.write(f"{clave}: {valor}")
 
-        self.stdout.write(self.style.SUCCESS("\n>>> Proceso finalizado con éxito.\n"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("\n>>> Proceso finalizado con éxito.\n"))
+
+    def informar_progreso(self, dry_run):
+        """
+        Devuelve el callback que se llama tras cada lote confirmado:
+        guarda el punto de control y muestra registros/s y tiempo restante.
+        """
+        comienzo = time.monotonic()
+
+        def progreso(ultimo_user_id, hechos, totales):
+            if not dry_run:
+                with bloqueo_escritura():
+                    avanzar_punto_control("reparador", ultimo_user_id)
+
+            transcurrido = time.monotonic() - comienzo
+            velocidad = hechos / transcurrido if transcurrido else 0
+            restante = (totales - hechos) / velocidad if velocidad else 0
+            porcentaje = 100 * hechos / totales if totales else 100
+
+            self.stdout.write(
+                f"  {hechos}/{totales} registros ({porcentaje:.0f}%) · "
+                f"{velocidad:,.0f} reg/s · ETA {restante:.0f}s"
+            )
+
+        return progreso
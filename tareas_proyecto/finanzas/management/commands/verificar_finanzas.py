@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+
+from finanzas.models import RegistroFinanciero
+from finanzas.utils.marcas import ejecucion_incremental, modificados_desde, parsear_desde
+from finanzas.utils.perfilado import agregar_opciones_perfilado, fase, perfilar_comando
+from finanzas.utils.reglas import diagnosticar_reglas
+from finanzas.utils.verificador import escribir_hallazgos, iterar_hallazgos, verificar_registros_financieros
+
+
+class Command(BaseCommand):
+    help = "Verifica la coherencia de los registros financieros sin modificarlos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Solo revisa los registros modificados desde la última verificación exitosa.",
+        )
+        parser.add_argument(
+            "--desde",
+            type=parsear_desde,
+            help="Solo revisa los registros modificados desde esta fecha (AAAA-MM-DD o ISO 8601).",
+        )
+        parser.add_argument(
+            "--salida",
+            help="Escribe los hallazgos en formato JSONL en este archivo ('-' para la salida estándar).",
+        )
+        parser.add_argument(
+            "--limite",
+            type=int,
+            help="Cantidad máxima de hallazgos a mostrar o escribir (se siguen contando todos).",
+        )
+        parser.add_argument(
+            "--por-regla",
+            action="store_true",
+            help="Muestra solo el total y algunos ids de ejemplo por cada regla (una consulta por regla).",
+        )
+        agregar_opciones_perfilado(parser, "verificar_finanzas")
+
+    def handle(self, *args, **options):
+        # Con el JSONL en la salida estándar, el informe va a stderr
+        salida = self.stderr if options["salida"] == "-" else self.stdout
+
+        with perfilar_comando(self, options, salida), fase("verificacion"):
+            self.ejecutar(options)
+
+    def ejecutar(self, options):
+        limite = options["limite"]
+
+        with ejecucion_incremental(
+            "verificador", desde=options["desde"], incremental=options["incremental"]
+        ) as desde:
+            if options["por_regla"]:
+                self.resumen_por_regla(desde)
+                return
+
+            if not options["salida"]:
+                if desde is not None:
+                    self.stdout.write(f"Registros modificados desde {desde:%Y-%m-%d %H:%M:%S}")
+                errores = verificar_registros_financieros(desde=desde, limite=limite)
+                if errores:
+                    self.stdout.write(self.style.WARNING(f">>> {errores} problemas encontrados."))
+                return
+
+            hallazgos = iterar_hallazgos(desde=desde)
+            if options["salida"] == "-":
+                encontrados, escritos = escribir_hallazgos(hallazgos, self.stdout, limite)
+            else:
+                with open(options["salida"], "w", encoding="utf-8") as archivo:
+                    encontrados, escritos = escribir_hallazgos(hallazgos, archivo, limite)
+
+        # El resumen va a stderr para no mezclarse con el JSONL
+        self.stderr.write(f"{encontrados} hallazgos ({escritos} escritos)")
+
+    def resumen_por_regla(self, desde):
+        registros = modificados_desde(RegistroFinanciero.objects.all(), desde)
+
+        for resultado in diagnosticar_reglas(registros):
+            if not resultado.total:
+                continue
+            ejemplos = ", ".join(str(pk) for pk in resultado.muestra)
+            self.stdout.write(
+                self.style.WARNING(f"- {resultado.nombre}: {resultado.total} registros") + f" (ids: {ejemplos})"
+            )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0004_configfinanciera_fecha_inicio_registros'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenFinanciero',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_gastado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_sobrante', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_ahorro_y_deuda', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('dias_completados', models.PositiveIntegerField(default=0)),
+                ('dias_pendientes', models.PositiveIntegerField(default=0)),
+                ('primera_fecha', models.DateField(blank=True, null=True)),
+                ('ultima_fecha', models.DateField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_financiero', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen Financiero',
+                'verbose_name_plural': 'Resúmenes Financieros',
+            },
+        ),
+    ]
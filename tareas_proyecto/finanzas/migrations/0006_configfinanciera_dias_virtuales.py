@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0005_resumenfinanciero'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configfinanciera',
+            name='dias_virtuales',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0006_configfinanciera_dias_virtuales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrofinanciero',
+            name='modificado',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='MarcaVerificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proceso', models.CharField(max_length=50, unique=True)),
+                ('marca', models.DateTimeField()),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Marca de Verificación',
+                'verbose_name_plural': 'Marcas de Verificación',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0007_registrofinanciero_modificado_marcaverificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuntoControl',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proceso', models.CharField(max_length=50, unique=True)),
+                ('iniciado', models.DateTimeField()),
+                ('desde', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_user_id', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Punto de Control',
+                'verbose_name_plural': 'Puntos de Control',
+            },
+        ),
+    ]
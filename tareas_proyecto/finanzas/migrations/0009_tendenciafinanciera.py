@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0008_puntocontrol'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TendenciaFinanciera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_referencia', models.DateField()),
+                ('gasto_7', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('dias_7', models.PositiveIntegerField(default=0)),
+                ('gasto_30', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('dias_30', models.PositiveIntegerField(default=0)),
+                ('gasto_90', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('dias_90', models.PositiveIntegerField(default=0)),
+                ('racha_actual', models.PositiveIntegerField(default=0)),
+                ('racha_maxima', models.PositiveIntegerField(default=0)),
+                ('ultima_fecha', models.DateField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tendencia_financiera', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tendencia Financiera',
+                'verbose_name_plural': 'Tendencias Financieras',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0009_tendenciafinanciera'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrofinanciero',
+            index=models.Index(fields=['user', 'fecha', '-completado'], name='registro_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrofinanciero',
+            index=models.Index(condition=models.Q(('completado', False)), fields=['user', 'fecha'], name='registro_pendientes_idx'),
+        ),
+        migrations.AlterField(
+            model_name='registrofinanciero',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
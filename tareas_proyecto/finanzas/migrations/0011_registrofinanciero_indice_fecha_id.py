@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0010_registrofinanciero_indices'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='registrofinanciero',
+            name='registro_usuario_fecha_idx',
+        ),
+        migrations.AddIndex(
+            model_name='registrofinanciero',
+            index=models.Index(fields=['user', 'fecha', 'id'], name='registro_usuario_fecha_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import connection, models
 from django.contrib.auth.models import User
 from datetime import date
-from django.db.models.signals import post_save
+from decimal import ROUND_HALF_UP, Decimal
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from .calculo_sobrante.dinero import CENTAVO, CERO
+
 
 # ============================================================
 #   MODELO PRINCIPAL - REGISTRO FINANCIERO
@@ -14,7 +17,8 @@ class RegistroFinanciero(models.Model):
     Solo puede existir UNO por usuario y fecha.
     """
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Sin índice propio: lo cubre registro_usuario_fecha_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     fecha = models.DateField()
 
     # Presupuesto asignado al día
@@ -42,11 +46,27 @@ class RegistroFinanciero(models.Model):
     # Estado del registro
     completado = models.BooleanField(default=False)
 
+    # Última modificación (los .update() masivos deben fijarla a mano)
+    modificado = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         ordering = ["-fecha"]
         verbose_name = "Registro Financiero"
         verbose_name_plural = "Registros Financieros"
         unique_together = ("user", "fecha")
+        indexes = [
+            # Todas las consultas por usuario y rango/orden de fecha: pendientes,
+            # calendario, listados, ventanas móviles. Con el id al final, el
+            # desempate de fechas repetidas (paginación por clave) tampoco
+            # ordena aparte.
+            models.Index(fields=["user", "fecha", "id"], name="registro_usuario_fecha_idx"),
+            # Solo los días sin completar, para buscarlos sin recorrer el resto
+            models.Index(
+                fields=["user", "fecha"],
+                condition=models.Q(completado=False),
+                name="registro_pendientes_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.fecha} - {self.user.username} (id={self.id})"
@@ -66,6 +86,41 @@ class RegistroFinanciero(models.Model):
     def sobrante_efectivo(self):
         return self.sobrante_monetario + self.balance_diario
 
+    # ============================================================
+    #   ESTADO ORIGINAL (para actualizar el resumen por deltas)
+    # ============================================================
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._estado_original = instance.estado_resumen()
+        return instance
+
+    def estado_resumen(self):
+        """
+        Valores del registro que aportan al ResumenFinanciero.
+        Devuelve None si algún campo necesario no está cargado.
+        """
+        campos = (
+            "user_id", "fecha", "para_gastar_dia", "alimento", "productos",
+            "ahorro_y_deuda", "sobrante_monetario", "completado",
+        )
+        if any(campo not in self.__dict__ for campo in campos):
+            return None
+
+        def dec(v):
+            return v if isinstance(v, Decimal) else Decimal(str(v or 0))
+
+        alimento, productos, ahorro = dec(self.alimento), dec(self.productos), dec(self.ahorro_y_deuda)
+        return {
+            "user_id": self.user_id,
+            "fecha": self.fecha,
+            "presupuesto": dec(self.para_gastar_dia),
+            "gasto_total": alimento + productos + ahorro,
+            "sobrante": dec(self.sobrante_monetario),
+            "ahorro_y_deuda": ahorro,
+            "completado": bool(self.completado),
+        }
+
     # ============================================================
     #   CAMBIAR / FIJAR VALORES
     # ============================================================
@@ -160,10 +215,213 @@ class ConfigFinanciera(models.Model):
 
     fecha_inicio_registros = models.DateField(null=True, blank=True)
 
+    # Días sin datos solo virtuales: no se guardan hasta editarlos
+    dias_virtuales = models.BooleanField(default=False)
+
     def __str__(self):
         return f"Config financiera de {self.user.username}"
 
 
+# ============================================================
+#   RESUMEN FINANCIERO (totales por usuario)
+# ============================================================
+class ResumenFinanciero(models.Model):
+    """
+    Totales acumulados de los registros de un usuario.
+    Se mantiene por deltas en cada alta, modificación o baja de un
+    RegistroFinanciero, así las lecturas no recorren la tabla.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="resumen_financiero")
+
+    total_gastado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_sobrante = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_ahorro_y_deuda = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    dias_completados = models.PositiveIntegerField(default=0)
+    dias_pendientes = models.PositiveIntegerField(default=0)
+
+    primera_fecha = models.DateField(null=True, blank=True)
+    ultima_fecha = models.DateField(null=True, blank=True)
+
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen Financiero"
+        verbose_name_plural = "Resúmenes Financieros"
+
+    def __str__(self):
+        return f"Resumen financiero de {self.user.username}"
+
+    @property
+    def promedio_ahorro_y_deuda(self):
+        dias = self.dias_completados + self.dias_pendientes
+        if not dias:
+            return CERO
+        return (self.total_ahorro_y_deuda / dias).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+# ============================================================
+#   TENDENCIA FINANCIERA (ventanas móviles por usuario)
+# ============================================================
+class TendenciaFinanciera(models.Model):
+    """
+    Indicadores de tendencia de un usuario: gasto de los últimos 7, 30
+    y 90 días (hasta `fecha_referencia`) y rachas de días dentro del
+    presupuesto. Igual que el resumen se mantiene por deltas: editar un
+    día solo suma o resta su diferencia en las ventanas que lo contienen.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="tendencia_financiera")
+
+    # Último día incluido en las ventanas
+    fecha_referencia = models.DateField()
+
+    gasto_7 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    dias_7 = models.PositiveIntegerField(default=0)
+    gasto_30 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    dias_30 = models.PositiveIntegerField(default=0)
+    gasto_90 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    dias_90 = models.PositiveIntegerField(default=0)
+
+    # Días seguidos con gasto <= presupuesto (la actual termina en ultima_fecha)
+    racha_actual = models.PositiveIntegerField(default=0)
+    racha_maxima = models.PositiveIntegerField(default=0)
+    ultima_fecha = models.DateField(null=True, blank=True)
+
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Tendencia Financiera"
+        verbose_name_plural = "Tendencias Financieras"
+
+    def __str__(self):
+        return f"Tendencia financiera de {self.user.username}"
+
+    def promedio_gasto(self, dias):
+        """Gasto promedio por día registrado en la ventana de `dias` días."""
+        cantidad = getattr(self, f"dias_{dias}")
+        if not cantidad:
+            return CERO
+        return (getattr(self, f"gasto_{dias}") / cantidad).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+    @property
+    def promedio_gasto_7(self):
+        return self.promedio_gasto(7)
+
+    @property
+    def promedio_gasto_30(self):
+        return self.promedio_gasto(30)
+
+    @property
+    def promedio_gasto_90(self):
+        return self.promedio_gasto(90)
+
+
+# ============================================================
+#   MARCAS DE VERIFICACIÓN (ejecución incremental)
+# ============================================================
+class MarcaVerificacion(models.Model):
+    """
+    Momento de la última ejecución exitosa de una herramienta de
+    mantenimiento (verificador, diagnóstico, reparador). La siguiente
+    ejecución incremental solo revisa los registros modificados después.
+    """
+
+    proceso = models.CharField(max_length=50, unique=True)
+    marca = models.DateTimeField()
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Marca de Verificación"
+        verbose_name_plural = "Marcas de Verificación"
+
+    def __str__(self):
+        return f"{self.proceso} → {self.marca}"
+
+
+# ============================================================
+#   PUNTO DE CONTROL (reanudar una reparación interrumpida)
+# ============================================================
+class PuntoControl(models.Model):
+    """
+    Avance de una reparación por lotes: último usuario cuyo lote quedó
+    confirmado. Se borra al terminar; si el proceso se corta, la
+    siguiente ejecución con --reanudar sigue desde ahí.
+    """
+
+    proceso = models.CharField(max_length=50, unique=True)
+    iniciado = models.DateTimeField()
+    desde = models.DateTimeField(null=True, blank=True)
+    ultimo_user_id = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Punto de Control"
+        verbose_name_plural = "Puntos de Control"
+
+    def __str__(self):
+        return f"{self.proceso} → usuario {self.ultimo_user_id}"
+
+
+# ============================================================
+#   BORRADO MASIVO SIN SIGNALS
+# ============================================================
+def borrar_registros(ids, tamanio_lote=500):
+    """
+    Borra los RegistroFinanciero de `ids` con DELETE ... WHERE id IN (...)
+    directo por cursor, en lotes. A propósito no dispara post_delete: quien
+    lo llama reconstruye el resumen, la tendencia y la versión de caché de
+    los usuarios afectados una sola vez. Ningún modelo apunta a
+    RegistroFinanciero, así que no hay cascadas que se salteen.
+    Devuelve la cantidad de filas borradas.
+    """
+    ids = list(ids)
+    tabla = connection.ops.quote_name(RegistroFinanciero._meta.db_table)
+    columna = connection.ops.quote_name(RegistroFinanciero._meta.pk.column)
+
+    borrados = 0
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(ids), tamanio_lote):
+            lote = ids[inicio:inicio + tamanio_lote]
+            marcadores = ", ".join(["%s"] * len(lote))
+            cursor.execute(f"DELETE FROM {tabla} WHERE {columna} IN ({marcadores})", lote)
+            borrados += cursor.rowcount
+    return borrados
+
+
+# ============================================================
+#   SIGNALS - MANTENER RESUMEN FINANCIERO
+# ============================================================
+@receiver(post_save, sender=RegistroFinanciero)
+def actualizar_resumen_al_guardar(sender, instance, created, **kwargs):
+    from .resumen.services import registrar_guardado
+
+    registrar_guardado(instance, creado=created)
+
+
+@receiver(post_delete, sender=RegistroFinanciero)
+def actualizar_resumen_al_eliminar(sender, instance, **kwargs):
+    from .resumen.services import registrar_baja
+
+    registrar_baja(instance)
+
+
+# ============================================================
+#   SIGNALS - INVALIDAR CACHÉ DEL USUARIO
+# ============================================================
+@receiver(post_save, sender=RegistroFinanciero)
+@receiver(post_delete, sender=RegistroFinanciero)
+@receiver(post_save, sender=ConfigFinanciera)
+@receiver(post_delete, sender=ConfigFinanciera)
+@receiver(post_save, sender=ObjetivoFinanciero)
+@receiver(post_delete, sender=ObjetivoFinanciero)
+def invalidar_cache_usuario(sender, instance, **kwargs):
+    from .cache.versiones import incrementar_version
+
+    incrementar_version(instance.user_id)
+
+
 # ============================================================
 #   SIGNAL - CREAR CONFIG AUTOMÁTICA
 # ============================================================
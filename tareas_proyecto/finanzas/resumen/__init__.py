@@ -0,0 +1 @@
+# Resumen financiero por usuario
@@ -0,0 +1,263 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, DecimalField, F, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import RegistroFinanciero, ResumenFinanciero
+from . import tendencias
+
+
+CAMPOS_RESUMEN = [
+    "total_gastado",
+    "total_sobrante",
+    "total_ahorro_y_deuda",
+    "dias_completados",
+    "dias_pendientes",
+    "primera_fecha",
+    "ultima_fecha",
+]
+
+_MONTO = DecimalField(max_digits=14, decimal_places=2)
+
+
+# -----------------------------------------------------
+# Expresiones de agregación
+# -----------------------------------------------------
+def _suma(expresion):
+    return Coalesce(
+        Sum(expresion, output_field=_MONTO),
+        Value(Decimal("0"), output_field=_MONTO),
+        output_field=_MONTO,
+    )
+
+
+def expresiones_resumen():
+    """
+    Expresiones ORM que calculan los campos del resumen.
+    El gasto total es alimento + productos + ahorro_y_deuda,
+    igual que RegistroFinanciero.gasto_total.
+    """
+    return {
+        "total_gastado": _suma(F("alimento") + F("productos") + F("ahorro_y_deuda")),
+        "total_sobrante": _suma("sobrante_monetario"),
+        "total_ahorro_y_deuda": _suma("ahorro_y_deuda"),
+        "dias_completados": Count("id", filter=Q(completado=True)),
+        "dias_pendientes": Count("id", filter=Q(completado=False)),
+        "primera_fecha": Min("fecha"),
+        "ultima_fecha": Max("fecha"),
+    }
+
+
+def valores_vacios():
+    return {
+        "total_gastado": Decimal("0.00"),
+        "total_sobrante": Decimal("0.00"),
+        "total_ahorro_y_deuda": Decimal("0.00"),
+        "dias_completados": 0,
+        "dias_pendientes": 0,
+        "primera_fecha": None,
+        "ultima_fecha": None,
+    }
+
+
+def calcular_resumen(registros):
+    """
+    Calcula desde cero los valores del resumen de un queryset
+    de registros en una única consulta.
+    """
+    return registros.order_by().aggregate(**expresiones_resumen())
+
+
+# -----------------------------------------------------
+# Lectura
+# -----------------------------------------------------
+def obtener_resumen(user):
+    """
+    Devuelve el resumen del usuario. Si todavía no existe se calcula
+    sin guardarlo, para que las lecturas no escriban; se crea en el
+    próximo cambio de un registro.
+    """
+    resumen = ResumenFinanciero.objects.filter(user=user).first()
+    if resumen is None:
+        resumen = ResumenFinanciero(
+            user=user,
+            **calcular_resumen(RegistroFinanciero.objects.filter(user=user)),
+        )
+    return resumen
+
+
+def reconstruir_resumen(user_id):
+    valores = calcular_resumen(RegistroFinanciero.objects.filter(user_id=user_id))
+    resumen, _ = ResumenFinanciero.objects.update_or_create(
+        user_id=user_id,
+        defaults=valores,
+    )
+    return resumen
+
+
+# -----------------------------------------------------
+# Actualización incremental
+# -----------------------------------------------------
+def _limites_fecha():
+    """
+    Subconsultas para recalcular primera/última fecha dentro del mismo UPDATE.
+    """
+    registros = (
+        RegistroFinanciero.objects
+        .filter(user_id=OuterRef("user_id"))
+        .order_by()
+        .values("user_id")
+    )
+    return {
+        "primera_fecha": Subquery(registros.annotate(m=Min("fecha")).values("m")),
+        "ultima_fecha": Subquery(registros.annotate(m=Max("fecha")).values("m")),
+    }
+
+
+def _aplicar_delta(user_id, quitar=None, agregar=None, crear_si_falta=True):
+    # Las ventanas y rachas cambian aunque los totales no (p. ej. el presupuesto)
+    tendencias.aplicar_cambio(user_id, quitar=quitar, agregar=agregar, crear_si_falta=crear_si_falta)
+
+    delta = {
+        "total_gastado": Decimal("0"),
+        "total_sobrante": Decimal("0"),
+        "total_ahorro_y_deuda": Decimal("0"),
+        "dias_completados": 0,
+        "dias_pendientes": 0,
+    }
+
+    for estado, signo in ((quitar, -1), (agregar, 1)):
+        if estado is None:
+            continue
+        delta["total_gastado"] += signo * estado["gasto_total"]
+        delta["total_sobrante"] += signo * estado["sobrante"]
+        delta["total_ahorro_y_deuda"] += signo * estado["ahorro_y_deuda"]
+        if estado["completado"]:
+            delta["dias_completados"] += signo
+        else:
+            delta["dias_pendientes"] += signo
+
+    cambios = {campo: F(campo) + valor for campo, valor in delta.items() if valor}
+
+    fecha_anterior = quitar["fecha"] if quitar else None
+    fecha_nueva = agregar["fecha"] if agregar else None
+    if fecha_anterior != fecha_nueva:
+        cambios.update(_limites_fecha())
+
+    if not cambios:
+        return
+
+    cambios["actualizado"] = timezone.now()
+    actualizados = ResumenFinanciero.objects.filter(user_id=user_id).update(**cambios)
+
+    if not actualizados and crear_si_falta:
+        reconstruir_resumen(user_id)
+
+
+def registrar_guardado(registro, creado=False):
+    """
+    Aplica al resumen la diferencia entre el estado con el que se cargó
+    el registro (ver RegistroFinanciero.estado_resumen) y el guardado.
+
+    Si no se conoce alguno de los dos estados (por ejemplo, campos
+    diferidos) se recalcula el resumen completo del usuario.
+    """
+    anterior = getattr(registro, "_estado_original", None)
+    actual = registro.estado_resumen()
+
+    if actual is None or (anterior is None and not creado):
+        reconstruir_resumen(registro.user_id)
+        tendencias.reconstruir_tendencia(registro.user_id)
+    elif anterior is None:
+        _aplicar_delta(actual["user_id"], agregar=actual)
+    elif anterior["user_id"] != actual["user_id"]:
+        _aplicar_delta(anterior["user_id"], quitar=anterior, crear_si_falta=False)
+        _aplicar_delta(actual["user_id"], agregar=actual)
+    else:
+        _aplicar_delta(actual["user_id"], quitar=anterior, agregar=actual)
+
+    registro._estado_original = actual
+
+
+def registrar_baja(registro):
+    """
+    Descuenta del resumen un registro eliminado. Si el resumen ya no
+    existe (borrado en cascada del usuario) no se vuelve a crear.
+    """
+    anterior = getattr(registro, "_estado_original", None) or registro.estado_resumen()
+
+    if anterior is not None:
+        _aplicar_delta(anterior["user_id"], quitar=anterior, crear_si_falta=False)
+    elif "user_id" in registro.__dict__:
+        valores = calcular_resumen(RegistroFinanciero.objects.filter(user_id=registro.user_id))
+        ResumenFinanciero.objects.filter(user_id=registro.user_id).update(**valores)
+        tendencias.reconstruir_tendencia(registro.user_id)
+
+    registro._estado_original = None
+
+
+# -----------------------------------------------------
+# Reconstrucción masiva
+# -----------------------------------------------------
+def reconstruir_resumenes(user_ids=None, aplicar=True):
+    """
+    Recalcula desde cero los resúmenes de los usuarios indicados
+    (o de todos) con una sola consulta agrupada.
+
+    Devuelve una lista de (user_id, diferencias) donde `diferencias`
+    mapea cada campo desviado a (guardado, calculado). Un resumen
+    inexistente se informa con guardado=None en todos sus campos.
+    Con aplicar=False solo informa, sin escribir.
+    """
+    usuarios = get_user_model().objects.order_by("pk")
+    registros = RegistroFinanciero.objects.order_by()
+    resumenes = ResumenFinanciero.objects.all()
+
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        usuarios = usuarios.filter(pk__in=user_ids)
+        registros = registros.filter(user_id__in=user_ids)
+        resumenes = resumenes.filter(user_id__in=user_ids)
+
+    calculados = {
+        fila.pop("user_id"): fila
+        for fila in registros.values("user_id").annotate(**expresiones_resumen())
+    }
+    existentes = {resumen.user_id: resumen for resumen in resumenes}
+
+    desvios = []
+    crear, actualizar = [], []
+    ahora = timezone.now()
+
+    for user_id in usuarios.values_list("pk", flat=True):
+        valores = calculados.get(user_id) or valores_vacios()
+        resumen = existentes.get(user_id)
+
+        if resumen is None:
+            desvios.append((user_id, {campo: (None, valores[campo]) for campo in CAMPOS_RESUMEN}))
+            crear.append(ResumenFinanciero(user_id=user_id, **valores))
+            continue
+
+        diferencias = {
+            campo: (getattr(resumen, campo), valores[campo])
+            for campo in CAMPOS_RESUMEN
+            if getattr(resumen, campo) != valores[campo]
+        }
+        if diferencias:
+            desvios.append((user_id, diferencias))
+            for campo, valor in valores.items():
+                setattr(resumen, campo, valor)
+            resumen.actualizado = ahora
+            actualizar.append(resumen)
+
+    if aplicar:
+        ResumenFinanciero.objects.bulk_create(crear, batch_size=500)
+        ResumenFinanciero.objects.bulk_update(
+            actualizar, CAMPOS_RESUMEN + ["actualizado"], batch_size=500
+        )
+        # Los cambios masivos no pasan por los deltas de las tendencias
+        tendencias.reconstruir_tendencias(user_ids)
+
+    return desvios
@@ -0,0 +1,373 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import RegistroFinanciero, TendenciaFinanciera
+
+
+# Ventanas móviles, en días, que mantiene TendenciaFinanciera
+VENTANAS = (7, 30, 90)
+
+UN_DIA = timedelta(days=1)
+
+_MONTO = DecimalField(max_digits=14, decimal_places=2)
+
+
+# -----------------------------------------------------
+# Expresiones y cálculo desde cero
+# -----------------------------------------------------
+def gasto_del_dia():
+    """alimento + productos + ahorro_y_deuda, igual que RegistroFinanciero.gasto_total."""
+    return F("alimento") + F("productos") + F("ahorro_y_deuda")
+
+
+def en_ventana(dias, hoy):
+    return Q(fecha__gt=hoy - timedelta(days=dias), fecha__lte=hoy)
+
+
+def _dentro_de_ventana(fecha, dias, hoy):
+    return hoy - timedelta(days=dias) < fecha <= hoy
+
+
+def dentro_del_presupuesto(estado):
+    """Un día cumple si lo gastado no supera el presupuesto (ver estado_resumen)."""
+    return estado["gasto_total"] <= estado["presupuesto"]
+
+
+def _expresiones_ventanas(hoy):
+    expresiones = {}
+    for dias in VENTANAS:
+        filtro = en_ventana(dias, hoy)
+        expresiones[f"gasto_{dias}"] = Coalesce(
+            Sum(gasto_del_dia(), filter=filtro, output_field=_MONTO),
+            Value(Decimal("0"), output_field=_MONTO),
+            output_field=_MONTO,
+        )
+        expresiones[f"dias_{dias}"] = Count("id", filter=filtro)
+    return expresiones
+
+
+def ventanas_vacias():
+    valores = {}
+    for dias in VENTANAS:
+        valores[f"gasto_{dias}"] = Decimal("0")
+        valores[f"dias_{dias}"] = 0
+    return valores
+
+
+def calcular_ventanas(user_id, hoy):
+    """
+    Gasto y días registrados de cada ventana que termina en `hoy`, en
+    una consulta que solo lee los últimos max(VENTANAS) días del usuario.
+    """
+    return (
+        RegistroFinanciero.objects
+        .filter(user_id=user_id)
+        .filter(en_ventana(max(VENTANAS), hoy))
+        .order_by()
+        .aggregate(**_expresiones_ventanas(hoy))
+    )
+
+
+def paso_racha(racha, ultima_fecha, fecha, dentro):
+    """Racha que termina en `fecha`, sabiendo la que terminaba en `ultima_fecha`."""
+    if not dentro:
+        return 0
+    if racha and ultima_fecha is not None and fecha == ultima_fecha + UN_DIA:
+        return racha + 1
+    return 1
+
+
+def rachas(dias):
+    """
+    Recorre (fecha, dentro_del_presupuesto) en orden de fecha y devuelve
+    la racha actual, la máxima y la última fecha. Un día sin registro
+    corta la racha.
+    """
+    actual = maxima = 0
+    ultima_fecha = None
+    for fecha, dentro in dias:
+        actual = paso_racha(actual, ultima_fecha, fecha, dentro)
+        maxima = max(maxima, actual)
+        ultima_fecha = fecha
+    return {"racha_actual": actual, "racha_maxima": maxima, "ultima_fecha": ultima_fecha}
+
+
+_CAMPOS_RACHA = ("fecha", "para_gastar_dia", "alimento", "productos", "ahorro_y_deuda")
+
+
+def _dias_dentro(filas):
+    """(fecha, dentro_del_presupuesto) de filas con los _CAMPOS_RACHA."""
+    return (
+        (fecha, alimento + productos + ahorro <= presupuesto)
+        for fecha, presupuesto, alimento, productos, ahorro in filas
+    )
+
+
+def calcular_rachas(user_id):
+    """Rachas desde cero: recorre todo el historial del usuario (solo al reconstruir)."""
+    filas = (
+        RegistroFinanciero.objects
+        .filter(user_id=user_id)
+        .order_by("fecha")
+        .values_list(*_CAMPOS_RACHA)
+    )
+    return rachas(_dias_dentro(filas.iterator()))
+
+
+# -----------------------------------------------------
+# Lectura y reconstrucción
+# -----------------------------------------------------
+def obtener_tendencia(user, hoy=None):
+    """
+    Devuelve la tendencia del usuario sin escribir, como obtener_resumen.
+    Si quedó de un día anterior solo se recalculan las ventanas (una
+    consulta acotada a 90 días); si no existe se calcula sin guardarla.
+    """
+    hoy = hoy or date.today()
+    tendencia = TendenciaFinanciera.objects.filter(user=user).first()
+
+    if tendencia is None:
+        return TendenciaFinanciera(
+            user=user,
+            fecha_referencia=hoy,
+            **calcular_ventanas(user.pk, hoy),
+            **calcular_rachas(user.pk),
+        )
+
+    if tendencia.fecha_referencia != hoy:
+        _deslizar(tendencia, hoy)
+    return tendencia
+
+
+def reconstruir_tendencia(user_id, hoy=None):
+    hoy = hoy or date.today()
+    tendencia, _ = TendenciaFinanciera.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "fecha_referencia": hoy,
+            **calcular_ventanas(user_id, hoy),
+            **calcular_rachas(user_id),
+        },
+    )
+    return tendencia
+
+
+def reconstruir_tendencias(user_ids=None, hoy=None):
+    """
+    Reconstruye las tendencias de los usuarios indicados (o de todos)
+    tras cambios masivos (.update(), bulk_create, borrados sin signals)
+    con dos consultas: las ventanas agrupadas por usuario y un único
+    recorrido por (usuario, fecha) para las rachas. Así ningún usuario
+    queda sin tendencia guardada y el dashboard no recorre su historial.
+    """
+    hoy = hoy or date.today()
+    usuarios = get_user_model().objects.order_by("pk")
+    registros = RegistroFinanciero.objects.order_by()
+
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        usuarios = usuarios.filter(pk__in=user_ids)
+        registros = registros.filter(user_id__in=user_ids)
+
+    ventanas = {
+        fila.pop("user_id"): fila
+        for fila in (
+            registros
+            .filter(en_ventana(max(VENTANAS), hoy))
+            .values("user_id")
+            .annotate(**_expresiones_ventanas(hoy))
+        )
+    }
+    filas = registros.order_by("user_id", "fecha").values_list("user_id", *_CAMPOS_RACHA)
+    rachas_por_usuario = {
+        user_id: rachas(_dias_dentro(fila[1:] for fila in grupo))
+        for user_id, grupo in groupby(filas.iterator(), key=itemgetter(0))
+    }
+
+    nuevas = [
+        TendenciaFinanciera(
+            user_id=user_id,
+            fecha_referencia=hoy,
+            **(ventanas.get(user_id) or ventanas_vacias()),
+            **(rachas_por_usuario.get(user_id) or rachas([])),
+        )
+        for user_id in usuarios.values_list("pk", flat=True)
+    ]
+
+    with transaction.atomic():
+        anteriores = TendenciaFinanciera.objects.all()
+        if user_ids is not None:
+            anteriores = anteriores.filter(user_id__in=user_ids)
+        anteriores.delete()
+        TendenciaFinanciera.objects.bulk_create(nuevas, batch_size=500)
+
+
+def _deslizar(tendencia, hoy):
+    for campo, valor in calcular_ventanas(tendencia.user_id, hoy).items():
+        setattr(tendencia, campo, valor)
+    tendencia.fecha_referencia = hoy
+
+
+# -----------------------------------------------------
+# Actualización incremental
+# -----------------------------------------------------
+def _corridas(dias):
+    """Rachas (inicio, fin) de un {fecha: dentro_del_presupuesto}."""
+    corridas = []
+    for fecha in sorted(dias):
+        if not dias[fecha]:
+            continue
+        if corridas and corridas[-1][1] + UN_DIA == fecha:
+            corridas[-1][1] = fecha
+        else:
+            corridas.append([fecha, fecha])
+    return corridas
+
+
+def _rachas_alrededor(tendencia, fecha, antes, despues):
+    """
+    Rachas tras cambiar un día anterior o igual a ultima_fecha, leyendo
+    solo los días a menos de racha_maxima + 1 de `fecha`. `antes` y
+    `despues` dicen si el día estaba / queda dentro del presupuesto
+    (None: no hay registro). Toda racha medía a lo sumo racha_maxima,
+    así que las que tocan `fecha`, antes y después del cambio, caben en
+    ese tramo; las demás no cambian.
+
+    None si la racha que se acorta podía ser la única de largo máximo:
+    sin el historial no se sabe si hay otra igual.
+    """
+    if tendencia.ultima_fecha is None:
+        return None
+
+    alcance = timedelta(days=tendencia.racha_maxima + 1)
+    filas = list(
+        RegistroFinanciero.objects
+        .filter(user_id=tendencia.user_id, fecha__gte=fecha - alcance, fecha__lte=fecha + alcance)
+        .order_by("fecha")
+        .values_list(*_CAMPOS_RACHA)
+    )
+    nuevos = dict(_dias_dentro(filas))
+    if len(nuevos) != len(filas):
+        # Fechas repetidas: el recorrido completo decide cómo cuentan
+        return None
+
+    viejos = dict(nuevos)
+    viejos.pop(fecha, None)
+    if antes is not None:
+        viejos[fecha] = antes
+
+    def tocan_fecha(corridas):
+        return [c for c in corridas if c[0] <= fecha + UN_DIA and c[1] >= fecha - UN_DIA]
+
+    def largo(corrida):
+        return (corrida[1] - corrida[0]).days + 1
+
+    corridas = _corridas(nuevos)
+    maxima_vieja = max((largo(c) for c in tocan_fecha(_corridas(viejos))), default=0)
+    maxima_nueva = max((largo(c) for c in tocan_fecha(corridas)), default=0)
+
+    if maxima_nueva >= tendencia.racha_maxima:
+        cambios = {"racha_maxima": maxima_nueva}
+    elif maxima_vieja < tendencia.racha_maxima:
+        cambios = {}
+    else:
+        return None
+
+    if tendencia.ultima_fecha <= fecha + alcance:
+        cambios["racha_actual"] = next(
+            (largo(c) for c in corridas if c[1] == tendencia.ultima_fecha), 0
+        )
+    return cambios
+
+
+def _rachas_tras_cambio(tendencia, quitar, agregar):
+    """
+    Rachas nuevas sin recorrer el historial: {} si no cambian, un día
+    nuevo al final en O(1) y cualquier otro cambio de un solo día leyendo
+    los días vecinos (ver _rachas_alrededor). None si hay que
+    recalcularlas desde cero: al mover un registro de fecha, al borrar
+    el último día y al acortar la única racha de largo máximo.
+    """
+    if quitar and agregar and quitar["fecha"] != agregar["fecha"]:
+        return None
+
+    if quitar and agregar:
+        antes, despues = dentro_del_presupuesto(quitar), dentro_del_presupuesto(agregar)
+        if antes == despues:
+            return {}
+        return _rachas_alrededor(tendencia, agregar["fecha"], antes, despues)
+
+    # Día nuevo posterior al último registrado (el caso de todos los días)
+    if agregar and not quitar and (tendencia.ultima_fecha is None or agregar["fecha"] > tendencia.ultima_fecha):
+        racha = paso_racha(
+            tendencia.racha_actual, tendencia.ultima_fecha, agregar["fecha"], dentro_del_presupuesto(agregar)
+        )
+        return {
+            "racha_actual": racha,
+            "racha_maxima": max(tendencia.racha_maxima, racha),
+            "ultima_fecha": agregar["fecha"],
+        }
+
+    # Día nuevo entre días ya registrados
+    if agregar and not quitar:
+        return _rachas_alrededor(tendencia, agregar["fecha"], None, dentro_del_presupuesto(agregar))
+
+    if quitar and quitar["fecha"] != tendencia.ultima_fecha:
+        # Borrar un día excedido que no es el último: el hueco sigue cortando
+        if not dentro_del_presupuesto(quitar):
+            return {}
+        return _rachas_alrededor(tendencia, quitar["fecha"], True, None)
+
+    return None
+
+
+def aplicar_cambio(user_id, quitar=None, agregar=None, crear_si_falta=True, hoy=None):
+    """
+    Aplica a la tendencia del usuario el cambio de un registro, con los
+    estados de RegistroFinanciero.estado_resumen antes (`quitar`) y
+    después (`agregar`). Las ventanas que contienen la fecha suman o
+    restan la diferencia: una lectura y un UPDATE, sin importar el largo
+    del historial. Las rachas se ajustan leyendo a lo sumo los días
+    vecinos al cambio; ver _rachas_tras_cambio para los pocos casos que
+    las recalculan desde cero.
+    """
+    hoy = hoy or date.today()
+    tendencia = TendenciaFinanciera.objects.filter(user_id=user_id).first()
+    if tendencia is None:
+        if crear_si_falta:
+            reconstruir_tendencia(user_id, hoy)
+        return
+
+    leida = tendencia.actualizado
+    deltas = ((quitar, -1), (agregar, 1))
+    if tendencia.fecha_referencia != hoy:
+        # El registro ya está guardado: las ventanas recalculadas lo incluyen
+        _deslizar(tendencia, hoy)
+        deltas = ()
+
+    cambios = {"fecha_referencia": tendencia.fecha_referencia}
+    for dias in VENTANAS:
+        gasto, cantidad = getattr(tendencia, f"gasto_{dias}"), getattr(tendencia, f"dias_{dias}")
+        for estado, signo in deltas:
+            if estado is not None and _dentro_de_ventana(estado["fecha"], dias, hoy):
+                gasto += signo * estado["gasto_total"]
+                cantidad += signo
+        cambios[f"gasto_{dias}"] = gasto
+        cambios[f"dias_{dias}"] = cantidad
+
+    racha = _rachas_tras_cambio(tendencia, quitar, agregar)
+    cambios.update(calcular_rachas(user_id) if racha is None else racha)
+
+    # Si otro proceso la modificó desde la lectura, se reconstruye
+    cambios["actualizado"] = timezone.now()
+    actualizadas = TendenciaFinanciera.objects.filter(pk=tendencia.pk, actualizado=leida).update(**cambios)
+    if not actualizadas:
+        reconstruir_tendencia(user_id, hoy)
@@ -1,5 +1,31 @@
 from abc import ABC, abstractmethod
-from decimal import Decimal
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP
+
+from django.db.models import Avg, DecimalField, QuerySet, Value
+from django.db.models.functions import Coalesce, Round
+
+from .calculo_sobrante.dinero import CENTAVO, CERO
+from .resumen.services import expresiones_resumen
+from .resumen.tendencias import en_ventana, gasto_del_dia, rachas
+
+
+_PROMEDIO = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _promedio(expresion, filtro=None):
+    return Coalesce(
+        Round(Avg(expresion, filter=filtro, output_field=_PROMEDIO), 2, output_field=_PROMEDIO),
+        Value(CERO, output_field=_PROMEDIO),
+        output_field=_PROMEDIO,
+    )
+
+
+def _promedio_python(valores):
+    valores = list(valores)
+    if not valores:
+        return CERO
+    return (sum(valores, CERO) / len(valores)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
 
 
 # --- Strategy Pattern ---
@@ -7,23 +33,74 @@ from decimal import Decimal
 class IndicadorStrategy(ABC):
     """Estrategia abstracta para calcular indicadores financieros."""
 
+    # Campo de ResumenFinanciero cuya expresión de agregación calcula
+    # el indicador (ver expresion())
+    campo_resumen = None
+
     @abstractmethod
     def calcular(self, registros):
+        """Cálculo en Python sobre registros ya cargados."""
         pass
 
+    def expresion(self):
+        """
+        Expresión de agregación del ORM equivalente a calcular(), para
+        resolver el indicador en la base. None si no tiene una: en ese
+        caso se usa calcular() sobre los registros.
+        Por defecto es la misma expresión que mantiene el resumen.
+        """
+        return expresiones_resumen().get(self.campo_resumen)
+
 
 class SobranteTotalStrategy(IndicadorStrategy):
     """Calcula el sobrante total acumulado."""
 
+    campo_resumen = "total_sobrante"
+
     def calcular(self, registros):
-        return sum((r.sobrante_monetario or Decimal(0)) for r in registros)
+        return sum((r.sobrante_monetario or CERO for r in registros), CERO)
 
 
 class TADStrategy(IndicadorStrategy):
     """Calcula el Total de Ahorro y Deuda."""
 
+    campo_resumen = "total_ahorro_y_deuda"
+
     def calcular(self, registros):
-        return sum((r.ahorro_y_deuda or Decimal(0)) for r in registros)
+        return sum((r.ahorro_y_deuda or CERO for r in registros), CERO)
+
+
+class PromedioGastoStrategy(IndicadorStrategy):
+    """Gasto promedio por día registrado en los últimos `dias` días."""
+
+    def __init__(self, dias):
+        self.dias = dias
+
+    def calcular(self, registros):
+        hoy = date.today()
+        desde = hoy - timedelta(days=self.dias)
+        return _promedio_python(r.gasto_total for r in registros if desde < r.fecha <= hoy)
+
+    def expresion(self):
+        return _promedio(gasto_del_dia(), filtro=en_ventana(self.dias, date.today()))
+
+
+class RachaPresupuestoStrategy(IndicadorStrategy):
+    """Mayor cantidad de días seguidos sin gastar más que el presupuesto."""
+
+    def calcular(self, registros):
+        dias = sorted((r.fecha, r.gasto_total <= r.para_gastar_dia) for r in registros)
+        return rachas(dias)["racha_maxima"]
+
+
+class PromedioAhorroStrategy(IndicadorStrategy):
+    """Ahorro y deuda promedio por día registrado."""
+
+    def calcular(self, registros):
+        return _promedio_python(r.ahorro_y_deuda or CERO for r in registros)
+
+    def expresion(self):
+        return _promedio("ahorro_y_deuda")
 
 
 class FactoryIndicadores:
@@ -32,6 +109,11 @@ class FactoryIndicadores:
     _estrategias = {
         "sobrante": SobranteTotalStrategy(),
         "tad": TADStrategy(),
+        "gasto_7": PromedioGastoStrategy(7),
+        "gasto_30": PromedioGastoStrategy(30),
+        "gasto_90": PromedioGastoStrategy(90),
+        "racha": RachaPresupuestoStrategy(),
+        "ahorro_promedio": PromedioAhorroStrategy(),
     }
 
     @classmethod
@@ -39,4 +121,38 @@ class FactoryIndicadores:
         estrategia = cls._estrategias.get(tipo)
         if not estrategia:
             raise ValueError(f"Estrategia '{tipo}' no encontrada.")
-        return estrategia
\ No newline at end of file
+        return estrategia
+
+    @classmethod
+    def calcular(cls, tipos, registros) -> dict:
+        """
+        Calcula varios indicadores de una vez: {tipo: valor}.
+
+        Con un QuerySet, todos los que tienen expresión se resuelven en
+        un único aggregate(); solo si queda alguno sin expresión se
+        cargan los registros. Con una lista ya cargada se usa calcular()
+        de cada estrategia.
+        """
+        estrategias = {tipo: cls.get_strategy(tipo) for tipo in tipos}
+        resultados = {}
+
+        if isinstance(registros, QuerySet):
+            expresiones = {}
+            for tipo, estrategia in estrategias.items():
+                expresion = estrategia.expresion()
+                if expresion is not None:
+                    expresiones[f"indicador_{tipo}"] = expresion
+
+            if expresiones:
+                valores = registros.order_by().aggregate(**expresiones)
+                resultados = {tipo: valores[f"indicador_{tipo}"] for tipo in estrategias
+                              if f"indicador_{tipo}" in valores}
+
+            if len(resultados) < len(estrategias):
+                registros = list(registros)
+
+        for tipo, estrategia in estrategias.items():
+            if tipo not in resultados:
+                resultados[tipo] = estrategia.calcular(registros)
+
+        return resultados
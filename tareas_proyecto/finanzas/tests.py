@@ -1,3 +1,1630 @@
-from django.test import TestCase
+import atexit
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models import F, Model, Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import indicadores as cache_indicadores
+from .cache.indicadores import MemoriaLRU, estadisticas, indicadores_usuario
+from .cache.versiones import clave_usuario
+from .calculo_sobrante import calculadora
+from .calculo_sobrante.calculadora import (
+    a_centavos,
+    calcular_sobrante,
+    calcular_sobrantes,
+    de_centavos,
+    recalcular_sobrantes,
+)
+from .calculo_sobrante.dinero import leer_monto, parsear_monto
+from .calendario.selectors import grilla_mes
+from .calendario.services import FALTANTE, INCOMPLETO, eliminar_dias_sin_datos, indice_pendientes
+from .calendario.utils import RangoFechas, agregar_rango, primeras_fechas, rango_mes, total_dias
+from .strategies import FactoryIndicadores, IndicadorStrategy
+from .models import (
+    ConfigFinanciera,
+    MarcaVerificacion,
+    PuntoControl,
+    RegistroFinanciero,
+    ResumenFinanciero,
+    TendenciaFinanciera,
+)
+from .utils.diagnostico import diagnosticar_por_usuario, diagnosticar_registros
+from .utils.marcas import ejecucion_incremental, obtener_marca
+from .utils.reparador import reparar_registros_financieros
+from .utils.reparador_global import reparar_todos_los_usuarios
+from .utils.reglas import REGLAS, diagnosticar_reglas, registrar_regla, reglas_de
+from .utils.verificador import Hallazgo, iterar_hallazgos, verificar_registros_financieros
+from .resumen.services import CAMPOS_RESUMEN, calcular_resumen, reconstruir_resumenes
+from .resumen.tendencias import (
+    calcular_rachas,
+    calcular_ventanas,
+    obtener_tendencia,
+    reconstruir_tendencia,
+    reconstruir_tendencias,
+)
+
+
+# Las pruebas vacían la caché en cada setUp: usan un directorio temporal
+# propio y nunca el django_cache/ del proyecto
+DIRECTORIO_CACHE = tempfile.mkdtemp(prefix="finanzas-cache-")
+atexit.register(shutil.rmtree, DIRECTORIO_CACHE, ignore_errors=True)
+
+cache_de_pruebas = override_settings(CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": DIRECTORIO_CACHE,
+    }
+})
+
+
+@cache_de_pruebas
+class TotalesDashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        hoy = date.today()
+        valores = [
+            ("1000.00", "120.50", "30.25", "200.00"),
+            ("800.00", "900.00", "0.00", "0.00"),
+            ("500.10", "0.05", "10.00", "99.99"),
+        ]
+        for i, (p, a, pr, ad) in enumerate(valores):
+            RegistroFinanciero.objects.create(
+                user=self.user,
+                fecha=hoy - timedelta(days=i),
+                para_gastar_dia=Decimal(p),
+                alimento=Decimal(a),
+                productos=Decimal(pr),
+                ahorro_y_deuda=Decimal(ad),
+            )
+
+    def totales(self, user):
+        self.client.force_login(user)
+        contexto = self.client.get(reverse("finanzas:dashboard")).context
+        return contexto["total_gastado"], contexto["total_sobrante"]
+
+    def test_totales_coinciden_con_suma_en_python(self):
+        registros = RegistroFinanciero.objects.filter(user=self.user)
+
+        total_gastado, total_sobrante = self.totales(self.user)
+
+        self.assertEqual(total_gastado, sum(r.gasto_total for r in registros))
+        self.assertEqual(total_sobrante, sum(r.sobrante_monetario for r in registros))
+
+    def test_totales_sin_registros(self):
+        otro = User.objects.create_user("beto", password="clave-segura-123")
+
+        total_gastado, total_sobrante = self.totales(otro)
+
+        self.assertEqual(total_gastado, 0)
+        self.assertEqual(total_sobrante, 0)
+
+
+@cache_de_pruebas
+class ResumenFinancieroTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.hoy = date.today()
+        valores = [
+            ("1000.00", "120.50", "30.25", "200.00"),
+            ("800.00", "900.00", "0.00", "0.00"),
+            ("500.10", "0.05", "10.00", "99.99"),
+        ]
+        for i, (p, a, pr, ad) in enumerate(valores):
+            RegistroFinanciero.objects.create(
+                user=self.user,
+                fecha=self.hoy - timedelta(days=i),
+                para_gastar_dia=Decimal(p),
+                alimento=Decimal(a),
+                productos=Decimal(pr),
+                ahorro_y_deuda=Decimal(ad),
+                completado=(i == 0),
+            )
+
+    def assertResumenCoincide(self):
+        resumen = ResumenFinanciero.objects.get(user=self.user)
+        esperado = calcular_resumen(RegistroFinanciero.objects.filter(user=self.user))
+        for campo in CAMPOS_RESUMEN:
+            self.assertEqual(getattr(resumen, campo), esperado[campo], campo)
+
+    def test_totales_coinciden_con_suma_en_python(self):
+        registros = RegistroFinanciero.objects.filter(user=self.user)
+        resumen = ResumenFinanciero.objects.get(user=self.user)
+
+        self.assertEqual(resumen.total_gastado, sum(r.gasto_total for r in registros))
+        self.assertEqual(resumen.total_sobrante, sum(r.sobrante_monetario for r in registros))
+        self.assertEqual(resumen.dias_completados, 1)
+        self.assertEqual(resumen.dias_pendientes, 2)
+
+    def test_modificar_eliminar_y_fijar_actualizan_por_delta(self):
+        registro = RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy)
+        registro.alimento = Decimal("10.00")
+        registro.completado = False
+        registro.save()
+        self.assertResumenCoincide()
+
+        registro.fijar_valor("productos", Decimal("5.50"))
+        self.assertResumenCoincide()
+
+        registro.fecha = self.hoy - timedelta(days=10)
+        registro.save()
+        self.assertResumenCoincide()
+
+        RegistroFinanciero.objects.filter(user=self.user, fecha=self.hoy - timedelta(days=1)).delete()
+        self.assertResumenCoincide()
+
+    def test_reconstruir_informa_y_corrige_desvios(self):
+        ResumenFinanciero.objects.filter(user=self.user).update(total_gastado=Decimal("1"))
+
+        desvios = reconstruir_resumenes()
+
+        self.assertEqual([user_id for user_id, _ in desvios], [self.user.pk])
+        self.assertIn("total_gastado", desvios[0][1])
+        self.assertResumenCoincide()
+        self.assertEqual(reconstruir_resumenes(), [])
+
+
+@cache_de_pruebas
+class DashboardSinEscriturasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.client.force_login(self.user)
+
+    def assertGetSinEscrituras(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse("finanzas:dashboard"))
+
+        self.assertEqual(respuesta.status_code, 200)
+        escrituras = [
+            q["sql"] for q in consultas.captured_queries
+            if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(escrituras, [])
+
+    def test_get_sin_registros_no_escribe(self):
+        self.assertGetSinEscrituras()
+
+    def test_get_con_registro_de_hoy_no_escribe(self):
+        RegistroFinanciero.objects.create(
+            user=self.user,
+            fecha=date.today(),
+            para_gastar_dia=Decimal("1000"),
+            alimento=Decimal("250.50"),
+        )
+        self.assertGetSinEscrituras()
+
+    def test_get_persiste_solo_el_sobrante_desfasado(self):
+        registro = RegistroFinanciero.objects.create(
+            user=self.user,
+            fecha=date.today(),
+            para_gastar_dia=Decimal("1000"),
+            alimento=Decimal("250.50"),
+        )
+        RegistroFinanciero.objects.filter(pk=registro.pk).update(sobrante_monetario=Decimal("1"))
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse("finanzas:dashboard"))
+
+        actualizaciones = [
+            q["sql"] for q in consultas.captured_queries
+            if q["sql"].lstrip().upper().startswith("UPDATE \"FINANZAS_REGISTROFINANCIERO\"")
+        ]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertNotIn("alimento", actualizaciones[0])
+        registro.refresh_from_db()
+        self.assertEqual(registro.sobrante_monetario, Decimal("749.50"))
+
+
+@cache_de_pruebas
+class DashboardCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.client.force_login(self.user)
+        self.registro = RegistroFinanciero.objects.create(
+            user=self.user,
+            fecha=date.today(),
+            para_gastar_dia=Decimal("1000"),
+            alimento=Decimal("100"),
+        )
+
+    def consultas_finanzas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse("finanzas:dashboard"))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, [q["sql"] for q in consultas.captured_queries if "finanzas_" in q["sql"]]
+
+    def test_segunda_carga_no_consulta_tablas_de_finanzas(self):
+        _, primera = self.consultas_finanzas()
+        _, segunda = self.consultas_finanzas()
+
+        self.assertGreater(len(primera), 0)
+        self.assertEqual(segunda, [])
+
+    def test_escritura_invalida_el_contexto_cacheado(self):
+        respuesta, _ = self.consultas_finanzas()
+        self.assertEqual(respuesta.context["total_gastado"], Decimal("100"))
+
+        self.registro.alimento = Decimal("300")
+        self.registro.save()
+
+        respuesta, consultas = self.consultas_finanzas()
+        self.assertGreater(len(consultas), 0)
+        self.assertEqual(respuesta.context["total_gastado"], Decimal("300"))
+
+    def test_contexto_cacheado_no_guarda_instancias_de_modelos(self):
+        self.consultas_finanzas()
+
+        cacheado = cache.get(clave_usuario("dashboard", self.user.pk, date.today().isoformat()))
+        self.assertIsNotNone(cacheado)
+        self.assertFalse([clave for clave, valor in cacheado.items() if isinstance(valor, Model)])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_cache_propia_del_proceso_no_guarda_el_contexto(self):
+        self.consultas_finanzas()
+        # Un comando en otro proceso cambia los datos sin poder invalidar
+        RegistroFinanciero.objects.filter(pk=self.registro.pk).update(alimento=Decimal("300"))
+        ResumenFinanciero.objects.filter(user=self.user).update(total_gastado=Decimal("300"))
+
+        respuesta, consultas = self.consultas_finanzas()
+        self.assertGreater(len(consultas), 0)
+        self.assertEqual(respuesta.context["total_gastado"], Decimal("300"))
+
+
+@cache_de_pruebas
+class IndicePendientesTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.inicio = date(2021, 1, 1)
+
+    def crear(self, dia, completado):
+        RegistroFinanciero.objects.create(
+            user=self.user,
+            fecha=self.inicio + timedelta(days=dia),
+            para_gastar_dia=Decimal("100"),
+            completado=completado,
+        )
+
+    def test_rangos_de_faltantes_e_incompletos(self):
+        self.crear(0, True)
+        self.crear(3, False)
+        self.crear(4, False)
+        self.crear(5, True)
+        hasta = self.inicio + timedelta(days=9)
+
+        with self.assertNumQueries(1):
+            rangos = indice_pendientes(self.user, self.inicio, hasta)
+
+        d = lambda n: self.inicio + timedelta(days=n)
+        self.assertEqual(rangos, [
+            RangoFechas(d(1), d(2), FALTANTE),
+            RangoFechas(d(3), d(4), INCOMPLETO),
+            RangoFechas(d(6), d(9), FALTANTE),
+        ])
+        self.assertEqual(total_dias(rangos), 8)
+        self.assertEqual(primeras_fechas(rangos, 3), [d(1), d(2), d(3)])
+
+    def test_solo_se_leen_los_bordes_de_cada_rango(self):
+        for dia in range(200):
+            self.crear(dia, completado=not 50 <= dia < 120)
+        hasta = self.inicio + timedelta(days=249)
+
+        with CaptureQueriesContext(connection) as consultas:
+            rangos = indice_pendientes(self.user, self.inicio, hasta)
+
+        d = lambda n: self.inicio + timedelta(days=n)
+        self.assertEqual(rangos, [RangoFechas(d(50), d(119), INCOMPLETO), RangoFechas(d(200), d(249), FALTANTE)])
+        with connection.cursor() as cursor:
+            cursor.execute(consultas.captured_queries[0]["sql"])
+            self.assertLessEqual(len(cursor.fetchall()), 6)
+
+    def test_igual_que_recorrer_dia_por_dia(self):
+        estados = {1: [True], 2: [False], 3: [False, True], 4: [False, False], 5: [False],
+                   7: [True], 8: [False], 10: [False, False], 11: [True, True], 14: [False]}
+        for dia, completados in estados.items():
+            for completado in completados:
+                self.crear(dia, completado)
+        hasta = self.inicio + timedelta(days=15)
+
+        esperado = []
+        for dia in range(16):
+            if dia not in estados:
+                agregar_rango(esperado, self.inicio + timedelta(days=dia), self.inicio + timedelta(days=dia), FALTANTE)
+            elif not any(estados[dia]):
+                agregar_rango(esperado, self.inicio + timedelta(days=dia), self.inicio + timedelta(days=dia), INCOMPLETO)
+
+        self.assertEqual(indice_pendientes(self.user, self.inicio, hasta), esperado)
+        self.assertEqual(indice_pendientes(self.user, self.inicio + timedelta(days=4), hasta), esperado[2:])
+
+    def test_historial_largo_sin_registros_es_un_solo_rango(self):
+        hasta = self.inicio + timedelta(days=5 * 365)
+
+        rangos = indice_pendientes(self.user, self.inicio, hasta)
+
+        self.assertEqual(rangos, [RangoFechas(self.inicio, hasta, FALTANTE)])
+        self.assertEqual(rangos[0].dias, 5 * 365 + 1)
+
+
+@cache_de_pruebas
+class VentanaRegistrosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.client.force_login(self.user)
+        self.hoy = date.today()
+        RegistroFinanciero.objects.bulk_create([
+            RegistroFinanciero(
+                user=self.user,
+                fecha=self.hoy - timedelta(days=i),
+                para_gastar_dia=Decimal("100"),
+            )
+            for i in range(45)
+        ])
+
+    def test_dashboard_muestra_solo_la_ventana_reciente(self):
+        respuesta = self.client.get(reverse("finanzas:dashboard"))
+
+        registros = respuesta.context["registros"]
+        self.assertEqual(len(registros), 30)
+        self.assertEqual(registros[0]["fecha"], self.hoy)
+        siguiente = respuesta.context["registros_siguiente"]
+        self.assertEqual(siguiente, {"fecha": self.hoy - timedelta(days=29), "id": registros[-1]["id"]})
+
+    def test_cargar_mas_pagina_por_fecha(self):
+        antes = (self.hoy - timedelta(days=29)).isoformat()
+
+        datos = self.client.get(reverse("finanzas:registros_recientes"), {"antes": antes}).json()
+
+        self.assertEqual(len(datos["registros"]), 15)
+        self.assertEqual(datos["registros"][0]["fecha"], (self.hoy - timedelta(days=30)).isoformat())
+        self.assertIsNone(datos["siguiente"])
+
+    def test_fechas_repetidas_en_el_borde_no_se_pierden(self):
+        # La base no impide dos registros del mismo usuario y fecha
+        borde = self.hoy - timedelta(days=29)
+        for _ in range(2):
+            RegistroFinanciero.objects.create(user=self.user, fecha=borde, para_gastar_dia=Decimal("100"))
+
+        respuesta = self.client.get(reverse("finanzas:dashboard"))
+        vistos = [fila["id"] for fila in respuesta.context["registros"]]
+        siguiente = respuesta.context["registros_siguiente"]
+        while siguiente:
+            datos = self.client.get(
+                reverse("finanzas:registros_recientes"),
+                {"antes": str(siguiente["fecha"]), "antes_id": siguiente["id"]},
+            ).json()
+            vistos += [fila["id"] for fila in datos["registros"]]
+            siguiente = datos["siguiente"]
+
+        self.assertEqual(len(vistos), 47)
+        self.assertEqual(set(vistos), set(RegistroFinanciero.objects.filter(user=self.user).values_list("pk", flat=True)))
+
+    def test_cargar_mas_rechaza_fecha_invalida(self):
+        respuesta = self.client.get(reverse("finanzas:registros_recientes"), {"antes": "ayer"})
+
+        self.assertEqual(respuesta.status_code, 400)
+
+
+@cache_de_pruebas
+class CalendarioBackfillTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.client.force_login(self.user)
+        ConfigFinanciera.objects.filter(user=self.user).update(
+            presupuesto_diario=Decimal("500"),
+            default_alimento=Decimal("120"),
+            default_alimento_fijo=True,
+        )
+
+    def configurar(self, inicio):
+        return self.client.post(
+            reverse("finanzas:configurar_calendario"),
+            {"fecha_inicio": inicio.isoformat()},
+        )
+
+    def test_backfill_en_lote_aplica_valores_por_defecto(self):
+        hoy = date.today()
+        RegistroFinanciero.objects.create(
+            user=self.user, fecha=hoy, para_gastar_dia=Decimal("10"), completado=True
+        )
+
+        self.configurar(hoy - timedelta(days=3 * 365))
+
+        registros = RegistroFinanciero.objects.filter(user=self.user)
+        self.assertEqual(registros.count(), 3 * 365 + 1)
+        self.assertEqual(registros.get(fecha=hoy).para_gastar_dia, Decimal("10"))
+
+        creado = registros.get(fecha=hoy - timedelta(days=1))
+        self.assertEqual(creado.para_gastar_dia, Decimal("500"))
+        self.assertEqual(creado.alimento, Decimal("120"))
+        self.assertTrue(creado.alimento_fijo)
+        self.assertEqual(creado.sobrante_monetario, Decimal("380"))
+
+        resumen = ResumenFinanciero.objects.get(user=self.user)
+        self.assertEqual(resumen.dias_pendientes, 3 * 365)
+
+    def test_consultas_por_lote_y_no_por_dia(self):
+        dias = 3 * 365
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.configurar(date.today() - timedelta(days=dias))
+
+        # Antes eran dos consultas por día (get_or_create)
+        self.assertLess(len(consultas), dias // 20)
+
+
+@cache_de_pruebas
+class GrillaMesTests(TestCase):
+
+    def test_grilla_de_un_mes_en_una_consulta(self):
+        user = User.objects.create_user("ana", password="clave-segura-123")
+        for dia in (1, 15, 28):
+            RegistroFinanciero.objects.create(
+                user=user, fecha=date(2024, 2, dia), para_gastar_dia=Decimal("100")
+            )
+        RegistroFinanciero.objects.create(
+            user=user, fecha=date(2024, 3, 1), para_gastar_dia=Decimal("100")
+        )
+
+        with self.assertNumQueries(1):
+            semanas = grilla_mes(user, 2024, 2)
+
+        celdas = [celda for semana in semanas for celda in semana]
+        self.assertTrue(all(len(semana) == 7 for semana in semanas))
+        self.assertEqual(sum(celda["en_mes"] for celda in celdas), 29)
+        con_registro = [celda["fecha"].day for celda in celdas if celda["registro"]]
+        self.assertEqual(con_registro, [1, 15, 28])
+
+
+@cache_de_pruebas
+class ListaDiasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        cache_indicadores.limpiar_memoria()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.client.force_login(self.user)
+        self.hoy = date.today()
+
+    def configurar_inicio(self, dias_atras):
+        inicio = self.hoy - timedelta(days=dias_atras)
+        ConfigFinanciera.objects.filter(user=self.user).update(fecha_inicio_registros=inicio)
+        RegistroFinanciero.objects.bulk_create([
+            RegistroFinanciero(user=self.user, fecha=fecha, para_gastar_dia=Decimal("100"))
+            for fecha in (inicio + timedelta(days=i) for i in range(dias_atras + 1))
+            if fecha.day % 3
+        ])
+
+    def contar_consultas(self, **params):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse("finanzas:registros_dias"), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, len(consultas)
+
+    def test_consultas_constantes_sin_importar_el_rango(self):
+        self.configurar_inicio(5)
+        _, corto = self.contar_consultas()
+
+        RegistroFinanciero.objects.filter(user=self.user).delete()
+        self.configurar_inicio(2 * 365)
+        respuesta, largo = self.contar_consultas()
+
+        self.assertEqual(corto, largo)
+        self.assertLessEqual(len(respuesta.context["dias"]), 31)
+
+    def test_pagina_por_mes(self):
+        self.configurar_inicio(400)
+        mes = (self.hoy.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        respuesta, _ = self.contar_consultas(mes=mes.strftime("%Y-%m"))
+
+        fechas = [dia["fecha"] for dia in respuesta.context["dias"]]
+        self.assertTrue(all(f.year == mes.year and f.month == mes.month for f in fechas))
+        self.assertEqual(fechas[0], rango_mes(mes.year, mes.month)[1])
+        self.assertIsNotNone(respuesta.context["mes_anterior"])
+        self.assertIsNotNone(respuesta.context["mes_siguiente"])
+
+    def test_indicadores_del_mes_se_memorizan(self):
+        self.configurar_inicio(400)
+        mes = (self.hoy.replace(day=1) - timedelta(days=1)).replace(day=1)
+        registros = RegistroFinanciero.objects.filter(
+            user=self.user, fecha__range=rango_mes(mes.year, mes.month)
+        )
+        registros.filter(fecha__day=1).update(ahorro_y_deuda=Decimal("30"))
+
+        respuesta, primera = self.contar_consultas(mes=mes.strftime("%Y-%m"))
+        _, segunda = self.contar_consultas(mes=mes.strftime("%Y-%m"))
+
+        indicadores = respuesta.context["indicadores"]
+        self.assertEqual(indicadores["tad"], Decimal("30"))
+        self.assertEqual(indicadores["sobrante"], sum(r.sobrante_monetario for r in registros))
+        # Los días múltiplos de 3 no tienen registro y cortan la racha
+        self.assertEqual(indicadores["racha"], 2)
+        self.assertLess(segunda, primera)
+
+
+@cache_de_pruebas
+class DiasVirtualesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.client.force_login(self.user)
+        self.hoy = date.today()
+        ConfigFinanciera.objects.filter(user=self.user).update(presupuesto_diario=Decimal("300"))
+
+    def configurar(self, inicio, **extra):
+        return self.client.post(
+            reverse("finanzas:configurar_calendario"),
+            {"fecha_inicio": inicio.isoformat(), **extra},
+        )
+
+    def test_modo_virtual_no_materializa_dias(self):
+        self.configurar(self.hoy - timedelta(days=60), dias_virtuales="on")
+
+        self.assertFalse(RegistroFinanciero.objects.filter(user=self.user).exists())
+
+        respuesta = self.client.get(reverse("finanzas:registros_dias"))
+        dia = respuesta.context["dias"][0]
+        self.assertIsNone(dia["registro"].pk)
+        self.assertEqual(dia["registro"].para_gastar_dia, Decimal("300"))
+
+    def test_activar_modo_virtual_quita_dias_vacios(self):
+        self.configurar(self.hoy - timedelta(days=10))
+        completado = RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy)
+        completado.alimento = Decimal("50")
+        completado.completado = True
+        completado.save()
+
+        self.configurar(self.hoy - timedelta(days=10), dias_virtuales="on")
+
+        self.assertEqual(
+            list(RegistroFinanciero.objects.filter(user=self.user).values_list("fecha", flat=True)),
+            [self.hoy],
+        )
+        self.assertEqual(ResumenFinanciero.objects.get(user=self.user).dias_pendientes, 0)
+
+    def test_dias_con_valores_fijados_no_se_borran(self):
+        self.configurar(self.hoy - timedelta(days=10))
+        registros = RegistroFinanciero.objects.filter(user=self.user)
+        sobrante = registros.get(fecha=self.hoy - timedelta(days=1))
+        sobrante.fijar_valor("sobrante", Decimal("300"))
+        # Fijado a mano en cero, igual que el valor por defecto
+        alimento = registros.get(fecha=self.hoy - timedelta(days=2))
+        alimento.fijar_valor("alimento", Decimal("0"))
+
+        with CaptureQueriesContext(connection) as consultas:
+            eliminados = eliminar_dias_sin_datos(self.user, ConfigFinanciera.objects.get(user=self.user))
+
+        self.assertEqual(eliminados, 9)
+        self.assertEqual(
+            set(registros.values_list("pk", flat=True)),
+            {sobrante.pk, alimento.pk},
+        )
+        borrados = [q["sql"] for q in consultas.captured_queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(borrados), 1)
+        self.assertEqual(reconstruir_resumenes(aplicar=False), [])
+        tendencia = TendenciaFinanciera.objects.get(user=self.user)
+        self.assertEqual(tendencia.dias_30, 2)
+
+    def test_relleno_con_montos_fijos_por_defecto_se_borra(self):
+        ConfigFinanciera.objects.filter(user=self.user).update(
+            default_alimento=Decimal("50"), default_alimento_fijo=True,
+        )
+        self.configurar(self.hoy - timedelta(days=5))
+        self.assertEqual(RegistroFinanciero.objects.filter(user=self.user, alimento_fijo=True).count(), 6)
+
+        self.configurar(self.hoy - timedelta(days=5), dias_virtuales="on")
+
+        self.assertFalse(RegistroFinanciero.objects.filter(user=self.user).exists())
+        self.assertEqual(reconstruir_resumenes(aplicar=False), [])
+
+    def test_dia_virtual_se_guarda_recien_al_editarlo(self):
+        self.configurar(self.hoy - timedelta(days=5), dias_virtuales="on")
+        fecha = self.hoy - timedelta(days=2)
+        url = reverse("finanzas:completar_pendiente_por_fecha", args=[fecha.isoformat()])
+
+        self.client.get(url)
+        self.assertFalse(RegistroFinanciero.objects.filter(user=self.user).exists())
+
+        self.client.post(url, {"para_gastar_dia": "300", "alimento": "100"})
+        registro = RegistroFinanciero.objects.get(user=self.user, fecha=fecha)
+        self.assertTrue(registro.completado)
+        self.assertEqual(registro.sobrante_monetario, Decimal("200"))
+
+
+@cache_de_pruebas
+class ReparadorTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.otro = User.objects.create_user("beto", password="clave-segura-123")
+        self.inicio = date(2024, 1, 10)
+        ConfigFinanciera.objects.filter(user=self.user).update(fecha_inicio_registros=self.inicio)
+
+    def crear(self, user, dia, **valores):
+        valores.setdefault("para_gastar_dia", Decimal("100"))
+        return RegistroFinanciero.objects.create(
+            user=user, fecha=self.inicio + timedelta(days=dia), **valores
+        )
+
+    def test_reparacion_por_conjuntos(self):
+        # Antes de la fecha de inicio → se mueve al inicio y queda duplicado
+        self.crear(self.user, -3, alimento=Decimal("1"))
+        self.crear(self.user, 0, alimento=Decimal("50"))
+        negativo = self.crear(self.user, 1, alimento=Decimal("10"))
+        RegistroFinanciero.objects.filter(pk=negativo.pk).update(productos=Decimal("-5"))
+        desfasado = self.crear(self.user, 2, alimento=Decimal("30"))
+        RegistroFinanciero.objects.filter(pk=desfasado.pk).update(sobrante_monetario=Decimal("1"))
+        fijo = self.crear(self.user, 3, sobrante_fijo=True, sobrante_monetario=Decimal("7"))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE finanzas_registrofinanciero SET alimento = 10.555 WHERE id = %s",
+                [fijo.pk],
+            )
+        self.crear(self.otro, 0, alimento=Decimal("-1"))
+
+        resultado = reparar_registros_financieros(usuario=self.user)
+
+        self.assertEqual(resultado, {
+            "fechas_fuera_de_rango": 1,
+            "duplicados_eliminados": 1,
+            "sobrantes_recalculados": 1,
+            "decimales_corregidos": 1,
+            "valores_negativos_corregidos": 1,
+            "registros_actualizados": 3,
+        })
+
+        registros = RegistroFinanciero.objects.filter(user=self.user)
+        self.assertEqual(registros.filter(fecha=self.inicio).get().alimento, Decimal("50"))
+        negativo.refresh_from_db()
+        self.assertEqual((negativo.productos, negativo.sobrante_monetario), (0, Decimal("90")))
+        desfasado.refresh_from_db()
+        self.assertEqual(desfasado.sobrante_monetario, Decimal("70"))
+        fijo.refresh_from_db()
+        self.assertEqual((fijo.alimento, fijo.sobrante_monetario), (Decimal("10.56"), Decimal("7")))
+
+        # El otro usuario no se toca y el resumen queda al día
+        self.assertEqual(RegistroFinanciero.objects.get(user=self.otro).alimento, Decimal("-1"))
+        self.assertEqual(reconstruir_resumenes(aplicar=False), [])
+
+    def test_duplicados_por_grupo(self):
+        for dia in range(10):
+            self.crear(self.user, dia, alimento=Decimal("5"))
+        empate_1 = self.crear(self.user, 0, alimento=Decimal("5"))
+        mayor = self.crear(self.user, 1, alimento=Decimal("9"))
+        self.crear(self.user, 1, alimento=Decimal("1"))
+        self.crear(self.otro, 1, alimento=Decimal("2"))
+        otro_mayor = self.crear(self.otro, 1, alimento=Decimal("3"))
+
+        resultado = reparar_registros_financieros(tamanio_lote=2)
+
+        self.assertEqual(resultado["duplicados_eliminados"], 4)
+        conservados = RegistroFinanciero.objects.filter(fecha__in=[self.inicio, self.inicio + timedelta(days=1)])
+        ids = set(conservados.values_list("pk", flat=True))
+        # Empate → se queda el de menor id; si no, el de mayor suma
+        self.assertNotIn(empate_1.pk, ids)
+        self.assertIn(mayor.pk, ids)
+        self.assertIn(otro_mayor.pk, ids)
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(RegistroFinanciero.objects.filter(user=self.user).count(), 10)
+
+    def test_duplicados_se_borran_sin_signals_por_fila(self):
+        for dia in range(40):
+            self.crear(self.user, dia, alimento=Decimal("5"))
+            self.crear(self.user, dia, alimento=Decimal("1"))
+        # Otro usuario en una fecha duplicada, sin duplicados propios
+        self.crear(self.otro, 0)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = reparar_registros_financieros()
+
+        self.assertEqual(resultado["duplicados_eliminados"], 40)
+        self.assertLess(len(consultas), 40)
+        self.assertEqual(RegistroFinanciero.objects.filter(user=self.user, alimento=Decimal("5")).count(), 40)
+        self.assertEqual(RegistroFinanciero.objects.filter(user=self.otro).count(), 1)
+        self.assertEqual(reconstruir_resumenes(aplicar=False), [])
+        tendencia = TendenciaFinanciera.objects.get(user=self.user)
+        self.assertEqual(
+            (tendencia.racha_actual, tendencia.racha_maxima, tendencia.ultima_fecha),
+            tuple(calcular_rachas(self.user.pk).values()),
+        )
+
+    def test_reparador_global_suma_los_resumenes_parciales(self):
+        self.crear(self.user, 0, alimento=Decimal("-3"))
+        self.crear(self.otro, 0, alimento=Decimal("-1"))
+        self.crear(self.otro, 1, alimento=Decimal("5"))
+
+        with redirect_stdout(io.StringIO()):
+            resumen = reparar_todos_los_usuarios()
+
+        self.assertEqual(resumen["usuarios_procesados"], 2)
+        self.assertEqual(resumen["total_registros"], 3)
+        self.assertEqual(resumen["valores_negativos_corregidos"], 2)
+
+    def test_segunda_pasada_no_encuentra_nada(self):
+        self.crear(self.user, 0, alimento=Decimal("20"))
+        reparar_registros_financieros()
+
+        self.assertEqual(
+            set(reparar_registros_financieros().values()),
+            {0},
+        )
+
+
+@cache_de_pruebas
+class EjecucionIncrementalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.hace_un_mes = timezone.now() - timedelta(days=30)
+
+        for dia in range(5):
+            RegistroFinanciero.objects.create(
+                user=self.user, fecha=date(2024, 1, 1) + timedelta(days=dia),
+                para_gastar_dia=Decimal("100"),
+            )
+        # Registros viejos, uno de ellos corrupto
+        RegistroFinanciero.objects.update(modificado=self.hace_un_mes)
+        RegistroFinanciero.objects.filter(fecha=date(2024, 1, 1)).update(alimento=Decimal("-1"))
+
+    def test_save_y_reparador_actualizan_modificado(self):
+        registro = RegistroFinanciero.objects.get(fecha=date(2024, 1, 2))
+        registro.alimento = Decimal("5")
+        registro.save()
+        self.assertGreater(registro.modificado, self.hace_un_mes)
+
+        reparar_registros_financieros()
+        corregido = RegistroFinanciero.objects.get(fecha=date(2024, 1, 1))
+        self.assertEqual(corregido.alimento, 0)
+        self.assertGreater(corregido.modificado, self.hace_un_mes)
+
+    def test_desde_solo_revisa_lo_modificado(self):
+        desde = self.hace_un_mes + timedelta(days=1)
+        self.assertEqual(diagnosticar_registros(desde=desde)["total_registros"], 0)
+        self.assertEqual(reparar_registros_financieros(desde=desde)["valores_negativos_corregidos"], 0)
+
+        RegistroFinanciero.objects.filter(fecha=date(2024, 1, 3)).update(
+            productos=Decimal("-2"), modificado=timezone.now()
+        )
+
+        self.assertEqual(diagnosticar_registros(desde=desde), {
+            "total_registros": 1,
+            "errores_detectados": 1,
+            "por_regla": {"valor_negativo_productos": 1},
+        })
+        self.assertEqual(reparar_registros_financieros(desde=desde)["valores_negativos_corregidos"], 1)
+        # El registro viejo sigue sin revisar
+        self.assertEqual(RegistroFinanciero.objects.get(fecha=date(2024, 1, 1)).alimento, Decimal("-1"))
+
+    def test_marca_solo_se_guarda_si_la_ejecucion_termina(self):
+        with self.assertRaises(RuntimeError):
+            with ejecucion_incremental("verificador", incremental=True) as desde:
+                self.assertIsNone(desde)
+                raise RuntimeError
+        self.assertFalse(MarcaVerificacion.objects.exists())
+
+        with ejecucion_incremental("verificador", incremental=True):
+            pass
+        marca = obtener_marca("verificador")
+
+        with ejecucion_incremental("verificador", incremental=True) as desde:
+            self.assertEqual(desde, marca)
+
+    def test_comando_incremental(self):
+        salida = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command("reparar_finanzas", "--reparar", "--incremental", stdout=salida)
+        self.assertIn("ana: 5 registros, 1 errores detectados", salida.getvalue())
+        self.assertIsNotNone(obtener_marca("diagnostico"))
+        self.assertIsNotNone(obtener_marca("reparador"))
+
+        salida = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command("reparar_finanzas", "--incremental", stdout=salida)
+        # El reparador tocó un registro; el diagnóstico solo vuelve a ver ese
+        self.assertIn("ana: 1 registros, 0 errores detectados", salida.getvalue())
+
+        salida = io.StringIO()
+        call_command("verificar_finanzas", "--desde", "2000-01-01", "--salida", "-", stdout=salida, stderr=io.StringIO())
+        self.assertEqual(salida.getvalue(), "")
+        self.assertIsNotNone(obtener_marca("verificador"))
+
+
+@cache_de_pruebas
+class VerificadorTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.inicio = date(2024, 1, 1)
+        for dia in range(4):
+            RegistroFinanciero.objects.create(
+                user=self.user, fecha=self.inicio + timedelta(days=dia),
+                para_gastar_dia=Decimal("100"), alimento=Decimal("40"),
+            )
+        self.dia = lambda n: self.inicio + timedelta(days=n)
+
+        RegistroFinanciero.objects.filter(fecha=self.dia(1)).update(productos=Decimal("-5"))
+        RegistroFinanciero.objects.filter(fecha=self.dia(2)).update(alimento=Decimal("130"))
+
+    def test_hallazgos_estructurados_en_una_consulta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            hallazgos = list(iterar_hallazgos(tamanio_lote=2))
+
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(hallazgos, [
+            Hallazgo("valor_negativo", self.user.pk, self.dia(1), "productos", Decimal("0"), Decimal("-5")),
+            Hallazgo("sobrante_incoherente", self.user.pk, self.dia(1), "sobrante_monetario",
+                     Decimal("65"), Decimal("60")),
+            Hallazgo("gasto_supera_presupuesto", self.user.pk, self.dia(2), "gasto_total",
+                     Decimal("100"), Decimal("130")),
+            Hallazgo("sobrante_incoherente", self.user.pk, self.dia(2), "sobrante_monetario",
+                     Decimal("0"), Decimal("60")),
+        ])
+
+    def test_salida_jsonl_con_limite(self):
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command("verificar_finanzas", "--salida", "-", "--limite", "3", stdout=salida, stderr=errores)
+
+        lineas = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+        self.assertEqual(len(lineas), 3)
+        self.assertEqual(lineas[0], {
+            "codigo": "valor_negativo",
+            "user_id": self.user.pk,
+            "fecha": "2024-01-02",
+            "campo": "productos",
+            "esperado": "0",
+            "actual": "-5.00",
+        })
+        self.assertIn("4 hallazgos (3 escritos)", errores.getvalue())
+
+    def test_modo_texto(self):
+        with redirect_stdout(io.StringIO()) as salida:
+            encontrados = verificar_registros_financieros(limite=1)
+
+        self.assertEqual(encontrados, 4)
+        self.assertIn("[ana] productos negativo en 2024-01-02", salida.getvalue())
+        self.assertIn("... y 3 más", salida.getvalue())
+
+    def test_modo_texto_no_consulta_cada_usuario(self):
+        for nombre in ("beto", "carla"):
+            otro = User.objects.create_user(nombre, password="clave-segura-123")
+            RegistroFinanciero.objects.create(
+                user=otro, fecha=self.inicio, para_gastar_dia=Decimal("100"), alimento=Decimal("-1"),
+            )
+
+        with redirect_stdout(io.StringIO()) as salida, CaptureQueriesContext(connection) as consultas:
+            verificar_registros_financieros()
+
+        self.assertEqual(len(consultas), 1)
+        self.assertIn("[beto] alimento negativo en 2024-01-01", salida.getvalue())
+        self.assertIn("[carla] alimento negativo en 2024-01-01", salida.getvalue())
+
+
+@cache_de_pruebas
+class ReglasIntegridadTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.registros = [
+            RegistroFinanciero.objects.create(
+                user=self.user, fecha=date(2024, 1, 1) + timedelta(days=dia),
+                para_gastar_dia=Decimal("100"), alimento=Decimal("10"),
+            )
+            for dia in range(6)
+        ]
+        RegistroFinanciero.objects.filter(pk__in=[r.pk for r in self.registros[:3]]).update(
+            productos=Decimal("-1")
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE finanzas_registrofinanciero SET alimento = 10.555 WHERE id = %s",
+                [self.registros[5].pk],
+            )
+
+    def test_una_consulta_por_regla_con_total_y_muestra(self):
+        reglas = reglas_de()
+        with CaptureQueriesContext(connection) as consultas:
+            resultados = {r.nombre: r for r in diagnosticar_reglas(muestra=2)}
+
+        self.assertEqual(len(consultas), len(reglas))
+        negativos = resultados["valor_negativo_productos"]
+        self.assertEqual(negativos.total, 3)
+        self.assertEqual(negativos.muestra, [r.pk for r in self.registros[:2]])
+        self.assertEqual(resultados["decimales_de_mas_alimento"].total, 1)
+        self.assertEqual(resultados["sobrante_incoherente_sobrante_monetario"].total, 4)
+        self.assertEqual(resultados["duplicado_fecha"], ("duplicado_fecha", 0, []))
+
+    def test_diagnostico_cuenta_las_reglas_en_un_solo_aggregate(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = diagnosticar_registros(self.user)
+
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(resultado, {
+            "total_registros": 6,
+            "errores_detectados": 4,
+            "por_regla": {"valor_negativo_productos": 3, "decimales_de_mas_alimento": 1},
+        })
+
+    def test_errores_detectados_cuenta_infracciones_como_antes(self):
+        # Sobrante negativo: valor_negativo y sobrante_negativo, igual que el
+        # diagnóstico anterior al registro de reglas
+        RegistroFinanciero.objects.filter(pk=self.registros[0].pk).update(sobrante_monetario=Decimal("-1"))
+
+        resultado = diagnosticar_registros(self.user)
+
+        self.assertEqual(resultado["errores_detectados"], 6)
+        self.assertEqual(resultado["por_regla"]["valor_negativo_sobrante_monetario"], 1)
+        self.assertEqual(resultado["por_regla"]["sobrante_negativo_sobrante_monetario"], 1)
+
+    def test_agregar_una_regla_sin_codigo_extra(self):
+        regla = registrar_regla(
+            "presupuesto_cero", "para_gastar_dia",
+            lambda p: Q(**{p + "para_gastar_dia": 0}),
+        )
+        self.addCleanup(REGLAS.remove, regla)
+        RegistroFinanciero.objects.filter(pk=self.registros[4].pk).update(para_gastar_dia=0)
+
+        self.assertEqual(diagnosticar_registros(self.user)["errores_detectados"], 5)
+        codigos = [h.codigo for h in iterar_hallazgos()]
+        self.assertIn("presupuesto_cero", codigos)
+
+    def test_comando_por_regla(self):
+        salida = io.StringIO()
+        call_command("verificar_finanzas", "--por-regla", stdout=salida)
+
+        self.assertIn("valor_negativo_productos: 3 registros", salida.getvalue())
+        self.assertNotIn("duplicado_fecha", salida.getvalue())
+
+    def test_diagnostico_por_usuario_en_una_consulta(self):
+        otro = User.objects.create_user("beto", password="clave-segura-123")
+        User.objects.create_user("carla", password="clave-segura-123")
+        RegistroFinanciero.objects.create(user=otro, fecha=date(2024, 1, 1), para_gastar_dia=Decimal("5"))
+        RegistroFinanciero.objects.filter(user=otro).update(alimento=Decimal("-2"), productos=Decimal("-3"))
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultados = diagnosticar_por_usuario()
+
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(resultados, [
+            ("ana", diagnosticar_registros(self.user)),
+            ("beto", {
+                "total_registros": 1,
+                "errores_detectados": 2,
+                "por_regla": {"valor_negativo_alimento": 1, "valor_negativo_productos": 1},
+            }),
+            ("carla", {"total_registros": 0, "errores_detectados": 0, "por_regla": {}}),
+        ])
+
+        # En modo incremental solo aparecen los usuarios con cambios
+        self.assertEqual(diagnosticar_por_usuario(desde=timezone.now()), [])
+
+
+@cache_de_pruebas
+class ReparacionPorLotesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuarios = [
+            User.objects.create_user(nombre, password="clave-segura-123") for nombre in ("ana", "beto", "carla")
+        ]
+        for usuario in self.usuarios:
+            for dia in range(3):
+                RegistroFinanciero.objects.create(
+                    user=usuario, fecha=date(2024, 1, 1) + timedelta(days=dia),
+                    para_gastar_dia=Decimal("100"),
+                )
+        RegistroFinanciero.objects.update(alimento=Decimal("-1"))
+
+    def reparar(self, *argumentos):
+        salida = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command("reparar_finanzas", "--reparar", "--lote", "1", *argumentos, stdout=salida)
+        return salida.getvalue()
+
+    def negativos(self):
+        return RegistroFinanciero.objects.filter(alimento__lt=0).count()
+
+    def test_dry_run_calcula_el_plan_sin_guardar(self):
+        salida = self.reparar("--dry-run")
+
+        self.assertIn("valores_negativos_corregidos: 9", salida)
+        self.assertEqual(self.negativos(), 9)
+        self.assertFalse(MarcaVerificacion.objects.exists())
+        self.assertFalse(PuntoControl.objects.exists())
+
+    def test_progreso_por_lote(self):
+        salida = self.reparar()
+
+        self.assertIn("3/9 registros (33%)", salida)
+        self.assertIn("9/9 registros (100%)", salida)
+        self.assertIn("reg/s · ETA", salida)
+        self.assertEqual(self.negativos(), 0)
+        self.assertFalse(PuntoControl.objects.exists())
+
+    def test_reanudar_despues_de_un_corte(self):
+        from .utils import reparador_global
+
+        original = reparador_global.reparar_registros_financieros
+        llamadas = []
+
+        def falla_en_el_segundo_lote(**kwargs):
+            llamadas.append(kwargs["user_ids"])
+            if len(llamadas) == 2:
+                raise RuntimeError("corte")
+            return original(**kwargs)
+
+        with mock.patch.object(reparador_global, "reparar_registros_financieros", falla_en_el_segundo_lote):
+            with self.assertRaises(RuntimeError):
+                self.reparar()
+
+        # El primer lote quedó confirmado, el segundo se deshizo
+        punto = PuntoControl.objects.get(proceso="reparador")
+        self.assertEqual(punto.ultimo_user_id, self.usuarios[0].pk)
+        self.assertEqual(self.negativos(), 6)
+        self.assertIsNone(obtener_marca("reparador"))
+
+        salida = self.reparar("--reanudar")
+
+        self.assertIn(f"Reanudando después del usuario {self.usuarios[0].pk}", salida)
+        self.assertIn("usuarios_procesados: 2", salida)
+        self.assertEqual(self.negativos(), 0)
+        self.assertFalse(PuntoControl.objects.exists())
+        self.assertEqual(obtener_marca("reparador"), punto.iniciado)
+
+    def test_perfilado_por_fases(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            perfil = os.path.join(carpeta, "reparar.prof")
+            memoria = os.path.join(carpeta, "reparar.memoria")
+
+            salida = self.reparar("--profile", perfil, "--trace-memory", memoria, "--top", "3")
+
+            self.assertTrue(os.path.getsize(perfil))
+            self.assertTrue(os.path.getsize(memoria))
+
+        self.assertIn("=== Funciones más costosas", salida)
+        self.assertIn("=== Memoria (pico", salida)
+        self.assertIn("=== Consultas SQL por fase ===", salida)
+        for nombre in ("diagnostico", "fechas", "duplicados", "decimales", "negativos", "sobrante", "resumen"):
+            self.assertRegex(salida, rf"\n  {nombre} +[1-9]")
+
+
+@cache_de_pruebas
+@skipUnless(connection.vendor == "sqlite", "Usa una base SQLite en archivo")
+class ReparacionParalelaTests(TransactionTestCase):
+    """
+    --jobs > 1 con procesos reales. Los workers abren su propia conexión,
+    así que la base de prueba en memoria no les sirve: se usa una base
+    SQLite en un archivo temporal, migrada para la prueba.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.original = connections["default"]
+        self.archivo = DatabaseWrapper(
+            {**self.original.settings_dict, "NAME": os.path.join(self.carpeta.name, "paralelo.sqlite3")},
+            alias="default",
+        )
+        connections["default"] = self.archivo
+        call_command("migrate", verbosity=0)
+
+        self.usuarios = [
+            User.objects.create_user(nombre, password="clave-segura-123") for nombre in ("ana", "beto", "carla")
+        ]
+        for usuario in self.usuarios:
+            for dia in range(3):
+                RegistroFinanciero.objects.create(
+                    user=usuario, fecha=date(2024, 1, 1) + timedelta(days=dia),
+                    para_gastar_dia=Decimal("100"),
+                )
+        RegistroFinanciero.objects.update(alimento=Decimal("-1"))
+        # Un duplicado sin negativos en el último usuario: gana por mayor suma
+        RegistroFinanciero.objects.create(
+            user=self.usuarios[-1], fecha=date(2024, 1, 1), para_gastar_dia=Decimal("100"),
+        )
+
+    def tearDown(self):
+        self.archivo.close()
+        connections["default"] = self.original
+        self.carpeta.cleanup()
+
+    def test_jobs_repara_en_varios_procesos_y_suma_los_resultados(self):
+        salida = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command("reparar_finanzas", "--reparar", "--jobs", "2", "--lote", "1", stdout=salida)
+        salida = salida.getvalue()
+
+        self.assertIn("usuarios_procesados: 3", salida)
+        self.assertIn("total_registros: 10", salida)
+        self.assertIn("duplicados_eliminados: 1", salida)
+        self.assertIn("valores_negativos_corregidos: 8", salida)
+        self.assertIn("3/10 registros", salida)
+        self.assertIn("10/10 registros (100%)", salida)
+
+        self.assertFalse(RegistroFinanciero.objects.filter(alimento__lt=0).exists())
+        self.assertEqual(RegistroFinanciero.objects.count(), 9)
+        self.assertFalse(
+            RegistroFinanciero.objects.exclude(sobrante_monetario=F("para_gastar_dia") - F("alimento")).exists()
+        )
+        self.assertEqual(reconstruir_resumenes(aplicar=False), [])
+        self.assertFalse(PuntoControl.objects.exists())
+        self.assertIsNotNone(obtener_marca("reparador"))
+
+
+@cache_de_pruebas
+class CalculoSobranteTests(TestCase):
+
+    def columnas(self):
+        return (
+            [10000, 5000, 0, 1999],
+            [2500, 6000, 0, 1000],
+            [500, 0, 0, 0],
+            [1000, 0, 100, 999],
+        )
+
+    def test_calculo_individual(self):
+        self.assertEqual(calcular_sobrante(Decimal("100"), Decimal("25"), Decimal("5"), Decimal("10")), Decimal("60"))
+        self.assertEqual(calcular_sobrante(50, 60, 0, 0), Decimal("0.00"))
+        self.assertEqual(calcular_sobrante(0.3, 0.1, 0.1, 0.1), Decimal("0.0"))
+        self.assertEqual(calcular_sobrante("abc", 1, 1, 1), Decimal("0.00"))
+        self.assertEqual(calcular_sobrante(None, 1, 1, 1), Decimal("0.00"))
+
+    def test_centavos(self):
+        self.assertEqual(a_centavos(Decimal("12.345")), 1235)
+        self.assertEqual(a_centavos("7"), 700)
+        self.assertEqual(de_centavos(1235), Decimal("12.35"))
+
+    def test_columnas_sin_numpy(self):
+        with mock.patch.object(calculadora, "np", None):
+            self.assertEqual(calcular_sobrantes(*self.columnas()), [6000, 0, 0, 0])
+
+    @skipUnless(calculadora.np is not None, "NumPy no está instalado")
+    def test_columnas_con_numpy(self):
+        self.assertEqual(list(calcular_sobrantes(*self.columnas())), [6000, 0, 0, 0])
+
+    def test_misma_regla_que_el_calculo_individual(self):
+        filas = [
+            (Decimal("100"), Decimal("33.33"), Decimal("0"), Decimal("12.5")),
+            (Decimal("10"), Decimal("20"), Decimal("0"), Decimal("0")),
+            (Decimal("0.99"), Decimal("0.01"), Decimal("0.01"), Decimal("0.01")),
+        ]
+        columnas = [[a_centavos(fila[i]) for fila in filas] for i in range(4)]
+
+        self.assertEqual(
+            [de_centavos(c) for c in calcular_sobrantes(*columnas)],
+            [calcular_sobrante(*fila) for fila in filas],
+        )
+
+    def test_recalcular_instancias(self):
+        normal = RegistroFinanciero(para_gastar_dia=Decimal("80"), alimento=Decimal("30"))
+        fijo = RegistroFinanciero(para_gastar_dia=Decimal("80"), sobrante_fijo=True, sobrante_monetario=Decimal("7"))
+
+        self.assertEqual(recalcular_sobrantes([normal, fijo]), [normal])
+        self.assertEqual(normal.sobrante_monetario, Decimal("50.00"))
+        self.assertEqual(fijo.sobrante_monetario, Decimal("7"))
+
+
+@cache_de_pruebas
+class DineroTests(TestCase):
+
+    def test_leer_montos_con_separadores(self):
+        casos = {
+            "1.200,50": "1200.50",
+            "1,200.50": "1200.50",
+            "1,200": "1200.00",
+            "1.200": "1200.00",
+            "12.345.678": "12345678.00",
+            "12,5": "12.50",
+            "0,500": "0.50",
+            " $ 99.999 ": "99999.00",
+            "-3,10": "-3.10",
+            "10.555": "10555.00",
+            "10.5551": "10.56",
+        }
+        for texto, esperado in casos.items():
+            with self.subTest(texto=texto):
+                self.assertEqual(leer_monto(texto), Decimal(esperado))
+
+        self.assertEqual(leer_monto(0.1 + 0.2), Decimal("0.30"))
+        self.assertEqual(leer_monto(Decimal("2.675")), Decimal("2.68"))
+
+    def test_montos_invalidos(self):
+        for valor in ("abc", "1,2,3", "-", "NaN", None, True):
+            with self.subTest(valor=valor):
+                with self.assertRaises(InvalidOperation):
+                    leer_monto(valor)
+
+        self.assertEqual(parsear_monto("", Decimal("5")), Decimal("5"))
+        self.assertEqual(parsear_monto("abc"), Decimal("0"))
+
+    def test_editar_registro_sin_float(self):
+        user = User.objects.create_user("ana", password="clave-segura-123")
+        registro = RegistroFinanciero.objects.create(user=user, fecha=date.today(), para_gastar_dia=Decimal("100"))
+        self.client.force_login(user)
+
+        self.client.post(
+            reverse("finanzas:editar_registro", args=[registro.pk]),
+            {"para_gastar_dia": "1.200,50", "alimento": "0,1", "productos": "0,2", "ahorro_y_deuda": ""},
+        )
+
+        registro.refresh_from_db()
+        self.assertEqual(registro.para_gastar_dia, Decimal("1200.50"))
+        self.assertEqual(registro.sobrante_monetario, Decimal("1200.20"))
+
+    def test_reparar_no_vuelve_a_corregir_sobrantes(self):
+        user = User.objects.create_user("ana", password="clave-segura-123")
+        RegistroFinanciero.objects.create(
+            user=user, fecha=date.today(), para_gastar_dia=Decimal("10.10"), alimento=Decimal("3.30"),
+        )
+        RegistroFinanciero.objects.create(
+            user=user, fecha=date.today() - timedelta(days=1), para_gastar_dia=Decimal("5"), alimento=Decimal("9"),
+        )
+
+        with redirect_stdout(io.StringIO()):
+            resultado = reparar_registros_financieros(usuario=user)
+            hallazgos = list(iterar_hallazgos())
+
+        self.assertEqual(resultado["sobrantes_recalculados"], 0)
+        self.assertNotIn("sobrante_incoherente", [h.codigo for h in hallazgos])
+
+
+@cache_de_pruebas
+class IndicadoresTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        for i, (p, ad) in enumerate([("100", "10.50"), ("80", "0"), ("50", "70")]):
+            RegistroFinanciero.objects.create(
+                user=self.user, fecha=date.today() - timedelta(days=i),
+                para_gastar_dia=Decimal(p), alimento=Decimal("20"), ahorro_y_deuda=Decimal(ad),
+            )
+        self.registros = RegistroFinanciero.objects.filter(user=self.user)
+
+    def test_varios_indicadores_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            en_base = FactoryIndicadores.calcular(["sobrante", "tad"], self.registros)
+
+        self.assertEqual(en_base, {"sobrante": Decimal("129.50"), "tad": Decimal("80.50")})
+        self.assertEqual(FactoryIndicadores.calcular(["sobrante", "tad"], list(self.registros)), en_base)
+
+    def test_sin_registros(self):
+        vacio = RegistroFinanciero.objects.none()
+        self.assertEqual(FactoryIndicadores.calcular(["sobrante"], vacio), {"sobrante": Decimal("0")})
+        self.assertEqual(FactoryIndicadores.calcular(["tad"], []), {"tad": Decimal("0")})
+
+    def test_estrategia_sin_expresion_usa_python(self):
+        class DiasStrategy(IndicadorStrategy):
+            def calcular(self, registros):
+                return len(registros)
+
+        with mock.patch.dict(FactoryIndicadores._estrategias, {"dias": DiasStrategy()}):
+            with self.assertNumQueries(2):
+                resultado = FactoryIndicadores.calcular(["dias", "tad"], self.registros)
+
+        self.assertEqual(resultado, {"dias": 3, "tad": Decimal("80.50")})
+
+
+@cache_de_pruebas
+class TendenciaFinancieraTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.hoy = date.today()
+
+    def crear(self, dias_atras, gasto, presupuesto="100"):
+        return RegistroFinanciero.objects.create(
+            user=self.user,
+            fecha=self.hoy - timedelta(days=dias_atras),
+            para_gastar_dia=Decimal(presupuesto),
+            alimento=Decimal(gasto),
+        )
+
+    def assertCoincideConRecalculo(self):
+        tendencia = TendenciaFinanciera.objects.get(user=self.user)
+        esperado = {**calcular_ventanas(self.user.pk, self.hoy), **calcular_rachas(self.user.pk)}
+        self.assertEqual({campo: getattr(tendencia, campo) for campo in esperado}, esperado)
+        return tendencia
+
+    def test_deltas_igual_que_recalcular(self):
+        for dias_atras, gasto in [(40, "80"), (20, "150"), (6, "10"), (5, "20"), (4, "15"), (3, "200"), (2, "30"), (1, "40")]:
+            self.crear(dias_atras, gasto)
+        hoy = self.crear(0, "50")
+        tendencia = self.assertCoincideConRecalculo()
+        self.assertEqual((tendencia.racha_actual, tendencia.racha_maxima), (3, 3))
+        self.assertEqual(tendencia.promedio_gasto_7, Decimal("52.14"))
+
+        # Excederse hoy corta la racha actual
+        hoy.alimento = Decimal("120")
+        hoy.save()
+        self.assertEqual(self.assertCoincideConRecalculo().racha_actual, 0)
+
+        # Arreglar un día pasado une dos rachas
+        pasado = RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy - timedelta(days=3))
+        pasado.alimento = Decimal("90")
+        pasado.save()
+        self.assertEqual(self.assertCoincideConRecalculo().racha_maxima, 6)
+
+        pasado.delete()
+        RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy - timedelta(days=20)).delete()
+        self.assertCoincideConRecalculo()
+
+    def test_editar_un_dia_no_depende_del_historial(self):
+        def consultas_al_editar(dias_atras):
+            registro = RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy - timedelta(days=dias_atras))
+            registro.alimento += 1
+            with CaptureQueriesContext(connection) as consultas:
+                registro.save()
+            return len(consultas)
+
+        for dias_atras in range(1, 11):
+            self.crear(dias_atras, "10")
+        pocos = consultas_al_editar(1)
+
+        for dias_atras in range(11, 201):
+            self.crear(dias_atras, "10")
+        self.assertEqual(consultas_al_editar(1), pocos)
+        self.assertEqual(consultas_al_editar(150), pocos)
+        self.assertCoincideConRecalculo()
+
+    def test_editar_dentro_de_una_racha_no_recorre_el_historial(self):
+        # Racha máxima de 10 días (30..21 atrás), corte, y la actual de 9 (19..11)
+        for dias_atras in range(11, 31):
+            self.crear(dias_atras, "150" if dias_atras == 20 else "50")
+        self.assertEqual(self.assertCoincideConRecalculo().racha_actual, 9)
+
+        def editar(dias_atras, gasto):
+            registro = RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy - timedelta(days=dias_atras))
+            registro.alimento = Decimal(gasto)
+            registro.save()
+            return self.assertCoincideConRecalculo()
+
+        with mock.patch("finanzas.resumen.tendencias.calcular_rachas") as recalculo:
+            self.assertEqual(editar(15, "150").racha_actual, 4)
+            self.assertEqual(editar(15, "50").racha_actual, 9)
+            RegistroFinanciero.objects.get(user=self.user, fecha=self.hoy - timedelta(days=17)).delete()
+            self.assertEqual(self.assertCoincideConRecalculo().racha_actual, 6)
+            self.crear(17, "50")
+            tendencia = editar(20, "50")
+        recalculo.assert_not_called()
+        self.assertEqual((tendencia.racha_actual, tendencia.racha_maxima), (20, 20))
+
+        # Partir la única racha de largo máximo sí necesita el historial
+        editar(25, "150")
+
+    def test_reconstruir_resumenes_guarda_las_tendencias(self):
+        for dias_atras in range(5):
+            self.crear(dias_atras, "50")
+        RegistroFinanciero.objects.filter(user=self.user).update(alimento=Decimal("70"))
+
+        reconstruir_resumenes()
+
+        self.assertEqual(self.assertCoincideConRecalculo().racha_maxima, 5)
+        with mock.patch("finanzas.resumen.tendencias.calcular_rachas") as recalculo:
+            obtener_tendencia(self.user)
+        recalculo.assert_not_called()
+
+    def test_cambio_de_dia_recalcula_solo_las_ventanas_sin_escribir(self):
+        self.crear(7, "70")
+        self.crear(0, "10")
+        TendenciaFinanciera.objects.filter(user=self.user).update(
+            fecha_referencia=self.hoy - timedelta(days=1), gasto_7=Decimal("999"),
+        )
+
+        with CaptureQueriesContext(connection) as consultas:
+            tendencia = obtener_tendencia(self.user)
+
+        self.assertFalse([q for q in consultas.captured_queries if q["sql"].startswith("UPDATE")])
+        self.assertEqual(tendencia.fecha_referencia, self.hoy)
+        self.assertEqual((tendencia.gasto_7, tendencia.dias_7), (Decimal("10"), 1))
+        self.assertEqual(tendencia.gasto_30, Decimal("80"))
+
+    def test_estrategias_en_base_y_en_python(self):
+        for dias_atras, gasto in [(45, "60"), (10, "120"), (1, "30"), (0, "20")]:
+            self.crear(dias_atras, gasto)
+        RegistroFinanciero.objects.filter(user=self.user).update(ahorro_y_deuda=Decimal("5"))
+        registros = RegistroFinanciero.objects.filter(user=self.user)
+        tipos = ["gasto_7", "gasto_30", "gasto_90", "racha", "ahorro_promedio"]
+
+        en_base = FactoryIndicadores.calcular(tipos, registros)
+
+        self.assertEqual(en_base, FactoryIndicadores.calcular(tipos, list(registros)))
+        self.assertEqual(en_base["gasto_7"], Decimal("30.00"))
+        self.assertEqual(en_base["gasto_30"], Decimal("61.67"))
+        self.assertEqual(en_base["racha"], 2)
+        self.assertEqual(en_base["ahorro_promedio"], Decimal("5.00"))
+
+
+@cache_de_pruebas
+class IndicadoresMemorizadosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        cache_indicadores.limpiar_memoria()
+        cache_indicadores.reiniciar_estadisticas()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.registro = RegistroFinanciero.objects.create(
+            user=self.user, fecha=date.today(), para_gastar_dia=Decimal("100"), alimento=Decimal("40"),
+        )
+
+    def test_segunda_consulta_es_un_acierto(self):
+        with self.assertNumQueries(1):
+            primera = indicadores_usuario(self.user.pk, ["sobrante", "tad"])
+        with self.assertNumQueries(0):
+            segunda = indicadores_usuario(self.user.pk, ["sobrante", "tad"])
+
+        self.assertEqual(primera, segunda)
+        self.assertEqual(primera["sobrante"], Decimal("60"))
+        self.assertEqual(estadisticas()["aciertos_memoria"], 2)
+        self.assertEqual(estadisticas()["fallos"], 2)
+
+    def test_escritura_y_periodo_cambian_la_clave(self):
+        indicadores_usuario(self.user.pk, ["sobrante"])
+        indicadores_usuario(self.user.pk, ["sobrante"], desde=date.today() - timedelta(days=7))
+        self.assertEqual(estadisticas()["fallos"], 2)
+
+        self.registro.alimento = Decimal("90")
+        self.registro.save()
+        self.assertEqual(indicadores_usuario(self.user.pk, ["sobrante"])["sobrante"], Decimal("10"))
+        self.assertEqual(estadisticas()["fallos"], 3)
+
+    @override_settings(FINANZAS_INDICADORES_CACHE_COMPARTIDA=True)
+    def test_nivel_compartido(self):
+        indicadores_usuario(self.user.pk, ["tad"])
+        cache_indicadores.limpiar_memoria()
+
+        with self.assertNumQueries(0):
+            indicadores_usuario(self.user.pk, ["tad"])
+        self.assertEqual(estadisticas()["aciertos_compartida"], 1)
+
+    def test_version_cambiada_por_otro_proceso_invalida_la_memoria(self):
+        indicadores_usuario(self.user.pk, ["sobrante"])
+        # Otro proceso abre su propia instancia de la misma caché y escribe
+        otra = FileBasedCache(DIRECTORIO_CACHE, {})
+        otra.incr(f"finanzas:version:{self.user.pk}")
+        RegistroFinanciero.objects.filter(pk=self.registro.pk).update(sobrante_monetario=Decimal("10"))
+
+        self.assertEqual(indicadores_usuario(self.user.pk, ["sobrante"])["sobrante"], Decimal("10"))
+        self.assertEqual(estadisticas()["aciertos_memoria"], 0)
+        self.assertEqual(estadisticas()["fallos"], 2)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_cache_propia_del_proceso_no_memoriza(self):
+        indicadores_usuario(self.user.pk, ["sobrante", "tad"])
+        with self.assertNumQueries(1):
+            indicadores_usuario(self.user.pk, ["sobrante", "tad"])
+
+        self.assertEqual(estadisticas()["aciertos_memoria"], 0)
+        self.assertEqual(estadisticas()["entradas_memoria"], 0)
+
+    def test_lru_descarta_la_menos_usada(self):
+        lru = MemoriaLRU(2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(len(lru), 2)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual((lru.get("a"), lru.get("c")), (1, 3))
+
+    def test_tamanio_se_lee_de_la_configuracion_actual(self):
+        lru = MemoriaLRU()
+        with override_settings(FINANZAS_INDICADORES_LRU=1):
+            lru.set("a", 1)
+            lru.set("b", 2)
+
+        self.assertEqual(len(lru), 1)
+        self.assertIsNone(lru.get("a"))
+
+
+@cache_de_pruebas
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN es propio de SQLite")
+class PlanesDeConsultaTests(TestCase):
+    """
+    Corre las rutas calientes de finanzas y revisa el plan de cada consulta
+    sobre RegistroFinanciero: ninguna debe recorrer la tabla completa ni
+    ordenar con un B-tree temporal.
+    """
+
+    RECORRIDO_COMPLETO = re.compile(r"^SCAN (TABLE )?(finanzas_registrofinanciero|U\d+)\b")
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("ana", password="clave-segura-123")
+        self.otro = User.objects.create_user("beto", password="clave-segura-123")
+        self.hoy = date.today()
+        self.inicio = self.hoy - timedelta(days=60)
+        ConfigFinanciera.objects.filter(user=self.user).update(fecha_inicio_registros=self.inicio)
+        for user in (self.user, self.otro):
+            for dias_atras in range(0, 60, 3):
+                RegistroFinanciero.objects.create(
+                    user=user,
+                    fecha=self.hoy - timedelta(days=dias_atras),
+                    para_gastar_dia=Decimal("100"),
+                    alimento=Decimal("20"),
+                    completado=dias_atras % 2 == 0,
+                )
+        self.client.force_login(self.user)
+
+    def planes(self, funcion):
+        with CaptureQueriesContext(connection) as consultas:
+            funcion()
+
+        planes = []
+        for consulta in consultas.captured_queries:
+            sql = consulta["sql"]
+            if not sql.startswith(("SELECT", "DELETE")) or "finanzas_registrofinanciero" not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                planes.append((sql, [fila[-1] for fila in cursor.fetchall()]))
+        self.assertTrue(planes, "La ruta no consultó RegistroFinanciero")
+        return planes
+
+    def assertUsaIndices(self, funcion):
+        for sql, detalles in self.planes(funcion):
+            problemas = [
+                detalle for detalle in detalles
+                if self.RECORRIDO_COMPLETO.match(detalle) or "TEMP B-TREE" in detalle
+            ]
+            self.assertEqual(problemas, [], f"{sql}\n" + "\n".join(detalles))
+
+    def test_indice_de_pendientes(self):
+        self.assertUsaIndices(lambda: indice_pendientes(self.user, self.inicio))
+
+    def test_dashboard(self):
+        self.assertUsaIndices(lambda: self.client.get(reverse("finanzas:dashboard")))
+
+    def test_lista_de_registros(self):
+        self.assertUsaIndices(lambda: self.client.get(reverse("finanzas:registros")))
+
+    def test_registros_recientes(self):
+        self.assertUsaIndices(
+            lambda: self.client.get(reverse("finanzas:registros_recientes"), {"antes": self.hoy.isoformat()})
+        )
+
+    def test_rangos_del_calendario(self):
+        self.assertUsaIndices(lambda: grilla_mes(self.user, self.hoy.year, self.hoy.month))
+        self.assertUsaIndices(lambda: self.client.get(reverse("finanzas:registros_dias")))
+
+    def test_completar_un_dia(self):
+        fecha = (self.hoy - timedelta(days=3)).isoformat()
+        self.assertUsaIndices(lambda: self.client.get(reverse("finanzas:completar_pendiente_por_fecha", args=[fecha])))
+
+    def test_limpieza_de_dias_pendientes(self):
+        config = ConfigFinanciera.objects.get(user=self.user)
+        self.assertUsaIndices(lambda: eliminar_dias_sin_datos(self.user, config))
+
+    def test_tendencias_y_rachas(self):
+        self.assertUsaIndices(lambda: reconstruir_tendencia(self.user.pk))
+        self.assertUsaIndices(lambda: reconstruir_tendencias([self.user.pk]))
@@ -10,6 +10,7 @@ from .views.calendario_views import configurar_calendario
 from .views.registros_views.lista_registros import RegistroListView
 from .views.registros_views.crear_registro import RegistroCreateView
 from .views.registros_views.editar_registro import editar_registro
+from .views.registros_views.recientes import registros_recientes
 
 # PENDIENTES (flujo correcto)
 from .views.registros_views.completar_pendientes import (
@@ -39,6 +40,7 @@ urlpatterns = [
     path("registros/", RegistroListView.as_view(), name="registros"),
     path("registros/nuevo/", RegistroCreateView.as_view(), name="crear_registro"),
     path("registros/editar/<int:pk>/", editar_registro, name="editar_registro"),
+    path("registros/recientes/", registros_recientes, name="registros_recientes"),
 
     # ======================
     #     DÍAS
@@ -1,11 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+
 from finanzas.models import RegistroFinanciero
-from django.utils.timezone import now
+from finanzas.utils.reglas import conteos_por_regla, reglas_de
+
+User = get_user_model()
 
 
-def diagnosticar_registros(usuario=None):
+def _resultado(total, conteos):
+    return {
+        "total_registros": total,
+        "errores_detectados": sum(conteos.values()),
+        "por_regla": {nombre: cantidad for nombre, cantidad in conteos.items() if cantidad},
+    }
+
+
+def diagnosticar_registros(usuario=None, desde=None):
     """
     Diagnóstico de registros financieros.
     Retorna cantidad total de registros y errores detectados.
+    Con `desde` solo revisa los registros modificados desde ese momento.
+
+    Los chequeos son las reglas del grupo "diagnostico"
+    (finanzas.utils.reglas), contadas en un único aggregate().
+    errores_detectados cuenta infracciones, no registros: una fila con
+    dos campos negativos suma 2, como antes del registro de reglas.
+    "por_regla" desglosa ese total (solo las reglas con infracciones).
     """
 
     if usuario:
@@ -13,44 +33,44 @@ def diagnosticar_registros(usuario=None):
     else:
         registros = RegistroFinanciero.objects.all()
 
-    hoy = now().date()
-    errores = 0
-
-    # Campos numéricos reales del modelo
-    campos_monetarios = [
-        "alimento",
-        "productos",
-        "ahorro_y_deuda",
-        "para_gastar_dia",
-        "sobrante_monetario",
-    ]
-
-    for reg in registros:
+    if desde is not None:
+        registros = registros.filter(modificado__gte=desde)
 
-        # 1) Fecha inválida
-        if reg.fecha > hoy or reg.fecha.year < 2000:
-            errores += 1
+    conteos = registros.aggregate(
+        total_registros=Count("pk"),
+        **conteos_por_regla(reglas_de("diagnostico")),
+    )
+    total = conteos.pop("total_registros")
 
-        # 2) Revisar cada campo monetario
-        for campo in campos_monetarios:
-            valor = getattr(reg, campo, None)
+    return _resultado(total, conteos)
 
-            if valor is None:
-                continue
 
-            # Valores negativos
-            if valor < 0:
-                errores += 1
-
-            # Más de dos decimales
-            if round(valor, 2) != valor:
-                errores += 1
+def diagnosticar_por_usuario(desde=None):
+    """
+    Diagnóstico de todos los usuarios en una sola consulta agrupada:
+    un Count condicional por regla sobre el JOIN User → registros.
+    Devuelve [(username, {"total_registros", "errores_detectados",
+    "por_regla"})] en orden de usuario, con los mismos conteos que
+    diagnosticar_registros. Con `desde` solo cuenta los registros
+    modificados desde ese momento y omite a los usuarios sin cambios.
+    """
+    p = "registrofinanciero__"
+    filtro = Q(**{p + "modificado__gte": desde}) if desde is not None else Q()
+    conteos = conteos_por_regla(reglas_de("diagnostico"), p=p, filtro=filtro)
 
-        # 3) Sobrante negativo
-        if reg.sobrante_monetario < 0:
-            errores += 1
+    usuarios = (
+        User.objects
+        .order_by("pk")
+        .annotate(total_registros=Count(p + "pk", filter=filtro), **conteos)
+        .values("username", "total_registros", *conteos)
+    )
+    if desde is not None:
+        usuarios = usuarios.filter(total_registros__gt=0)
 
-    return {
-        "total_registros": registros.count(),
-        "errores_detectados": errores,
-    }
\ No newline at end of file
+    return [
+        (
+            fila["username"],
+            _resultado(fila["total_registros"], {nombre: fila[nombre] for nombre in conteos}),
+        )
+        for fila in usuarios
+    ]
@@ -0,0 +1,112 @@
+from argparse import ArgumentTypeError
+from contextlib import contextmanager
+from datetime import datetime, time
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models import MarcaVerificacion, PuntoControl, RegistroFinanciero
+
+User = get_user_model()
+
+
+# -----------------------------------------------------
+# Lectura y escritura de la marca
+# -----------------------------------------------------
+def obtener_marca(proceso):
+    """Momento de la última ejecución exitosa de `proceso` (o None)."""
+    return (
+        MarcaVerificacion.objects
+        .filter(proceso=proceso)
+        .values_list("marca", flat=True)
+        .first()
+    )
+
+
+def guardar_marca(proceso, momento):
+    MarcaVerificacion.objects.update_or_create(proceso=proceso, defaults={"marca": momento})
+
+
+def parsear_desde(valor):
+    """
+    Convierte el argumento --desde (fecha o fecha y hora ISO 8601)
+    en un datetime con zona horaria.
+    """
+    try:
+        momento = parse_datetime(valor)
+        if momento is None:
+            fecha = parse_date(valor)
+            momento = datetime.combine(fecha, time.min) if fecha else None
+    except ValueError:
+        momento = None
+
+    if momento is None:
+        raise ArgumentTypeError(f"Fecha inválida: {valor!r}")
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+@contextmanager
+def ejecucion_incremental(proceso, desde=None, incremental=False, inicio=None, guardar=True):
+    """
+    Entrega el `desde` a usar en la ejecución: el indicado, la marca
+    guardada (si `incremental`) o None para revisar todo.
+
+    La marca nueva es el momento en que empezó la ejecución (o `inicio`,
+    al reanudar una ejecución cortada), así lo que se modifique mientras
+    corre vuelve a revisarse la próxima vez. Solo se guarda si el bloque
+    termina sin errores y `guardar` es verdadero.
+    """
+    inicio = inicio or timezone.now()
+    if desde is None and incremental:
+        desde = obtener_marca(proceso)
+
+    yield desde
+
+    if guardar:
+        guardar_marca(proceso, inicio)
+
+
+# -----------------------------------------------------
+# Punto de control de ejecuciones por lotes
+# -----------------------------------------------------
+def obtener_punto_control(proceso):
+    return PuntoControl.objects.filter(proceso=proceso).first()
+
+
+def iniciar_punto_control(proceso, iniciado, desde=None, ultimo_user_id=0):
+    punto, _ = PuntoControl.objects.update_or_create(
+        proceso=proceso,
+        defaults={"iniciado": iniciado, "desde": desde, "ultimo_user_id": ultimo_user_id},
+    )
+    return punto
+
+
+def avanzar_punto_control(proceso, ultimo_user_id):
+    PuntoControl.objects.filter(proceso=proceso).update(ultimo_user_id=ultimo_user_id)
+
+
+def borrar_punto_control(proceso):
+    PuntoControl.objects.filter(proceso=proceso).delete()
+
+
+# -----------------------------------------------------
+# Filtros por fecha de modificación
+# -----------------------------------------------------
+def modificados_desde(registros, desde):
+    """Restringe el queryset a los registros tocados desde `desde`."""
+    if desde is None:
+        return registros
+    return registros.filter(modificado__gte=desde)
+
+
+def usuarios_con_cambios(desde):
+    """Usuarios con algún registro modificado desde `desde` (todos si es None)."""
+    usuarios = User.objects.order_by("pk")
+    if desde is None:
+        return usuarios
+    return usuarios.filter(
+        pk__in=RegistroFinanciero.objects.filter(modificado__gte=desde).values("user_id")
+    )
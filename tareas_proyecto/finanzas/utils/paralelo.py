@@ -0,0 +1,69 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.db import connection, connections
+
+
+# Máximo de usuarios por partición (mantiene los IN (...) acotados)
+MAX_USUARIOS_POR_PARTICION = 500
+
+# Lock compartido entre procesos; solo se usa con SQLite
+_bloqueo = None
+
+
+# -----------------------------------------------------
+# Inicialización de cada proceso
+# -----------------------------------------------------
+def _iniciar_worker(bloqueo):
+    global _bloqueo
+    import django
+
+    django.setup()
+    # Cada proceso abre su propia conexión a la base de datos
+    connections.close_all()
+    _bloqueo = bloqueo
+
+
+def bloqueo_escritura():
+    """
+    Context manager que serializa el trabajo de los procesos cuando la
+    base es SQLite (un único escritor): ahí --jobs no reparte escrituras
+    en paralelo. En otros motores no bloquea.
+    """
+    return _bloqueo if _bloqueo is not None else nullcontext()
+
+
+# -----------------------------------------------------
+# Ejecución en paralelo
+# -----------------------------------------------------
+def ejecutar_en_paralelo(funcion, particiones, jobs):
+    """
+    Ejecuta `funcion(particion)` en un pool de `jobs` procesos y va
+    entregando los resultados en el mismo orden que las particiones.
+    `funcion` debe estar definida a nivel de módulo (se serializa con pickle).
+
+    Mientras se recorren los resultados, bloqueo_escritura() también
+    protege las escrituras del proceso principal.
+    """
+    global _bloqueo
+
+    # No compartir la conexión del proceso padre con los hijos
+    es_sqlite = connection.vendor == "sqlite"
+    connections.close_all()
+
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context("fork" if "fork" in metodos else None)
+    bloqueo = contexto.Lock() if es_sqlite else None
+
+    anterior, _bloqueo = _bloqueo, bloqueo
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=contexto,
+            initializer=_iniciar_worker,
+            initargs=(bloqueo,),
+        ) as pool:
+            yield from pool.map(funcion, particiones)
+    finally:
+        _bloqueo = anterior
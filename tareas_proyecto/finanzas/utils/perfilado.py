@@ -0,0 +1,164 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+# Mediciones por fase mientras hay un perfilado activo (None = apagado)
+_fases = None
+
+# Asignaciones del propio perfilado que no interesan en el informe
+FILTROS_MEMORIA = [
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+]
+
+
+# -----------------------------------------------------
+# Opciones de los comandos
+# -----------------------------------------------------
+def agregar_opciones_perfilado(parser, comando):
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=f"{comando}.prof",
+        metavar="ARCHIVO",
+        help=f"Perfila con cProfile y guarda las estadísticas (por defecto {comando}.prof).",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        nargs="?",
+        const=f"{comando}.memoria",
+        metavar="ARCHIVO",
+        help=f"Mide la memoria con tracemalloc y guarda el snapshot (por defecto {comando}.memoria).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=15,
+        help="Cantidad de funciones y puntos de memoria a mostrar (por defecto 15).",
+    )
+
+
+def perfilar_comando(comando, options, salida=None):
+    """perfilar() con las opciones --profile / --trace-memory / --top del comando."""
+    return perfilar(
+        salida or comando.stdout,
+        perfil=options["profile"],
+        memoria=options["trace_memory"],
+        top=options["top"],
+    )
+
+
+# -----------------------------------------------------
+# Fases del proceso
+# -----------------------------------------------------
+@contextmanager
+def fase(nombre):
+    """
+    Marca una fase (fechas, duplicados, sobrante...) para contar sus
+    consultas SQL y su tiempo. Sin un perfilar() activo no hace nada.
+    """
+    if _fases is None:
+        yield
+        return
+
+    datos = _fases.setdefault(nombre, {"consultas": 0, "tiempo_sql": 0.0, "tiempo": 0.0})
+
+    def medir_consulta(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            datos["consultas"] += 1
+            datos["tiempo_sql"] += time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    try:
+        with connection.execute_wrapper(medir_consulta):
+            yield
+    finally:
+        datos["tiempo"] += time.perf_counter() - inicio
+
+
+# -----------------------------------------------------
+# Perfilado completo de una ejecución
+# -----------------------------------------------------
+@contextmanager
+def perfilar(salida, perfil=None, memoria=None, top=15):
+    """
+    Envuelve una ejecución en cProfile (`perfil`: archivo .prof) y/o
+    tracemalloc (`memoria`: archivo de snapshot). Al terminar guarda
+    los archivos y escribe en `salida` las funciones más costosas, los
+    puntos con más memoria asignada y las consultas SQL por fase.
+    Sin `perfil` ni `memoria` no mide nada.
+    """
+    global _fases
+
+    if not perfil and not memoria:
+        yield
+        return
+
+    perfilador = cProfile.Profile() if perfil else None
+    if memoria:
+        tracemalloc.start()
+    _fases = {}
+
+    try:
+        if perfilador:
+            perfilador.enable()
+        yield
+    finally:
+        if perfilador:
+            perfilador.disable()
+        fases, _fases = _fases, None
+
+        # La foto de memoria se toma antes de armar los informes
+        if memoria:
+            snapshot = tracemalloc.take_snapshot().filter_traces(FILTROS_MEMORIA)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        if perfilador:
+            _informar_perfil(salida, perfilador, perfil, top)
+        if memoria:
+            _informar_memoria(salida, snapshot, pico, memoria, top)
+        _informar_fases(salida, fases)
+
+
+def _informar_perfil(salida, perfilador, archivo, top):
+    perfilador.dump_stats(archivo)
+
+    texto = io.StringIO()
+    pstats.Stats(perfilador, stream=texto).strip_dirs().sort_stats("cumulative").print_stats(top)
+
+    salida.write(f"\n=== Funciones más costosas (perfil completo en {archivo}) ===\n")
+    salida.write(texto.getvalue().strip() + "\n")
+
+
+def _informar_memoria(salida, snapshot, pico, archivo, top):
+    snapshot.dump(archivo)
+
+    salida.write(f"\n=== Memoria (pico {pico / 1024 / 1024:.1f} MB, snapshot en {archivo}) ===\n")
+    for estadistica in snapshot.statistics("lineno")[:top]:
+        salida.write(f"  {estadistica}\n")
+
+
+def _informar_fases(salida, fases):
+    salida.write("\n=== Consultas SQL por fase ===\n")
+    if not fases:
+        salida.write("  (sin fases medidas en este proceso)\n")
+        return
+
+    salida.write(f"  {'Fase':<20} {'Consultas':>9} {'SQL (s)':>9} {'Total (s)':>10}\n")
+    for nombre, datos in fases.items():
+        salida.write(
+            f"  {nombre:<20} {datos['consultas']:>9} "
+            f"{datos['tiempo_sql']:>9.3f} {datos['tiempo']:>10.3f}\n"
+        )
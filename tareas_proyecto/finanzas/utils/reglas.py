@@ -0,0 +1,213 @@
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import BooleanField, Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q, Value, Window
+from django.db.models.functions import Greatest, Round
+from django.utils.timezone import now
+
+from ..models import RegistroFinanciero
+
+
+CAMPOS_MONETARIOS = ["alimento", "productos", "ahorro_y_deuda", "para_gastar_dia", "sobrante_monetario"]
+
+FECHA_MINIMA = date(2000, 1, 1)
+
+
+# Regla de integridad declarada una sola vez.
+# condicion / esperado / actual reciben el prefijo de los campos ("" sobre
+# RegistroFinanciero, "registrofinanciero__" desde User) y devuelven una
+# expresión del ORM. `esperado` también puede ser un valor fijo.
+Regla = namedtuple("Regla", "codigo campo grupos condicion esperado actual")
+
+# Resultado de evaluar una regla: total de filas y algunos ids de ejemplo
+ResultadoRegla = namedtuple("ResultadoRegla", "nombre total muestra")
+
+REGLAS = []
+
+
+def registrar_regla(codigo, campo, condicion, grupos=("diagnostico", "verificador"), esperado=None, actual=None):
+    """
+    Agrega una regla al registro. Agregar un chequeo nuevo es solo
+    declarar su condición: el diagnóstico y el verificador la compilan
+    a SQL sin otro bucle en Python.
+    """
+    if actual is None:
+        actual = lambda p: F(p + campo)  # noqa: E731
+    regla = Regla(codigo, campo, frozenset(grupos), condicion, esperado, actual)
+    REGLAS.append(regla)
+    return regla
+
+
+def nombre_regla(regla):
+    return f"{regla.codigo}_{regla.campo}"
+
+
+def reglas_de(grupo=None):
+    return [regla for regla in REGLAS if grupo is None or grupo in regla.grupos]
+
+
+# -----------------------------------------------------
+# Expresiones compartidas con el reparador
+# -----------------------------------------------------
+MONTO = DecimalField(max_digits=12, decimal_places=2)
+
+
+def gasto_total(p=""):
+    return F(p + "alimento") + F(p + "ahorro_y_deuda") + F(p + "productos")
+
+
+def sobrante_calculado(p=""):
+    """
+    dinero.sobrante_centavos como expresión SQL: cada monto redondeado
+    a centavos, presupuesto - gastos, mínimo 0. El Round exterior solo
+    limpia el error de punto flotante de SQLite.
+    """
+    def redondeado(campo):
+        return Round(F(p + campo), 2, output_field=MONTO)
+
+    gastos = redondeado("alimento") + redondeado("ahorro_y_deuda") + redondeado("productos")
+    return Round(
+        Greatest(redondeado("para_gastar_dia") - gastos, Value(Decimal("0")), output_field=MONTO),
+        2,
+        output_field=MONTO,
+    )
+
+
+def con_decimales_de_mas(campo, p=""):
+    return ~Q(**{p + campo: Round(F(p + campo), 2)})
+
+
+def sobrante_incoherente(p=""):
+    return Q(**{p + "sobrante_fijo": False}) & ~Q(**{p + "sobrante_monetario": sobrante_calculado(p)})
+
+
+# -----------------------------------------------------
+# Reglas registradas
+# -----------------------------------------------------
+registrar_regla(
+    "duplicado", "fecha",
+    lambda p: Exists(
+        RegistroFinanciero.objects
+        .filter(user_id=OuterRef(p + "user_id"), fecha=OuterRef(p + "fecha"))
+        .exclude(pk=OuterRef(p + "pk"))
+    ),
+    grupos=("verificador",),
+    actual=lambda p: F(p + "pk"),
+)
+
+registrar_regla(
+    "fecha_invalida", "fecha",
+    lambda p: Q(**{p + "fecha__gt": now().date()}) | Q(**{p + "fecha__lt": FECHA_MINIMA}),
+    grupos=("diagnostico",),
+)
+
+for _campo in CAMPOS_MONETARIOS:
+    registrar_regla(
+        "valor_negativo", _campo,
+        lambda p, campo=_campo: Q(**{f"{p}{campo}__lt": 0}),
+        esperado=Decimal("0"),
+    )
+
+for _campo in CAMPOS_MONETARIOS:
+    registrar_regla(
+        "decimales_de_mas", _campo,
+        lambda p, campo=_campo: con_decimales_de_mas(campo, p),
+        esperado=lambda p, campo=_campo: Round(F(p + campo), 2, output_field=MONTO),
+    )
+
+# El diagnóstico siempre contó aparte el sobrante negativo (además de
+# valor_negativo_sobrante_monetario); se mantiene para que el total de
+# errores_detectados no cambie.
+registrar_regla(
+    "sobrante_negativo", "sobrante_monetario",
+    lambda p: Q(**{p + "sobrante_monetario__lt": 0}),
+    grupos=("diagnostico",),
+)
+
+registrar_regla(
+    "gasto_supera_presupuesto", "gasto_total",
+    lambda p: Q(**{p + "para_gastar_dia__lt": gasto_total(p)}),
+    grupos=("verificador",),
+    esperado=lambda p: F(p + "para_gastar_dia"),
+    actual=lambda p: ExpressionWrapper(gasto_total(p), output_field=MONTO),
+)
+
+registrar_regla(
+    "sobrante_incoherente", "sobrante_monetario",
+    sobrante_incoherente,
+    grupos=("verificador",),
+    esperado=sobrante_calculado,
+)
+
+
+# -----------------------------------------------------
+# Compilación a consultas
+# -----------------------------------------------------
+def condicion_alguna(reglas, p=""):
+    """Q que cumple una fila si viola al menos una de las reglas."""
+    condicion = Q()
+    for regla in reglas:
+        condicion |= Q(regla.condicion(p))
+    return condicion
+
+
+def conteos_por_regla(reglas, p="", filtro=None):
+    """
+    Agregados condicionales (uno por regla) para usar en un único
+    .aggregate() o .annotate(): {nombre: Count(filter=condición)}.
+    `filtro` se suma a la condición de cada regla.
+    """
+    filtro = filtro if filtro is not None else Q()
+    return {
+        nombre_regla(regla): Count(p + "pk", filter=Q(regla.condicion(p)) & filtro)
+        for regla in reglas
+    }
+
+
+def evaluar_regla(regla, registros=None, muestra=5):
+    """
+    Una consulta por regla: filtra las filas que la violan y devuelve el
+    total (función de ventana) junto con los primeros `muestra` ids.
+    """
+    if registros is None:
+        registros = RegistroFinanciero.objects.all()
+
+    nombre = nombre_regla(regla)
+    infractores = registros.filter(Q(regla.condicion("")))
+    if not muestra:
+        return ResultadoRegla(nombre, infractores.count(), [])
+
+    filas = list(
+        infractores
+        .annotate(total_regla=Window(Count("pk")))
+        .order_by("pk")
+        .values_list("pk", "total_regla")[:muestra]
+    )
+    total = filas[0][1] if filas else 0
+    return ResultadoRegla(nombre, total, [pk for pk, _ in filas])
+
+
+def diagnosticar_reglas(registros=None, grupo=None, muestra=5):
+    """Evalúa cada regla del grupo sobre toda la tabla (una consulta por regla)."""
+    return [evaluar_regla(regla, registros, muestra) for regla in reglas_de(grupo)]
+
+
+def anotar_reglas(registros, reglas, campos=()):
+    """
+    Deja solo las filas que violan alguna regla y devuelve, junto a
+    `campos`, un booleano por regla y sus valores esperado/actual
+    (regla_i, esperado_i, actual_i). Lo usa el verificador.
+    """
+    anotaciones = {}
+    for i, regla in enumerate(reglas):
+        anotaciones[f"regla_{i}"] = ExpressionWrapper(Q(regla.condicion("")), output_field=BooleanField())
+        anotaciones[f"actual_{i}"] = regla.actual("")
+        if callable(regla.esperado):
+            anotaciones[f"esperado_{i}"] = regla.esperado("")
+    return (
+        registros
+        .filter(condicion_alguna(reglas))
+        .annotate(**anotaciones)
+        .values(*campos, *anotaciones)
+    )
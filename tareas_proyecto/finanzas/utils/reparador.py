@@ -1,32 +1,102 @@
-from decimal import Decimal, InvalidOperation
-from datetime import date
+from decimal import Decimal
 
-from ..models import RegistroFinanciero, ConfigFinanciera
-from ..calculo_sobrante.calculadora import calcular_sobrante
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from ..models import RegistroFinanciero, ConfigFinanciera, borrar_registros
+from ..cache.versiones import incrementar_version
+from ..resumen.services import reconstruir_resumenes
+from .perfilado import fase
+from .reglas import con_decimales_de_mas, sobrante_calculado, sobrante_incoherente
+
+
+# Grupos (usuario, fecha) duplicados resueltos por cada DELETE
+TAMANIO_LOTE = 500
+
+CAMPOS_MONTO = ["alimento", "productos", "ahorro_y_deuda", "para_gastar_dia"]
+
+
+def _lotes(iterable, tamanio):
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamanio:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
 
 
 # -----------------------------------------------------
-# Conversión segura a Decimal
+# Resolución de duplicados
 # -----------------------------------------------------
-def safe_decimal(value, default=Decimal("0")):
-    try:
-        if value in [None, "", " ", "-", "--"]:
-            return default
-        return Decimal(str(value).replace(",", "."))
-    except (InvalidOperation, TypeError, ValueError):
-        return default
+def _perdedores_de_grupos(grupos):
+    """
+    Dado un lote de grupos (user_id, fecha, cantidad) duplicados,
+    devuelve los ids a eliminar. En cada grupo gana el registro con
+    mayor suma de montos; ante empate, el de menor id.
+    """
+    # Solo las filas de los pares exactos, no el producto usuarios × fechas
+    filtro = reduce(or_, (Q(user_id=user_id, fecha=fecha) for user_id, fecha, _ in grupos))
+    filas = (
+        RegistroFinanciero.objects
+        .order_by()
+        .filter(filtro)
+        .values_list("id", "user_id", "fecha", *CAMPOS_MONTO)
+    )
+
+    ganadores = {}
+    ids = []
+    for reg_id, user_id, fecha, *montos in filas:
+        clave = (user_id, fecha)
+        ids.append(reg_id)
+        puntaje = (sum(montos), -reg_id)
+        if clave not in ganadores or puntaje > ganadores[clave][0]:
+            ganadores[clave] = (puntaje, reg_id)
+
+    conservar = {reg_id for _, reg_id in ganadores.values()}
+    return [reg_id for reg_id in ids if reg_id not in conservar]
 
 
 # -----------------------------------------------------
 # Reparador completo de registros
 # -----------------------------------------------------
-def reparar_registros_financieros(usuario=None, verbose=False):
+def reparar_registros_financieros(
+    usuario=None, verbose=False, tamanio_lote=TAMANIO_LOTE, user_ids=None, desde=None
+):
+    """
+    Repara los registros con operaciones por conjunto: cada paso es un
+    UPDATE/DELETE filtrado en la base de datos en lugar de un save()
+    por fila. Al final reconstruye el resumen e invalida la caché de
+    los usuarios afectados.
+
+    Se limita a `usuario` o a la lista `user_ids` si se indican, y con
+    `desde` solo a los registros modificados a partir de ese momento.
+    """
     if verbose:
         print("\n=== Reparador Automático de Registros ===\n")
 
-    registros = RegistroFinanciero.objects.all()
+    registros = RegistroFinanciero.objects.order_by()
     if usuario:
         registros = registros.filter(user=usuario)
+    if user_ids is not None:
+        registros = registros.filter(user_id__in=user_ids)
+
+    # Los duplicados se buscan entre todos los registros que comparten
+    # usuario y fecha con alguno de los modificados
+    candidatos_duplicados = registros
+    if desde is not None:
+        registros = registros.filter(modificado__gte=desde)
+        candidatos_duplicados = candidatos_duplicados.filter(
+            Exists(registros.filter(user_id=OuterRef("user_id"), fecha=OuterRef("fecha")))
+        )
+
+    # Los UPDATE masivos no pasan por auto_now
+    ahora = timezone.now()
 
     total = registros.count()
     if verbose:
@@ -40,96 +110,93 @@ def reparar_registros_financieros(usuario=None, verbose=False):
         "valores_negativos_corregidos": 0,
         "registros_actualizados": 0,
     }
+    usuarios_afectados = set()
 
     # --------------------------------------------
     # 1) Arreglar fechas fuera del rango permitido
+    #    (fecha de inicio de cada usuario por subconsulta)
     # --------------------------------------------
-    for reg in registros:
-        try:
-            config = ConfigFinanciera.objects.get(user=reg.user)
-            f_inicio = config.fecha_inicio_registros
+    with fase("fechas"):
+        fecha_inicio = Subquery(
+            ConfigFinanciera.objects
+            .filter(user_id=OuterRef("user_id"))
+            .values("fecha_inicio_registros")[:1]
+        )
+        fuera_de_rango = registros.filter(fecha__lt=fecha_inicio)
 
-            if f_inicio and reg.fecha < f_inicio:
-                if verbose:
-                    print(f"⚠ Fecha fuera de rango → {reg.fecha} < {f_inicio}")
-                reg.fecha = f_inicio
-                reg.save()
-                arreglados["fechas_fuera_de_rango"] += 1
-        except ConfigFinanciera.DoesNotExist:
-            pass
+        usuarios_afectados.update(fuera_de_rango.values_list("user_id", flat=True).distinct())
+        arreglados["fechas_fuera_de_rango"] = fuera_de_rango.update(fecha=fecha_inicio, modificado=ahora)
+
+        if verbose and arreglados["fechas_fuera_de_rango"]:
+            print(f"⚠ Fechas fuera de rango movidas a la fecha de inicio: {arreglados['fechas_fuera_de_rango']}")
 
     # --------------------------------------------
     # 2) Eliminar duplicados manteniendo el mejor registro
+    #    (GROUP BY usuario, fecha HAVING COUNT > 1: solo se
+    #    leen las filas de los grupos duplicados)
     # --------------------------------------------
-    vistos = {}
-
-    for reg in registros.order_by("fecha"):
-        key = (reg.user.id, reg.fecha)
-
-        if key not in vistos:
-            vistos[key] = reg
-        else:
-            reg_original = vistos[key]
+    with fase("duplicados"):
+        grupos = list(
+            candidatos_duplicados
+            .values_list("user_id", "fecha")
+            .annotate(cantidad=Count("pk"))
+            .filter(cantidad__gt=1)
+            .order_by("user_id", "fecha")
+        )
 
-            campos = ["alimento", "productos", "ahorro_y_deuda", "para_gastar_dia"]
-            suma_original = sum([getattr(reg_original, c) for c in campos])
-            suma_nuevo = sum([getattr(reg, c) for c in campos])
+        for lote in _lotes(grupos, tamanio_lote):
+            perdedores = _perdedores_de_grupos(lote)
+            # DELETE explícito, sin post_delete por fila: el resumen, las
+            # tendencias y la caché se rehacen una vez al final
+            arreglados["duplicados_eliminados"] += borrar_registros(perdedores)
 
-            if suma_nuevo > suma_original:
+            for user_id, fecha, cantidad in lote:
+                usuarios_afectados.add(user_id)
                 if verbose:
-                    print(f"🔄 Reemplazando registro por uno más completo en {reg.fecha}")
-                reg_original.delete()
-                vistos[key] = reg
-            else:
-                if verbose:
-                    print(f"🗑 Eliminando duplicado inferior en {reg.fecha}")
-                reg.delete()
-
-            arreglados["duplicados_eliminados"] += 1
+                    print(f"🗑 Eliminando {cantidad - 1} duplicado(s) en {fecha}")
 
     # --------------------------------------------
     # 3) Revisar cada registro individual
     # --------------------------------------------
-    for reg in RegistroFinanciero.objects.all():
-
-        modificado = False
-
-        # --- Normalizar decimales ---
-        for campo in ["alimento", "productos", "ahorro_y_deuda", "para_gastar_dia"]:
-            valor = getattr(reg, campo)
-            valor_dec = safe_decimal(valor)
-
-            if valor_dec != valor:
-                setattr(reg, campo, valor_dec)
-                modificado = True
-                arreglados["decimales_corregidos"] += 1
-
-            # Corregir valores negativos
-            if valor_dec < 0:
-                setattr(reg, campo, Decimal("0"))
-                modificado = True
-                arreglados["valores_negativos_corregidos"] += 1
-
-        # --- Recalcular sobrante ---
-        sobrante_calculado = calcular_sobrante(
-            reg.para_gastar_dia,
-            reg.alimento,
-            reg.ahorro_y_deuda,
-            reg.productos
+    with fase("conteo_afectados"):
+        a_corregir = Q()
+        for campo in CAMPOS_MONTO:
+            a_corregir |= con_decimales_de_mas(campo) | Q(**{f"{campo}__lt": 0})
+        a_corregir |= sobrante_incoherente()
+
+        afectados = registros.filter(a_corregir)
+        usuarios_afectados.update(afectados.values_list("user_id", flat=True).distinct())
+        arreglados["registros_actualizados"] = afectados.count()
+
+    # --- Normalizar decimales ---
+    with fase("decimales"):
+        for campo in CAMPOS_MONTO:
+            arreglados["decimales_corregidos"] += (
+                registros.filter(con_decimales_de_mas(campo))
+                .update(**{campo: Round(F(campo), 2)}, modificado=ahora)
+            )
+
+    # --- Corregir valores negativos ---
+    with fase("negativos"):
+        for campo in CAMPOS_MONTO:
+            arreglados["valores_negativos_corregidos"] += (
+                registros.filter(**{f"{campo}__lt": 0})
+                .update(**{campo: Decimal("0")}, modificado=ahora)
+            )
+
+    # --- Recalcular sobrante (con los montos ya corregidos) ---
+    with fase("sobrante"):
+        arreglados["sobrantes_recalculados"] = (
+            registros.filter(sobrante_incoherente())
+            .update(sobrante_monetario=sobrante_calculado(), modificado=ahora)
         )
 
-        if not reg.sobrante_fijo:
-            if reg.sobrante_monetario != sobrante_calculado:
-                if verbose:
-                    print(f"♻ Recalculando sobrante en {reg.fecha}")
-                reg.sobrante_monetario = sobrante_calculado
-                modificado = True
-                arreglados["sobrantes_recalculados"] += 1
-
-        # Guardar cambios
-        if modificado:
-            reg.save()
-            arreglados["registros_actualizados"] += 1
+    # Las actualizaciones masivas no disparan signals
+    if usuarios_afectados:
+        with fase("resumen"):
+            reconstruir_resumenes(user_ids=usuarios_afectados)
+            for user_id in usuarios_afectados:
+                incrementar_version(user_id)
 
     if verbose:
         print("\n=== Reparación Completada ===\n")
@@ -137,4 +204,4 @@ def reparar_registros_financieros(usuario=None, verbose=False):
             print(f"{k}: {v}")
         print("\n=== Fin del proceso ===\n")
 
-    return arreglados
\ No newline at end of file
+    return arreglados
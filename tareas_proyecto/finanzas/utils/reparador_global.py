@@ -1,38 +1,111 @@
 # finanzas/utils/reparador_global.py
 
+from functools import partial
+
+from django.db import transaction
+
 from finanzas.utils.reparador import reparar_registros_financieros
-from finanzas.models import User
+from finanzas.utils.paralelo import MAX_USUARIOS_POR_PARTICION, bloqueo_escritura, ejecutar_en_paralelo
+from finanzas.utils.marcas import modificados_desde, usuarios_con_cambios
+from finanzas.models import RegistroFinanciero
+
+
+CLAVES_RESUMEN = [
+    "usuarios_procesados",
+    "total_registros",
+    "fechas_fuera_de_rango",
+    "duplicados_eliminados",
+    "sobrantes_recalculados",
+    "decimales_corregidos",
+    "valores_negativos_corregidos",
+    "registros_actualizados",
+]
+
+
+def reparar_particion(user_ids, desde=None, dry_run=False, verbose=False):
+    """
+    Repara los registros de un bloque de usuarios dentro de una única
+    transacción y devuelve su resumen. Con `dry_run` calcula los mismos
+    cambios y deshace la transacción al final.
+    Se ejecuta tanto en el proceso principal como en los workers.
+
+    En SQLite la transacción entera va bajo bloqueo_escritura(): cada paso
+    lee lo que escribió el anterior (fechas movidas → duplicados nuevos,
+    montos corregidos → sobrante), así que no hay una fase de solo
+    lectura que separar y las particiones se reparan de a una. El conteo
+    informativo sí se hace fuera del bloqueo.
+    """
+    total = modificados_desde(
+        RegistroFinanciero.objects.filter(user_id__in=user_ids), desde
+    ).count()
+
+    with bloqueo_escritura(), transaction.atomic():
+        resultados = reparar_registros_financieros(user_ids=user_ids, desde=desde, verbose=verbose)
+
+        if dry_run:
+            transaction.set_rollback(True)
 
-def reparar_todos_los_usuarios():
+    return {
+        "usuarios_procesados": len(user_ids),
+        "total_registros": total,
+        **resultados,
+    }
+
+
+def reparar_todos_los_usuarios(
+    jobs=1,
+    desde=None,
+    tamanio_lote=MAX_USUARIOS_POR_PARTICION,
+    dry_run=False,
+    despues_de_user_id=0,
+    progreso=None,
+    verbose=False,
+):
+    """
+    Repara todos los usuarios en lotes de `tamanio_lote` usuarios; cada
+    lote se confirma en su propia transacción. Con jobs > 1 los lotes se
+    reparten entre varios procesos (cada uno con su conexión) y los
+    resúmenes parciales se suman en el resumen global. Solo acelera con
+    un motor de varios escritores (PostgreSQL, MySQL): en SQLite los
+    lotes se confirman de a uno (ver reparar_particion).
+
+    - `desde`: solo usuarios y registros modificados desde ese momento.
+    - `dry_run`: calcula todo el plan de cambios sin guardar nada.
+    - `despues_de_user_id`: reanuda salteando los lotes ya confirmados.
+    - `progreso(ultimo_user_id, registros_hechos, registros_totales)`: se
+      llama después de cada lote confirmado, en orden de usuario.
+    """
     print("\n========================================")
     print(" Reparador Global — Todos los Usuarios ")
     print("========================================\n")
 
-    resumen_global = {
-        "usuarios_procesados": 0,
-        "total_registros": 0,
-        "fechas_fuera_de_rango": 0,
-        "duplicados_eliminados": 0,
-        "sobrantes_recalculados": 0,
-        "decimales_corregidos": 0,
-        "valores_negativos_corregidos": 0,
-        "registros_actualizados": 0,
-    }
+    resumen_global = {clave: 0 for clave in CLAVES_RESUMEN}
+
+    user_ids = list(
+        usuarios_con_cambios(desde)
+        .filter(pk__gt=despues_de_user_id)
+        .values_list("pk", flat=True)
+    )
+    lotes = [user_ids[i:i + tamanio_lote] for i in range(0, len(user_ids), tamanio_lote)]
 
-    for user in User.objects.all():
-        print(f"\n>>> Reparando registros del usuario: {user.username}")
+    registros_totales = modificados_desde(
+        RegistroFinanciero.objects.filter(user_id__gt=despues_de_user_id), desde
+    ).count()
 
-        resultados = reparar_registros_financieros(user=user)
+    reparar = partial(reparar_particion, desde=desde, dry_run=dry_run, verbose=verbose)
+    if jobs > 1:
+        print(f">>> Reparando {len(lotes)} lotes con {jobs} procesos")
+        resultados = ejecutar_en_paralelo(reparar, lotes, jobs)
+    else:
+        resultados = map(reparar, lotes)
 
-        # Acumular estadística por usuario
-        resumen_global["usuarios_procesados"] += 1
-        resumen_global["total_registros"] += resultados.get("total_registros", 0)
-        resumen_global["fechas_fuera_de_rango"] += resultados["fechas_fuera_de_rango"]
-        resumen_global["duplicados_eliminados"] += resultados["duplicados_eliminados"]
-        resumen_global["sobrantes_recalculados"] += resultados["sobrantes_recalculados"]
-        resumen_global["decimales_corregidos"] += resultados["decimales_corregidos"]
-        resumen_global["valores_negativos_corregidos"] += resultados["valores_negativos_corregidos"]
-        resumen_global["registros_actualizados"] += resultados["registros_actualizados"]
+    # Acumular estadística por lote (llegan en orden de usuario)
+    for lote, resultado in zip(lotes, resultados):
+        for clave in CLAVES_RESUMEN:
+            resumen_global[clave] += resultado.get(clave, 0)
+
+        if progreso:
+            progreso(lote[-1], resumen_global["total_registros"], registros_totales)
 
     print("\n========================================")
     print(" Reparación Global Finalizada ")
@@ -47,6 +120,9 @@ def reparar_todos_los_usuarios():
     print("Valores negativos corregidos:", resumen_global["valores_negativos_corregidos"])
     print("Registros actualizados:", resumen_global["registros_actualizados"])
 
+    if dry_run:
+        print("\n(Simulación: no se guardó ningún cambio)")
+
     print("\n=== Fin del proceso global ===\n")
 
-    return resumen_global
\ No newline at end of file
+    return resumen_global
@@ -1,104 +1,129 @@
-from decimal import Decimal, InvalidOperation
-from django.contrib.auth import get_user_model
-from datetime import date
+import json
+from collections import namedtuple
 
 from ..models import RegistroFinanciero
+from .reglas import anotar_reglas, reglas_de
+
+# Filas por lote al recorrer la tabla con .iterator()
+TAMANIO_LOTE = 2000
+
+
+# Problema encontrado en un registro (una línea del reporte JSONL)
+Hallazgo = namedtuple("Hallazgo", "codigo user_id fecha campo esperado actual")
+
+
+# -----------------------------------------------------
+# Recorrido en streaming
+# -----------------------------------------------------
+def iterar_hallazgos(desde=None, tamanio_lote=TAMANIO_LOTE):
+    """
+    Recorre en lotes, ordenados por usuario y fecha, solo los registros
+    que violan alguna regla del grupo "verificador" (finanzas.utils.reglas)
+    y va entregando un Hallazgo por cada regla incumplida. Las reglas se
+    evalúan en la consulta, así la memoria no crece con la tabla.
+
+    Con `desde` solo se revisan los registros modificados desde ese
+    momento; los duplicados se comparan contra toda la tabla.
+    """
+    for _, hallazgo in _filas_con_hallazgos(desde, tamanio_lote):
+        yield hallazgo
+
+
+def _filas_con_hallazgos(desde, tamanio_lote, campos=()):
+    """Pares (fila, Hallazgo); la fila trae además los `campos` pedidos."""
+    reglas = reglas_de("verificador")
+
+    registros = RegistroFinanciero.objects.order_by()
+    if desde is not None:
+        registros = registros.filter(modificado__gte=desde)
+
+    filas = (
+        anotar_reglas(registros, reglas, campos=("id", "user_id", "fecha", *campos))
+        .order_by("user_id", "fecha", "id")
+        .iterator(chunk_size=tamanio_lote)
+    )
+
+    for r in filas:
+        for i, regla in enumerate(reglas):
+            if not r[f"regla_{i}"]:
+                continue
+            esperado = r[f"esperado_{i}"] if callable(regla.esperado) else regla.esperado
+            yield r, Hallazgo(regla.codigo, r["user_id"], r["fecha"], regla.campo, esperado, r[f"actual_{i}"])
+
+
+# -----------------------------------------------------
+# Salida
+# -----------------------------------------------------
+def hallazgo_a_json(hallazgo):
+    """Una línea JSON; fechas en ISO y montos como texto para no perder precisión."""
+    def valor(v):
+        if v is None or isinstance(v, (bool, int)):
+            return v
+        if hasattr(v, "isoformat"):
+            return v.isoformat()
+        return str(v)
+
+    return json.dumps({campo: valor(v) for campo, v in hallazgo._asdict().items()}, ensure_ascii=False)
+
+
+def escribir_hallazgos(hallazgos, salida, limite=None):
+    """
+    Escribe cada hallazgo como una línea JSONL en `salida` apenas se
+    encuentra. Con `limite` deja de escribir al llegar a ese número
+    pero sigue contando. Devuelve (encontrados, escritos).
+    """
+    encontrados = escritos = 0
+    for hallazgo in hallazgos:
+        encontrados += 1
+        if limite is None or escritos < limite:
+            salida.write(hallazgo_a_json(hallazgo) + "\n")
+            escritos += 1
+    return encontrados, escritos
+
+
+def describir_hallazgo(hallazgo, username):
+    h = hallazgo
+    if h.codigo == "duplicado":
+        return f"[{username}] Duplicado en fecha {h.fecha}"
+    if h.codigo == "gasto_supera_presupuesto":
+        return f"[{username}] Gastos superan presupuesto en {h.fecha} → Gastado {h.actual} / {h.esperado}"
+    if h.codigo == "sobrante_incoherente":
+        return f"[{username}] sobrante_monetario incorrecto en {h.fecha} → {h.actual} debería ser {h.esperado}"
+    if h.codigo == "decimales_de_mas":
+        return f"[{username}] {h.campo} con más de dos decimales en {h.fecha} → {h.actual}"
+    if h.codigo == "fecha_invalida":
+        return f"[{username}] fecha fuera de rango → {h.fecha}"
+    return f"[{username}] {h.campo} negativo en {h.fecha}"
+
+
+# -----------------------------------------------------
+# Verificador legible (shell)
+# -----------------------------------------------------
+def verificar_registros_financieros(desde=None, limite=None):
+    """
+    Revisa la coherencia de los registros e imprime cada problema a
+    medida que aparece. Devuelve la cantidad de problemas encontrados.
+    Con `desde` solo analiza los registros modificados desde ese momento.
+    """
+    print("\n=== Verificador de Registros Financieros ===\n")
 
-User = get_user_model()
+    encontrados = 0
 
+    # El nombre de usuario viene en la misma consulta (JOIN), no una por usuario
+    for fila, hallazgo in _filas_con_hallazgos(desde, TAMANIO_LOTE, campos=("user__username",)):
+        encontrados += 1
+        if limite is not None and encontrados > limite:
+            continue
 
-def verificar_registros_financieros():
-    print("\n=== Verificador de Registros Financieros ===\n")
+        if encontrados == 1:
+            print("⚠️ ERRORES ENCONTRADOS:")
+
+        print(" -", describir_hallazgo(hallazgo, fila["user__username"]))
 
-    total = RegistroFinanciero.objects.count()
-    print(f"Total registros: {total}")
-
-    errores = []
-    usuarios = User.objects.all()
-
-    for user in usuarios:
-        registros = RegistroFinanciero.objects.filter(user=user).order_by("fecha")
-
-        # -------------------------------------------------------
-        # 1) Fechas duplicadas por usuario
-        # -------------------------------------------------------
-        fechas_vistas = set()
-        for r in registros:
-            if r.fecha in fechas_vistas:
-                errores.append(f"[{user.username}] Duplicado en fecha {r.fecha}")
-            fechas_vistas.add(r.fecha)
-
-        for r in registros:
-            # -------------------------------------------------------
-            # 2) Validación de tipo numérico seguro
-            # -------------------------------------------------------
-            for campo in ["para_gastar_dia", "alimento", "productos", "ahorro_y_deuda", "sobrante_monetario"]:
-                valor = getattr(r, campo)
-                try:
-                    Decimal(valor)
-                except (InvalidOperation, TypeError):
-                    errores.append(f"[{user.username}] {campo} contiene dato inválido → {valor}")
-
-            # -------------------------------------------------------
-            # 3) Valores negativos imposibles
-            # -------------------------------------------------------
-            if r.para_gastar_dia < 0:
-                errores.append(f"[{user.username}] para_gastar_dia negativo en {r.fecha}")
-
-            if r.alimento < 0 or r.productos < 0 or r.ahorro_y_deuda < 0:
-                errores.append(f"[{user.username}] gasto negativo en {r.fecha}")
-
-            # -------------------------------------------------------
-            # 4) Gastos mayores al dinero disponible
-            # -------------------------------------------------------
-            if (r.alimento + r.productos + r.ahorro_y_deuda) > r.para_gastar_dia:
-                errores.append(
-                    f"[{user.username}] Gastos superan presupuesto en {r.fecha} → "
-                    f"Gastado {r.alimento + r.productos + r.ahorro_y_deuda} / {r.para_gastar_dia}"
-                )
-
-            # -------------------------------------------------------
-            # 5) Sobrante incoherente si no está fijo
-            # -------------------------------------------------------
-            if not r.sobrante_fijo:
-                esperado = (
-                    r.para_gastar_dia
-                    - r.alimento
-                    - r.productos
-                    - r.ahorro_y_deuda
-                )
-
-                if r.sobrante_monetario != esperado:
-                    errores.append(
-                        f"[{user.username}] sobrante_monetario incorrecto en {r.fecha} → "
-                        f"{r.sobrante_monetario} debería ser {esperado}"
-                    )
-
-            # -------------------------------------------------------
-            # 6) Flags fijos inconsistentes
-            # -------------------------------------------------------
-            flags = [
-                ("alimento_fijo", r.alimento),
-                ("productos_fijo", r.productos),
-                ("ahorro_y_deuda_fijo", r.ahorro_y_deuda),
-                ("sobrante_fijo", r.sobrante_monetario),
-            ]
-
-            for flag, valor in flags:
-                if getattr(r, flag) and valor < 0:
-                    errores.append(
-                        f"[{user.username}] {flag} activo pero valor negativo en {r.fecha}"
-                    )
-
-    # -------------------------------------------------------
-    # 7) Resultado final
-    # -------------------------------------------------------
-    if errores:
-        print("\n⚠️ ERRORES ENCONTRADOS:")
-        for e in errores:
-            print(" -", e)
-    else:
-        print("\n✅ No se encontraron registros corruptos.")
+    if not encontrados:
+        print("✅ No se encontraron registros corruptos.")
+    elif limite is not None and encontrados > limite:
+        print(f"\n... y {encontrados - limite} más (límite de {limite}).")
 
     print("\n=== Fin del análisis ===\n")
-    return errores
\ No newline at end of file
+    return encontrados
@@ -3,9 +3,10 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from datetime import date, timedelta
+from datetime import date
 
-from ..models import RegistroFinanciero, ConfigFinanciera
+from ..models import ConfigFinanciera
+from ..calendario.services import crear_registros_rango, eliminar_dias_sin_datos
 
 
 @login_required
@@ -37,28 +38,18 @@ def configurar_calendario(request):
 
         # Guardar configuración
         config.fecha_inicio_registros = fecha_inicio
+        config.dias_virtuales = request.POST.get("dias_virtuales") == "on"
         config.save()
 
-        # Crear todos los días que falten
-        actual = fecha_inicio
-        while actual <= hoy:
-            RegistroFinanciero.objects.get_or_create(
-                user=request.user,
-                fecha=actual,
-                defaults={
-                    "para_gastar_dia": 0,
-                    "alimento": 0,
-                    "productos": 0,
-                    "ahorro_y_deuda": 0,
-                    "sobrante_monetario": 0,
-                    "alimento_fijo": False,
-                    "productos_fijo": False,
-                    "ahorro_y_deuda_fijo": False,
-                    "sobrante_fijo": False,
-                    "completado": False,
-                },
-            )
-            actual += timedelta(days=1)
+        if config.dias_virtuales:
+            # Los días vacíos no se guardan: se muestran con los valores
+            # por defecto y se crean al editarlos
+            eliminados = eliminar_dias_sin_datos(request.user, config)
+            if eliminados:
+                messages.info(request, f"Se quitaron {eliminados} días vacíos.")
+        else:
+            # Crear todos los días que falten (en lote)
+            crear_registros_rango(request.user, config, fecha_inicio, hoy)
 
         messages.success(request, "Fecha de inicio configurada correctamente.")
         return redirect("finanzas:dashboard")
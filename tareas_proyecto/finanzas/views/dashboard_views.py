@@ -3,27 +3,17 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from django.contrib import messages
 from datetime import date
-from decimal import Decimal, InvalidOperation
+from decimal import InvalidOperation
 
 from ..models import RegistroFinanciero, ConfigFinanciera
 from ..calculo_sobrante.calculadora import calcular_sobrante
-from ..views.registros_views.dias_pendientes import obtener_dias_pendientes
-
-
-# ---------------------------------------------
-# Conversión segura a Decimal
-# ---------------------------------------------
-def to_decimal(value, default=Decimal("0")):
-    """
-    Convierte un valor a Decimal de forma segura.
-    Permite valores como "1200", "1.200", "1,200".
-    """
-    if not value:
-        return default
-    try:
-        return Decimal(str(value).replace(",", "."))
-    except:
-        return default
+from ..calculo_sobrante.dinero import CERO, leer_monto, parsear_monto
+from ..resumen.services import obtener_resumen
+from ..resumen.tendencias import obtener_tendencia
+from ..cache.versiones import clave_usuario, obtener_o_calcular
+from ..calendario.services import indice_pendientes
+from ..calendario.utils import primeras_fechas, total_dias
+from ..views.registros_views.recientes import ventana_registros
 
 
 class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
@@ -41,9 +31,7 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
         nuevo_presupuesto = request.POST.get("presupuesto_diario")
         if nuevo_presupuesto:
             try:
-                config.presupuesto_diario = to_decimal(
-                    nuevo_presupuesto, config.presupuesto_diario
-                )
+                config.presupuesto_diario = leer_monto(nuevo_presupuesto)
                 config.save()
                 messages.success(request, "Presupuesto actualizado.")
             except InvalidOperation:
@@ -76,9 +64,9 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
                     user=request.user,
                     fecha=date.today(),
                     para_gastar_dia=config.presupuesto_diario,
-                    alimento=Decimal("0"),
-                    productos=Decimal("0"),
-                    ahorro_y_deuda=Decimal("0"),
+                    alimento=CERO,
+                    productos=CERO,
+                    ahorro_y_deuda=CERO,
                 )
                 existe_registro = True
 
@@ -87,7 +75,7 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
                 valor = registro.sobrante_monetario
             else:
                 valor_raw = request.POST.get(tipo)
-                valor = to_decimal(valor_raw)
+                valor = parsear_monto(valor_raw)
 
                 if valor <= 0:
                     messages.warning(
@@ -102,15 +90,7 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
             setattr(registro, campo_fijo, not getattr(registro, campo_fijo))
             setattr(registro, campo_valor, valor)
 
-            # Recalcular sobrante si no está fijo
-            if not registro.sobrante_fijo:
-                registro.sobrante_monetario = calcular_sobrante(
-                    registro.para_gastar_dia,
-                    registro.alimento,
-                    registro.ahorro_y_deuda,
-                    registro.productos,
-                )
-
+            # save() recalcula el sobrante si no está fijo
             registro.save()
             messages.success(request, f"{tipo.capitalize()} actualizado.")
             return redirect("finanzas:dashboard")
@@ -120,13 +100,13 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
         # ---------------------------------------------------------
         if "guardar_todo" in request.POST:
 
-            p = to_decimal(
+            p = parsear_monto(
                 request.POST.get("para_gastar_dia"),
                 config.presupuesto_diario
             )
-            a = to_decimal(request.POST.get("alimento"))
-            pr = to_decimal(request.POST.get("productos"))
-            ad = to_decimal(request.POST.get("ahorro_y_deuda"))
+            a = parsear_monto(request.POST.get("alimento"))
+            pr = parsear_monto(request.POST.get("productos"))
+            ad = parsear_monto(request.POST.get("ahorro_y_deuda"))
 
             if not existe_registro:
                 registro = RegistroFinanciero.objects.create(
@@ -143,10 +123,7 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
                 registro.productos = pr
                 registro.ahorro_y_deuda = ad
 
-            # Recalcular sobrante si NO está fijo
-            if not registro.sobrante_fijo:
-                registro.sobrante_monetario = calcular_sobrante(p, a, ad, pr)
-
+            # save() recalcula el sobrante si NO está fijo
             registro.completado = True
             registro.save()
 
@@ -160,6 +137,22 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
     # =====================================================
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+
+        # La parte costosa se cachea por usuario y versión de datos:
+        # cualquier escritura del usuario cambia la clave.
+        clave = clave_usuario("dashboard", self.request.user.pk, date.today().isoformat())
+        context.update(obtener_o_calcular(clave, self.construir_contexto))
+
+        return context
+
+    def construir_contexto(self):
+        """
+        Totales, pendientes, valores de hoy y configuración del usuario.
+        Se guarda en caché, así que solo lleva valores simples (números,
+        fechas, textos, diccionarios): nunca instancias de modelos, que
+        dependen del esquema con el que se serializaron.
+        """
+        context = {}
         config, _ = ConfigFinanciera.objects.get_or_create(
             user=self.request.user
         )
@@ -170,32 +163,25 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
         context["presupuesto_mostrar"] = str(presupuesto_val)
 
         # =======================================
-        # 1️⃣ LISTA REAL DE REGISTROS PENDIENTES
-        # (FILTRADOS POR FECHA INICIAL)
+        # DÍAS PENDIENTES (faltantes + incompletos)
+        # en rangos, desde la fecha de inicio
         # =======================================
-        fecha_inicio = config.fecha_inicio_registros or date.today()
-
-        dias_pendientes = RegistroFinanciero.objects.filter(
-            user=self.request.user,
-            completado=False,
-            fecha__gte=fecha_inicio
-        ).order_by("fecha")
-
-        context["dias_pendientes"] = dias_pendientes
-        context["hay_dias_pendientes"] = dias_pendientes.exists()
-
-        # =======================================
-        # 2️⃣ Sistema previo
-        # =======================================
-        pendientes, mensaje_pendientes = obtener_dias_pendientes(
-            self.request.user
-        )
-
-        pendientes_limpios = [d for d in pendientes if d]
-        pendientes_limpios.sort()
+        if config.fecha_inicio_registros:
+            rangos_pendientes = indice_pendientes(
+                self.request.user, config.fecha_inicio_registros
+            )
+            mensaje_pendientes = (
+                "" if rangos_pendientes
+                else "✔ No hay días pendientes. Todo está completo."
+            )
+        else:
+            rangos_pendientes = []
+            mensaje_pendientes = "⚠ Debes seleccionar desde qué día quieres registrar gastos."
 
-        context["pendientes"] = pendientes_limpios
-        context["hay_pendientes"] = len(pendientes_limpios) > 0
+        context["rangos_pendientes"] = rangos_pendientes
+        context["total_dias_pendientes"] = total_dias(rangos_pendientes)
+        context["proximos_pendientes"] = primeras_fechas(rangos_pendientes, 5)
+        context["hay_pendientes"] = bool(rangos_pendientes)
         context["mensaje_pendientes"] = mensaje_pendientes
 
         # =======================================
@@ -219,14 +205,17 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
 
         if existe_registro:
 
+            # El GET no escribe: solo persiste el sobrante si quedó desfasado
             if not registro.sobrante_fijo:
-                registro.sobrante_monetario = calcular_sobrante(
+                sobrante = calcular_sobrante(
                     registro.para_gastar_dia,
                     registro.alimento,
                     registro.ahorro_y_deuda,
                     registro.productos,
                 )
-                registro.save()
+                if sobrante != registro.sobrante_monetario:
+                    registro.sobrante_monetario = sobrante
+                    registro.save(update_fields=["sobrante_monetario", "modificado"])
 
             context["valor_alimento"] = dec(registro.alimento)
             context["valor_productos"] = dec(registro.productos)
@@ -239,18 +228,28 @@ class FinanzasDashboardView(LoginRequiredMixin, TemplateView):
             context["valor_ahorro_y_deuda"] = "0"
             context["valor_sobrante"] = str(presupuesto_val)
 
-        registros = RegistroFinanciero.objects.filter(
-            user=self.request.user
-        ).order_by("-fecha")
+        # Solo la ventana más reciente; el resto se pide con "Cargar más"
+        registros, registros_siguiente = ventana_registros(self.request.user)
+
+        # Totales mantenidos por deltas en ResumenFinanciero
+        resumen = obtener_resumen(self.request.user)
+
+        # Ventanas móviles y rachas mantenidas por deltas en TendenciaFinanciera
+        tendencia = obtener_tendencia(self.request.user)
 
         context.update({
-            "config": config,
-            "registro": registro,
             "existe_registro": existe_registro,
             "dia_completado": registro.completado if registro else False,
             "registros": registros,
-            "total_gastado": sum(r.gasto_total for r in registros),
-            "total_sobrante": sum(r.sobrante_monetario for r in registros),
+            "registros_siguiente": registros_siguiente,
+            "total_gastado": resumen.total_gastado,
+            "total_sobrante": resumen.total_sobrante,
+            "ahorro_promedio": resumen.promedio_ahorro_y_deuda,
+            "gasto_promedio_7": tendencia.promedio_gasto_7,
+            "gasto_promedio_30": tendencia.promedio_gasto_30,
+            "gasto_promedio_90": tendencia.promedio_gasto_90,
+            "racha_actual": tendencia.racha_actual,
+            "racha_maxima": tendencia.racha_maxima,
             "hoy": date.today(),
         })
 
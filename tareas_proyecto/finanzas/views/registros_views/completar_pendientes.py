@@ -2,32 +2,19 @@ from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from datetime import datetime
-from decimal import Decimal
 
 from ...models import RegistroFinanciero, ConfigFinanciera
-from ...calculo_sobrante.calculadora import calcular_sobrante
+from ...calculo_sobrante.dinero import parsear_monto
+from ...calendario.services import registro_virtual
 from .dias_pendientes import obtener_dias_pendientes
 
 
-# ============================================================
-# Conversión segura a Decimal
-# ============================================================
-def to_decimal(value, default=Decimal("0")):
-    if value in [None, ""]:
-        return default
-    try:
-        return Decimal(str(value).replace(",", "."))
-    except:
-        return default
-
-
 # ============================================================
 # Vista: Lista de días pendientes
 # ============================================================
 @login_required
 def registros_pendientes(request):
     pendientes, mensaje = obtener_dias_pendientes(request.user)
-    pendientes = sorted([d for d in pendientes if d])
 
     return render(
         request,
@@ -54,23 +41,11 @@ def completar_pendiente_por_fecha(request, fecha_str):
     ).first()
 
     # ------------------------------------------------------------
-    # CREACIÓN DEL REGISTRO (aplica valores fijos automáticamente)
+    # DÍA SIN REGISTRO (aplica valores fijos automáticamente)
+    # Se arma sin guardar: recién se crea al enviar el formulario
     # ------------------------------------------------------------
     if not registro:
-        registro = RegistroFinanciero.objects.create(
-            user=request.user,
-            fecha=fecha,
-            para_gastar_dia=config.presupuesto_diario,
-            alimento=config.default_alimento if config.default_alimento_fijo else Decimal("0"),
-            productos=config.default_productos if config.default_productos_fijo else Decimal("0"),
-            ahorro_y_deuda=config.default_ahorro_y_deuda if config.default_ahorro_y_deuda_fijo else Decimal("0"),
-            sobrante_monetario=config.default_sobrante if config.default_sobrante_fijo else Decimal("0"),
-
-            alimento_fijo=config.default_alimento_fijo,
-            productos_fijo=config.default_productos_fijo,
-            ahorro_y_deuda_fijo=config.default_ahorro_y_deuda_fijo,
-            sobrante_fijo=config.default_sobrante_fijo,
-        )
+        registro = registro_virtual(request.user, fecha, config)
 
     # ------------------------------------------------------------
     # POST
@@ -78,27 +53,20 @@ def completar_pendiente_por_fecha(request, fecha_str):
     if request.method == "POST":
 
         if not registro.alimento_fijo:
-            registro.alimento = to_decimal(request.POST.get("alimento"))
+            registro.alimento = parsear_monto(request.POST.get("alimento"))
 
         if not registro.productos_fijo:
-            registro.productos = to_decimal(request.POST.get("productos"))
+            registro.productos = parsear_monto(request.POST.get("productos"))
 
         if not registro.ahorro_y_deuda_fijo:
-            registro.ahorro_y_deuda = to_decimal(request.POST.get("ahorro_y_deuda"))
+            registro.ahorro_y_deuda = parsear_monto(request.POST.get("ahorro_y_deuda"))
 
-        registro.para_gastar_dia = to_decimal(
+        registro.para_gastar_dia = parsear_monto(
             request.POST.get("para_gastar_dia"),
             registro.para_gastar_dia
         )
 
-        if not registro.sobrante_fijo:
-            registro.sobrante_monetario = calcular_sobrante(
-                registro.para_gastar_dia,
-                registro.alimento,
-                registro.ahorro_y_deuda,
-                registro.productos,
-            )
-
+        # save() recalcula el sobrante si NO es fijo
         registro.completado = True
         registro.save()
 
@@ -3,7 +3,6 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from ...models import RegistroFinanciero, ConfigFinanciera
 from ...forms import RegistroFinancieroForm
-from ...calculo_sobrante.calculadora import calcular_sobrante
 
 class RegistroCreateView(LoginRequiredMixin, CreateView):
     model = RegistroFinanciero
@@ -19,16 +18,6 @@ class RegistroCreateView(LoginRequiredMixin, CreateView):
         return initial
 
     def form_valid(self, form):
-        """Asigna el usuario y calcula el sobrante antes de guardar."""
+        """Asigna el usuario; el sobrante lo calcula RegistroFinanciero.save()."""
         form.instance.user = self.request.user
-
-        p = form.cleaned_data["para_gastar_dia"]
-        a = form.cleaned_data["alimento"]
-        pr = form.cleaned_data["productos"]
-        ad = form.cleaned_data["ahorro_y_deuda"]
-
-        # Solo calcular si NO es un sobrante fijo
-        if not form.instance.sobrante_fijo:
-            form.instance.sobrante_monetario = calcular_sobrante(p, a, ad, pr)
-
         return super().form_valid(form)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
 from ...models import RegistroFinanciero, ConfigFinanciera
-from ...calculo_sobrante.calculadora import calcular_sobrante
+from ...calculo_sobrante.dinero import parsear_monto
 
 
 def editar_registro(request, pk):
@@ -26,21 +26,10 @@ def editar_registro(request, pk):
 
     if request.method == "POST":
         # Obtiene valores ingresados por el usuario o los defaults
-        p = float(request.POST.get("para_gastar_dia") or defaults["para_gastar_dia"])
-        a = float(request.POST.get("alimento") or defaults["alimento"])
-        pr = float(request.POST.get("productos") or defaults["productos"])
-        ad = float(request.POST.get("ahorro_y_deuda") or defaults["ahorro_y_deuda"])
-
-        # Actualizar campos
-        registro.para_gastar_dia = p
-        registro.alimento = a
-        registro.productos = pr
-        registro.ahorro_y_deuda = ad
-
-        # Recalcular sobrante solo si NO es fijo
-        if not registro.sobrante_fijo:
-            registro.sobrante_monetario = calcular_sobrante(p, a, ad, pr)
+        for campo, default in defaults.items():
+            setattr(registro, campo, parsear_monto(request.POST.get(campo), default))
 
+        # save() recalcula el sobrante si NO es fijo
         registro.save()
 
         messages.success(request, "Registro actualizado correctamente.")
@@ -0,0 +1,78 @@
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import F, Q
+from django.http import JsonResponse
+
+from ...models import RegistroFinanciero
+
+
+# Cantidad de registros que muestra el dashboard por página
+TAMANIO_VENTANA = 30
+
+
+# ============================================================
+# Ventana de registros (paginación por clave sobre fecha e id)
+# ============================================================
+def ventana_registros(usuario, antes=None, antes_id=None, limite=TAMANIO_VENTANA):
+    """
+    Devuelve hasta `limite` registros del usuario, del más reciente
+    al más antiguo, posteriores en ese orden a (`antes`, `antes_id`).
+    El id desempata las fechas repetidas, que la base no impide; sin
+    `antes_id` se continúa desde la fecha anterior a `antes`.
+
+    Retorna (filas, siguiente): `filas` son diccionarios livianos y
+    `siguiente` es {"fecha", "id"} de la última fila, para enviar como
+    `antes` y `antes_id` en la próxima página, o None si no quedan más.
+    """
+    registros = RegistroFinanciero.objects.filter(user=usuario)
+    if antes and antes_id is not None:
+        registros = registros.filter(Q(fecha__lt=antes) | Q(fecha=antes, id__lt=antes_id))
+    elif antes:
+        registros = registros.filter(fecha__lt=antes)
+
+    filas = list(
+        registros
+        .order_by("-fecha", "-id")
+        .annotate(gasto=F("alimento") + F("productos") + F("ahorro_y_deuda"))
+        .values(
+            "id", "fecha", "para_gastar_dia", "gasto",
+            "sobrante_monetario", "completado",
+        )[:limite + 1]
+    )
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = {"fecha": filas[-1]["fecha"], "id": filas[-1]["id"]}
+
+    return filas, siguiente
+
+
+# ============================================================
+# Vista: "Cargar más" del dashboard (JSON)
+# ============================================================
+@login_required
+def registros_recientes(request):
+    antes_str = request.GET.get("antes")
+    antes_id_str = request.GET.get("antes_id")
+    antes = antes_id = None
+
+    if antes_str:
+        try:
+            antes = date.fromisoformat(antes_str)
+        except ValueError:
+            return JsonResponse({"error": "Formato de fecha inválido."}, status=400)
+
+    if antes_id_str:
+        try:
+            antes_id = int(antes_id_str)
+        except ValueError:
+            return JsonResponse({"error": "Identificador inválido."}, status=400)
+
+    filas, siguiente = ventana_registros(request.user, antes=antes, antes_id=antes_id)
+
+    return JsonResponse({
+        "registros": filas,
+        "siguiente": siguiente,
+    })
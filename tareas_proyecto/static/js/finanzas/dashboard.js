@@ -66,8 +66,91 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     });
 
+    // ------------------------------------------------------
+    // DESBLOQUEAR INPUTS FIJOS CON CLICK EN 🔒
+    // ------------------------------------------------------
+    const lockButtons = document.querySelectorAll(".lock-btn");
+
+    lockButtons.forEach(btn => {
+        btn.addEventListener("click", () => {
+
+            const inputId = btn.dataset.target;
+            const input = document.getElementById(inputId);
+            if (!input) return;
+
+            // Si ya está desbloqueado, no hacer nada
+            if (!input.hasAttribute("data-locked")) return;
+
+            // 🔓 Desbloquear
+            input.removeAttribute("readonly");
+            input.removeAttribute("data-locked");
+            input.classList.remove("input-locked");
+
+            // Cambiar icono
+            btn.textContent = "🔓";
+            btn.title = "Campo desbloqueado";
+
+            // Foco inmediato
+            input.focus();
+            input.select();
+        });
+    });
+
+    // ------------------------------------------------------
+    // ÚLTIMOS REGISTROS → "CARGAR MÁS" (paginación por fecha e id)
+    // ------------------------------------------------------
+    const boton = document.getElementById("btn-cargar-mas");
+    const cuerpo = document.getElementById("recientes-body");
+    if (boton && cuerpo) {
+
+        const formatearFecha = iso => {
+            const [anio, mes, dia] = iso.split("-");
+            return `${dia}/${mes}/${anio}`;
+        };
+
+        boton.addEventListener("click", async () => {
+            boton.disabled = true;
+
+            const url = `${boton.dataset.url}?antes=${boton.dataset.antes}&antes_id=${boton.dataset.antesId}`;
+            const respuesta = await fetch(url, { headers: { "Accept": "application/json" } });
+
+            if (!respuesta.ok) {
+                boton.disabled = false;
+                return;
+            }
+
+            const datos = await respuesta.json();
+
+            datos.registros.forEach(r => {
+                const fila = document.createElement("tr");
+                [
+                    formatearFecha(r.fecha),
+                    `$${r.para_gastar_dia}`,
+                    `$${r.gasto}`,
+                    `$${r.sobrante_monetario}`,
+                    r.completado ? "✔" : "Pendiente",
+                ].forEach(valor => {
+                    const celda = document.createElement("td");
+                    celda.textContent = valor;
+                    fila.appendChild(celda);
+                });
+                cuerpo.appendChild(fila);
+            });
+
+            // Sin más páginas → quitar el botón
+            if (datos.siguiente) {
+                boton.dataset.antes = datos.siguiente.fecha;
+                boton.dataset.antesId = datos.siguiente.id;
+                boton.disabled = false;
+            } else {
+                boton.parentElement.remove();
+            }
+        });
+    }
+
 });
 
+
 function animarCampoFijado(idCampo) {
     const input = document.getElementById(idCampo);
     if (!input) return;
@@ -103,37 +186,3 @@ function animarCampoFijado(idCampo) {
         animarCampoFijado(id);
     }
 });
-
-// ------------------------------------------------------
-// DESBLOQUEAR INPUTS FIJOS CON CLICK EN 🔒
-// ------------------------------------------------------
-document.addEventListener("DOMContentLoaded", () => {
-
-    const lockButtons = document.querySelectorAll(".lock-btn");
-
-    lockButtons.forEach(btn => {
-        btn.addEventListener("click", () => {
-
-            const inputId = btn.dataset.target;
-            const input = document.getElementById(inputId);
-            if (!input) return;
-
-            // Si ya está desbloqueado, no hacer nada
-            if (!input.hasAttribute("data-locked")) return;
-
-            // 🔓 Desbloquear
-            input.removeAttribute("readonly");
-            input.removeAttribute("data-locked");
-            input.classList.remove("input-locked");
-
-            // Cambiar icono
-            btn.textContent = "🔓";
-            btn.title = "Campo desbloqueado";
-
-            // Foco inmediato
-            input.focus();
-            input.select();
-        });
-    });
-
-});
\ No newline at end of file
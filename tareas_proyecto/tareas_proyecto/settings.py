@@ -93,6 +93,33 @@ DATABASES = {
     }
 }
 
+# ==============================
+#   CACHÉ
+# ==============================
+# Tiene que ser compartida entre procesos: el dashboard se invalida con
+# versiones por usuario que también incrementan reparar_finanzas,
+# reconstruir_resumen y otros procesos. Por defecto en archivos; en
+# producción se puede usar, p. ej.,
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache con su
+# CACHE_LOCATION. Un backend propio de cada proceso (LocMemCache,
+# DummyCache) equivale a no cachear: ni el contexto del dashboard ni los
+# indicadores memorizados se guardan, porque una invalidación hecha en
+# otro proceso no llegaría y se servirían datos viejos.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'django_cache')),
+    }
+}
+
+# Segundos que vive el contexto cacheado del dashboard financiero
+FINANZAS_CACHE_TIMEOUT = config('FINANZAS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Indicadores memorizados: entradas de la LRU de cada proceso y si además
+# se guardan en la caché de Django (compartida si el backend lo es)
+FINANZAS_INDICADORES_LRU = config('FINANZAS_INDICADORES_LRU', default=512, cast=int)
+FINANZAS_INDICADORES_CACHE_COMPARTIDA = config('FINANZAS_INDICADORES_CACHE_COMPARTIDA', default=False, cast=bool)
+
 # ==============================
 #   VALIDACIÓN DE CONTRASEÑAS
 # ==============================